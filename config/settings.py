@@ -1,5 +1,8 @@
 
 
+import importlib.util
+import os
+import sys
 from pathlib import Path
 from datetime import timedelta
 
@@ -44,6 +47,8 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    # birinchi turadi: qolgan middlewarelar vaqti ham o'lchansin
+    'configApp.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -79,13 +84,134 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DB_ENGINE=postgres bo'lsa PostgreSQL, aks holda sozlangan SQLite ishlatiladi.
+
+if os.environ.get('DB_ENGINE', 'sqlite') == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'student_lists'),
+            'USER': os.environ.get('DB_USER', 'postgres'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
     }
+    if os.environ.get('DB_POOL', '1') == '1':
+        # psycopg[pool] connection pool; Django pool bilan CONN_MAX_AGE ni birga qo'llamaydi
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN', 2)),
+            'max_size': int(os.environ.get('DB_POOL_MAX', 20)),
+            'timeout': 10,
+        }
+    else:
+        DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('DB_CONN_MAX_AGE', 600))
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 600)),
+            'OPTIONS': {
+                # busy_timeout (sekund) va yozuv tranzaksiyalari boshidanoq lock oladi:
+                # o'qishdan yozishga o'tishda "database is locked" bo'lmaydi
+                'timeout': 20,
+                'transaction_mode': 'IMMEDIATE',
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                    'PRAGMA mmap_size=268435456;'
+                    'PRAGMA cache_size=-20000;'
+                    'PRAGMA temp_store=MEMORY;'
+                ),
+            },
+        }
+    }
+
+
+# Cache
+# Bir nechta worker process bo'lsa REDIS_URL berilishi shart: LocMemCache har bir
+# process uchun alohida va versiya hisoblagichlari processlar orasida bo'linmaydi.
+
+# 'tokens' - JWT bekor qilish belgilari. Ular siqib chiqarilsa bekor qilingan token yana ishlaydi,
+# shuning uchun javob keshidan alohida va cheklovsiz; Redis da maxmemory-policy noeviction bo'lsin.
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        },
+        'tokens': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('REDIS_TOKENS_URL', os.environ['REDIS_URL']),
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        },
+        'tokens': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'tokens',
+            # har bir foydalanuvchiga bitta kalit; muddati o'tganlari o'qilganda o'chadi
+            'OPTIONS': {'MAX_ENTRIES': sys.maxsize},
+        },
+    }
+
+# /metrics (Prometheus) uchun so'rov o'lchovlari; SLOW_REQUEST_MS dan sekin so'rovlar
+# eng uzoq SQL lari bilan configApp.slow_requests loggeriga yoziladi
+METRICS = {
+    'ENABLED': os.environ.get('METRICS_ENABLED', '1') == '1',
+    'SERVER_TIMING': os.environ.get('METRICS_SERVER_TIMING', '0') == '1',
+    'SLOW_REQUEST_MS': int(os.environ.get('SLOW_REQUEST_MS', 500)),
+    'SLOW_TOP_QUERIES': 5,
+    'TOKEN': os.environ.get('METRICS_TOKEN', ''),
+}
+
+# OTP kodlar alohida store da: Redis bo'lsa unda, aks holda serverdagi barcha
+# processlar uchun umumiy SQLite faylda (asosiy bazaga tegmaydi).
+OTP_STORE = {
+    'BACKEND': 'redis' if os.environ.get('REDIS_URL') else 'sqlite',
+    'LOCATION': os.environ.get('REDIS_URL') or os.environ.get('OTP_STORE_PATH', BASE_DIR / 'otp.sqlite3'),
+    'TTL': int(os.environ.get('OTP_TTL', 300)),
+    'COOLDOWN': int(os.environ.get('OTP_COOLDOWN', 60)),
+    'MAX_ATTEMPTS': int(os.environ.get('OTP_MAX_ATTEMPTS', 5)),
+    'LENGTH': 4,
+}
+# Tashqi xabarlar (SMS) navbati: so'rov faqat navbatga yozadi, run_notification_worker yuboradi
+NOTIFICATIONS = {
+    'GATEWAY': os.environ.get('NOTIFICATION_GATEWAY', 'configApp.notifications.ConsoleGateway'),
+    'OPTIONS': {},
+    'MAX_ATTEMPTS': 5,
+    'BACKOFF': 5,
+    'LEASE': 60,
 }
 
+# roll-call da shu AttendanceLevel id lari belgilansa ota-onaga SMS navbatga qo'yiladi
+ATTENDANCE_NOTIFY_LEVELS = [
+    int(level) for level in os.environ.get('ATTENDANCE_NOTIFY_LEVELS', '').split(',') if level.strip()
+]
+
+# PASSWORD_HASH_WORKERS > 0 bo'lsa parollar configApp.hashing dagi process poolda hash qilinadi
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 0))
+
+# argon2-cffi o'rnatilgan bo'lsa yangi parollar Argon2 bilan saqlanadi; PBKDF2 bilan
+# saqlanganlari login paytida avtomatik qayta hash qilinadi (User.check_password)
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'configApp.hashing.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+if importlib.util.find_spec('argon2'):
+    PASSWORD_HASHERS.insert(0, PASSWORD_HASHERS.pop(2))
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -113,12 +239,15 @@ SIMPLE_JWT = {
     "SIGNING_KEY": SECRET_KEY,
     
     
-    "TOKEN_OBTAIN_SERIALIZER": "rest_framework_simplejwt.serializers.TokenObtainPairSerializer",
-    "TOKEN_REFRESH_SERIALIZER": "rest_framework_simplejwt.serializers.TokenRefreshSerializer",
+    "TOKEN_OBTAIN_SERIALIZER": "configApp.authentication.ClaimsTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "configApp.authentication.RevocationTokenRefreshSerializer",
     "TOKEN_VERIFY_SERIALIZER": "rest_framework_simplejwt.serializers.TokenVerifySerializer",
     "TOKEN_BLACKLIST_SERIALIZER": "rest_framework_simplejwt.serializers.TokenBlacklistSerializer",
     "SLIDING_TOKEN_OBTAIN_SERIALIZER": "rest_framework_simplejwt.serializers.TokenObtainSlidingSerializer",
     "SLIDING_TOKEN_REFRESH_SERIALIZER": "rest_framework_simplejwt.serializers.TokenRefreshSlidingSerializer",
+
+    # foydalanuvchi har so'rovda DB dan emas, token claimlaridan quriladi
+    "TOKEN_USER_CLASS": "configApp.models.TokenUser",
 }
 
 # Internationalization
@@ -155,11 +284,25 @@ REST_FRAMEWORK = {
 
     'DEFAULT_AUTHENTICATION_CLASSES': (
 
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'configApp.authentication.StatelessJWTAuthentication',
     ),
+    'DEFAULT_RENDERER_CLASSES': [
+        'configApp.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'configApp.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 100
 }
 
+# Accept: application/msgpack faqat msgpack o'rnatilganda e'lon qilinadi, aks holda 406
+if importlib.util.find_spec('msgpack'):
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append('configApp.renderers.MessagePackRenderer')
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'].append('configApp.renderers.MessagePackParser')
+
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
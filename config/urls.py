@@ -5,6 +5,7 @@ from drf_yasg.views import get_schema_view
 from rest_framework_simplejwt.views import (TokenObtainPairView, TokenRefreshView, TokenVerifyView)
 from rest_framework import permissions
 from drf_yasg import openapi
+from configApp.views import MetricsView
 
 schema_view = get_schema_view(
     openapi.Info(
@@ -23,6 +24,7 @@ urlpatterns = [
     
     path('admin/', admin.site.urls),
     path('api/', include('configApp.urls')),
+    path('metrics', MetricsView.as_view(), name='metrics'),
     
     path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('refresh/', TokenRefreshView.as_view(), name='token_refresh'),
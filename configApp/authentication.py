@@ -0,0 +1,82 @@
+import logging
+import time
+
+from django.core.cache import caches
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+ROLE_CLAIMS = ('phone', 'full_name', 'is_active', 'is_staff', 'is_admin', 'is_student', 'is_teacher')
+REVOKED_KEY = 'jwt:revoked:{}'
+VERSION_CLAIM = 'rev'
+TOKEN_CACHE = 'tokens'
+
+logger = logging.getLogger(__name__)
+
+
+def token_store():
+    """Bekor qilish belgilari uchun alohida, siqib chiqarmaydigan cache (settings.CACHES['tokens'])"""
+    return caches[TOKEN_CACHE]
+
+
+def revoke_user_tokens(user_id):
+    """
+    Foydalanuvchining shu paytgacha berilgan barcha tokenlarini bekor qiladi. Yozuv refresh
+    token umridan ortiq saqlanmaydi: undan oldin berilgan tokenlar baribir eskirgan bo'ladi.
+    Qiymat nanosekundlarda: iat (butun sekund) bilan solishtirilsa, bekor qilingan sekundda
+    qayta login qilib olingan token ham rad etilardi.
+    """
+    timeout = int(api_settings.REFRESH_TOKEN_LIFETIME.total_seconds())
+    token_store().set(REVOKED_KEY.format(user_id), time.time_ns(), timeout=timeout)
+
+
+def token_version(user_id):
+    return token_store().get(REVOKED_KEY.format(user_id), 0)
+
+
+def is_revoked(token):
+    """
+    Token o'zi berilgan paytdagi versiyani (rev) olib yuradi; keyin bekor qilingan bo'lsa rev kichik.
+    Cache ishlamasa token rad etiladi: bekor qilinganini tekshirib bo'lmaydi.
+    """
+    try:
+        revoked_at = token_store().get(REVOKED_KEY.format(token.get(api_settings.USER_ID_CLAIM)))
+    except Exception:
+        logger.exception('token revocation store unavailable')
+        return True
+    return revoked_at is not None and token.get(VERSION_CLAIM, 0) < revoked_at
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Login paytida rol flaglarini tokenga imzolab qo'yadi"""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        for claim in ROLE_CLAIMS:
+            token[claim] = getattr(user, claim)
+        token['is_superuser'] = user.is_superuser
+        token[VERSION_CLAIM] = token_version(user.pk)
+        return token
+
+
+class RevocationTokenRefreshSerializer(TokenRefreshSerializer):
+    def validate(self, attrs):
+        if is_revoked(self.token_class(attrs['refresh'])):
+            raise InvalidToken('Token has been revoked')
+        return super().validate(attrs)
+
+
+class StatelessJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    users jadvalisiz autentifikatsiya: foydalanuvchi TokenUser sifatida
+    token claimlaridan quriladi, faqat bekor qilinganlik 'tokens' cache da tekshiriladi.
+    """
+
+    def get_user(self, validated_token):
+        if is_revoked(validated_token):
+            raise InvalidToken('Token has been revoked')
+        if validated_token.get('is_active') is False:
+            raise InvalidToken('User is inactive')
+        return super().get_user(validated_token)
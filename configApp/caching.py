@@ -0,0 +1,95 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+
+VERSION_KEY = 'version:{}'
+# qiymat (content, headers); eski (content, content_type) yozuvlari bilan to'qnashmasligi uchun prefiks yangi
+RESPONSE_KEY = 'response-h:{}:{}:{}'
+
+
+def _version_key(model):
+    return VERSION_KEY.format(model._meta.label_lower)
+
+
+def model_version(model):
+    key = _version_key(model)
+    version = cache.get(key)
+    if version is None:
+        # yo'qolgan hisoblagich eski versiyalardan birini qaytarmasligi uchun vaqtdan boshlaymiz
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _bump(model):
+    key = _version_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def bump_model_version(model):
+    """
+    Versiyani commit dan keyin oshiramiz: aks holda parallel so'rov yangi
+    versiya bilan hali commit bo'lmagan eski ma'lumotni keshlab qo'yishi mumkin.
+    """
+    transaction.on_commit(lambda: _bump(model))
+
+
+def models_version(models):
+    keys = [_version_key(model) for model in models]
+    found = cache.get_many(keys)
+    return '.'.join(
+        str(found[key]) if key in found else str(model_version(model))
+        for key, model in zip(keys, models)
+    )
+
+
+class CachedResponseMixin:
+    """
+    list/retrieve javoblarini render qilingan baytlar ko'rinishida keshlaydi.
+    Kalit model versiyalariga bog'liq, yozuvlar signal orqali versiyani oshiradi.
+    """
+    cache_timeout = 60 * 60
+    cache_models = None
+
+    def get_cache_models(self):
+        return self.cache_models or [self.queryset.model]
+
+    def get_response_cache_key(self, request):
+        path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        version = models_version(self.get_cache_models())
+        return RESPONSE_KEY.format(version, request.accepted_media_type, path)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        # browsable API foydalanuvchiga bog'liq HTML qaytaradi
+        if request.accepted_renderer.format == 'api':
+            return handler(request, *args, **kwargs)
+
+        key = self.get_response_cache_key(request)
+        cached = cache.get(key)
+        if cached is not None:
+            content, headers = cached
+            # Allow va Vary ni finalize_response ikkala holatda ham qo'yadi; view/renderer qo'ygan
+            # qolgan headerlar keshdan tiklanadi
+            return HttpResponse(content, headers=headers)
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code != 200:
+            return response
+        response.accepted_renderer = request.accepted_renderer
+        response.accepted_media_type = request.accepted_media_type
+        response.renderer_context = self.get_renderer_context()
+        response.render()
+        cache.set(key, (response.content, dict(response.items())), self.cache_timeout)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
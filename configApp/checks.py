@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.caches, deploy=True)
+def shared_cache_check(app_configs, **kwargs):
+    """LocMemCache har bir process uchun alohida: bir nechta worker bir-birining yozuvlarini ko'rmaydi"""
+    local = [alias for alias in ('default', 'tokens') if settings.CACHES[alias]['BACKEND'].endswith('LocMemCache')]
+    if not local:
+        return []
+    return [Warning(
+        f"{', '.join(local)} cache LocMemCache: JWT bekor qilish, javob keshi versiyalari va boshqa "
+        "umumiy holat faqat shu processda ko'rinadi.",
+        hint="Bir nechta worker process bilan ishga tushirishda REDIS_URL bering.",
+        id='configApp.W001',
+    )]
@@ -0,0 +1,117 @@
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+
+from .models import Attendance, Course, Enrollment, Group, Student, User, Worker
+
+CHUNK_SIZE = 2000
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+def _ids(model):
+    return model._default_manager.only('pk')
+
+
+class Dataset:
+    """
+    Eksport qilinadigan jadval: oddiy ustunlar values() orqali, M2M id lar esa
+    har bir chunk uchun bitta prefetch so'rovi bilan olinadi.
+    """
+
+    def __init__(self, queryset, columns, many=()):
+        self.queryset = queryset
+        self.columns = columns
+        self.many = many
+
+    @property
+    def header(self):
+        return list(self.columns) + [name for name, _ in self.many]
+
+    def rows(self, chunk_size=CHUNK_SIZE):
+        queryset = self.queryset().order_by('pk')
+        if not self.many:
+            yield from queryset.values(*self.columns).iterator(chunk_size=chunk_size)
+            return
+
+        attnames = [
+            name if '__' in name else queryset.model._meta.get_field(name).attname
+            for name in self.columns
+        ]
+        queryset = queryset.prefetch_related(*[
+            Prefetch(name, queryset=_ids(model)) for name, model in self.many
+        ])
+        related = [name.split('__')[0] for name in self.columns if '__' in name]
+        if related:
+            queryset = queryset.select_related(*related)
+        for obj in queryset.iterator(chunk_size=chunk_size):
+            row = {}
+            for column, attname in zip(self.columns, attnames):
+                value = obj
+                for part in attname.split('__'):
+                    value = getattr(value, part, None)
+                row[column] = value
+            for name, _ in self.many:
+                row[name] = [item.pk for item in getattr(obj, name).all()]
+            yield row
+
+
+DATASETS = {
+    'students': Dataset(
+        lambda: Student.objects.all(),
+        ['id', 'user', 'user__phone', 'full_name', 'email', 'age', 'is_line', 'created', 'updated'],
+        many=[('group', Group), ('course', Course)],
+    ),
+    'groups': Dataset(
+        lambda: Group.objects.all(),
+        ['id', 'name', 'title', 'course', 'table', 'start_date', 'end_date', 'price', 'created'],
+        many=[('students', Student), ('teacher', Worker)],
+    ),
+    'enrollments': Dataset(
+        lambda: Enrollment.objects.all(),
+        ['id', 'student', 'course', 'status', 'date_joined'],
+    ),
+    'attendance': Dataset(
+        lambda: Attendance.objects.all(),
+        ['id', 'student', 'group', 'level', 'date', 'created'],
+    ),
+    'users': Dataset(
+        lambda: User.objects.all(),
+        ['id', 'phone', 'full_name', 'is_active', 'is_staff', 'is_admin', 'is_student', 'is_teacher', 'created'],
+    ),
+}
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if isinstance(value, list):
+        return ';'.join(str(item) for item in value)
+    return value
+
+
+def stream_csv(dataset, chunk_size=CHUNK_SIZE):
+    writer = csv.writer(_Echo())
+    header = dataset.header
+    yield writer.writerow(header)
+    for row in dataset.rows(chunk_size):
+        yield writer.writerow([_csv_value(row[key]) for key in header])
+
+
+def stream_jsonl(dataset, chunk_size=CHUNK_SIZE):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in dataset.rows(chunk_size):
+        yield encoder.encode(row) + '\n'
+
+
+def stream(name, fmt, chunk_size=CHUNK_SIZE):
+    dataset = DATASETS[name]
+    if fmt == 'csv':
+        return stream_csv(dataset, chunk_size)
+    return stream_jsonl(dataset, chunk_size)
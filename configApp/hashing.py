@@ -0,0 +1,87 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+# har bir processga bir nechta parol yuboriladi: IPC xarajati hash vaqtiga nisbatan kichik bo'lsin
+BULK_CHUNK_SIZE = 16
+
+_pool = None
+_lock = threading.Lock()
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """
+    Argon2id, OWASP tavsiyasidagi parametrlar (19 MiB, 2 o'tish, 1 thread): Django
+    standartidagi 100 MiB / 8 thread dan ancha tez, lekin baribir xotira talab qiladi.
+    Parametrlari boshqa bo'lgan eski argon2 hashlar login paytida yangilanadi.
+    """
+    time_cost = 2
+    memory_cost = 19456
+    parallelism = 1
+
+
+def _setup_worker(settings_module):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+
+def _hash_many(passwords):
+    return [hashers.make_password(password) for password in passwords]
+
+
+def _verify(password, encoded):
+    return hashers.verify_password(password, encoded)
+
+
+def workers():
+    return getattr(settings, 'PASSWORD_HASH_WORKERS', 0)
+
+
+def get_pool():
+    """
+    Hash ishlari uchun chegaralangan process pool. Processlar spawn bilan ochiladi:
+    ko'p threadli server processidan fork qilish xavfli. PASSWORD_HASH_WORKERS=0 (standart)
+    bo'lsa hash joriy threadda hisoblanadi.
+    """
+    global _pool
+    if _pool is None and workers():
+        with _lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(
+                    max_workers=workers(), mp_context=get_context('spawn'),
+                    initializer=_setup_worker, initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings'),),
+                )
+    return _pool
+
+
+def hash_password(password):
+    """Parolni bir marta, PASSWORD_HASHERS dagi birinchi algoritm bilan hash qiladi"""
+    pool = get_pool()
+    if pool is None:
+        return hashers.make_password(password)
+    return pool.submit(_hash_many, [password]).result()[0]
+
+
+def hash_passwords(passwords):
+    """Ommaviy ro'yxatdan o'tkazish uchun: parollar chunk larga bo'linib barcha processlarda hash qilinadi"""
+    passwords = list(passwords)
+    pool = get_pool()
+    if pool is None:
+        return _hash_many(passwords)
+    chunks = [passwords[i:i + BULK_CHUNK_SIZE] for i in range(0, len(passwords), BULK_CHUNK_SIZE)]
+    return [encoded for hashed in pool.map(_hash_many, chunks) for encoded in hashed]
+
+
+def verify_password(password, encoded):
+    """(to'g'rimi, qayta hash kerakmi) qaytaradi; tekshiruv ham process poolda bajariladi"""
+    if password is None or not encoded or not hashers.is_password_usable(encoded):
+        return False, False
+    pool = get_pool()
+    if pool is None:
+        return hashers.verify_password(password, encoded)
+    return pool.submit(_verify, password, encoded).result()
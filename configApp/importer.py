@@ -0,0 +1,223 @@
+import codecs
+import csv
+import time
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import DataError, IntegrityError, transaction
+
+from . import hashing, search
+from .caching import bump_model_version
+from .models import Course, Group, Parents, Student, User
+from .phones import normalize_phone
+
+COLUMNS = (
+    'phone', 'password', 'full_name', 'email', 'age', 'groups', 'courses',
+    'parent_full_name', 'parent_phone', 'parent_address', 'descriptions',
+)
+DEFAULT_CHUNK_SIZE = 500
+
+
+def read_csv(fileobj):
+    """Buzilgan yoki UTF-8 bo'lmagan fayl qator raqami bilan ValueError beradi (view da 400)"""
+    reader = csv.DictReader(codecs.iterdecode(fileobj, 'utf-8-sig'))
+    # yozuv boshlanadigan qator: xato paytida line_num ga ishonib bo'lmaydi
+    line = 1
+    try:
+        reader.fieldnames
+        line = reader.line_num + 1
+        for row in reader:
+            yield {key.strip(): (value or '').strip() for key, value in row.items() if key}
+            line = reader.line_num + 1
+    except UnicodeDecodeError:
+        raise ValueError(f"{line}-qator: fayl UTF-8 da emas")
+    except csv.Error as e:
+        raise ValueError(f"{line}-qator: CSV xatosi ({e})")
+
+
+def read_xlsx(fileobj):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("XLSX import uchun openpyxl o'rnatilishi kerak")
+
+    sheet = load_workbook(fileobj, read_only=True, data_only=True).active
+    rows = sheet.iter_rows(values_only=True)
+    header = [str(cell).strip() if cell is not None else '' for cell in next(rows, ())]
+    for values in rows:
+        yield {
+            key: '' if value is None else str(value).strip()
+            for key, value in zip(header, values) if key
+        }
+
+
+def read_rows(fileobj, filename):
+    if filename.lower().endswith('.xlsx'):
+        return read_xlsx(fileobj)
+    return read_csv(fileobj)
+
+
+def _split_ids(value):
+    return [int(part) for part in value.replace(';', ',').split(',') if part.strip()]
+
+
+class StudentImporter:
+    """
+    CSV/XLSX qatorlarini chunk lab tekshiradi va User, Student, Parents hamda
+    Student.group / Student.course bog'lanishlarini bulk_create bilan yozadi.
+    """
+
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        if chunk_size < 1:
+            raise ValueError("chunk_size musbat son bo'lishi kerak")
+        self.chunk_size = chunk_size
+        self.seen_phones = set()
+        self.known_groups = set()
+        self.known_courses = set()
+        self.total = 0
+        self.created = 0
+        self.errors = []
+
+    def run(self, rows):
+        started = time.perf_counter()
+        rows = iter(rows)
+        line = 1
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            numbered = list(enumerate(chunk, start=line + 1))
+            line += len(chunk)
+            self.total += len(chunk)
+            self.import_chunk(numbered)
+        seconds = time.perf_counter() - started
+        return {
+            'total': self.total,
+            'created': self.created,
+            'failed': self.total - self.created,
+            'errors': self.errors,
+            'seconds': round(seconds, 3),
+            'rows_per_second': round(self.total / seconds, 1) if seconds else None,
+        }
+
+    def _missing_ids(self, model, known, ids):
+        unknown = ids - known
+        if unknown:
+            known.update(model.objects.filter(pk__in=unknown).values_list('pk', flat=True))
+        return ids - known
+
+    def validate_chunk(self, numbered):
+        for _, row in numbered:
+            row['phone'] = normalize_phone(row.get('phone', ''))
+        phones = [row['phone'] for _, row in numbered]
+        existing = set(User.objects.filter(phone__in=phones).values_list('phone', flat=True))
+        group_ids, course_ids, parsed = set(), set(), []
+
+        for number, row in numbered:
+            errors = {}
+            phone = row.get('phone', '')
+            try:
+                User.phone_regex(phone)
+            except ValidationError as e:
+                errors['phone'] = e.messages
+            if phone in existing or phone in self.seen_phones:
+                errors['phone'] = ['phone number already exist']
+            if not row.get('full_name'):
+                errors['full_name'] = ['required']
+            try:
+                validate_email(row.get('email', ''))
+            except ValidationError as e:
+                errors['email'] = e.messages
+            try:
+                age = int(row.get('age', ''))
+            except ValueError:
+                errors['age'] = ['integer kerak']
+                age = None
+            try:
+                groups = _split_ids(row.get('groups', ''))
+                courses = _split_ids(row.get('courses', ''))
+            except ValueError:
+                errors['groups'] = ['id lar vergul bilan ajratilgan son bo\'lishi kerak']
+                groups, courses = [], []
+
+            if errors:
+                self.errors.append({'row': number, 'errors': errors})
+                continue
+            self.seen_phones.add(phone)
+            group_ids.update(groups)
+            course_ids.update(courses)
+            parsed.append((number, row, age, groups, courses))
+
+        missing_groups = self._missing_ids(Group, self.known_groups, group_ids)
+        missing_courses = self._missing_ids(Course, self.known_courses, course_ids)
+        valid = []
+        for number, row, age, groups, courses in parsed:
+            errors = {}
+            if missing_groups.intersection(groups):
+                errors['groups'] = [f'topilmadi: {sorted(missing_groups.intersection(groups))}']
+            if missing_courses.intersection(courses):
+                errors['courses'] = [f'topilmadi: {sorted(missing_courses.intersection(courses))}']
+            if errors:
+                self.seen_phones.discard(row['phone'])
+                self.errors.append({'row': number, 'errors': errors})
+            else:
+                valid.append((number, row, age, groups, courses))
+        return valid
+
+    def write(self, valid, passwords):
+        users = User.objects.bulk_create([
+            User(phone=row['phone'], password=password, full_name=row['full_name'][:50], is_student=True)
+            for (_, row, _, _, _), password in zip(valid, passwords)
+        ])
+        students = Student.objects.bulk_create([
+            Student(user=user, full_name=row['full_name'], email=row['email'], age=age,
+                    descriptions=row.get('descriptions') or None)
+            for user, (_, row, age, _, _) in zip(users, valid)
+        ])
+        parents = Parents.objects.bulk_create([
+            Parents(student=student, full_name=row.get('parent_full_name') or None,
+                    phone_number=row.get('parent_phone') or None,
+                    address=row.get('parent_address') or None)
+            for student, (_, row, _, _, _) in zip(students, valid)
+            if row.get('parent_full_name') or row.get('parent_phone')
+        ])
+        Student.group.through.objects.bulk_create([
+            Student.group.through(student_id=student.pk, group_id=group_id)
+            for student, (_, _, _, groups, _) in zip(students, valid)
+            for group_id in groups
+        ])
+        Student.course.through.objects.bulk_create([
+            Student.course.through(student_id=student.pk, course_id=course_id)
+            for student, (_, _, _, _, courses) in zip(students, valid)
+            for course_id in courses
+        ])
+        # bulk_create signal yubormaydi
+        search.index_users(users)
+        search.index_students(students)
+        search.index_parents(parents)
+        for model in (User, Student, Parents):
+            bump_model_version(model)
+
+    def import_chunk(self, numbered):
+        valid = self.validate_chunk(numbered)
+        if not valid:
+            return
+        passwords = hashing.hash_passwords(item[1].get('password') or None for item in valid)
+
+        try:
+            with transaction.atomic():
+                self.write(valid, passwords)
+        except (IntegrityError, DataError):
+            # chunk dagi xato qaysi qatorligini aytmaydi: har bir qator o'z savepointida qayta yoziladi
+            for item, password in zip(valid, passwords):
+                try:
+                    with transaction.atomic():
+                        self.write([item], [password])
+                except (IntegrityError, DataError) as e:
+                    self.seen_phones.discard(item[1]['phone'])
+                    self.errors.append({'row': item[0], 'errors': {'non_field_errors': [str(e)]}})
+                else:
+                    self.created += 1
+            return
+        self.created += len(valid)
@@ -0,0 +1,123 @@
+import asyncio
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.asgi import get_asgi_application
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.db.backends.signals import connection_created
+
+PATHS = {
+    'group': ('/api/group_get/', '/api/async/group_get/'),
+    'student': ('/api/student/', '/api/async/student/'),
+}
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+class Command(BaseCommand):
+    help = "WSGI + sync view va ASGI + async view: so'rov/soniya va p99 ni process ichida solishtiradi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoint', choices=sorted(PATHS), default='group')
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--cold', action='store_true', help="Har so'rovdan oldin keshni tozalash (sectionlar qayta quriladi)")
+        parser.add_argument('--db-latency', type=float, default=0,
+                            help="Har bir SQL so'roviga qo'shiladigan kechikish (ms): tarmoqdagi PostgreSQL ni taqlid qiladi")
+
+    def run_wsgi(self, path, options):
+        application = get_wsgi_application()
+        environ = {
+            'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '', 'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80', 'HTTP_HOST': 'localhost', 'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(), 'wsgi.errors': io.StringIO(),
+        }
+
+        def one(_):
+            if options['cold']:
+                cache.clear()
+            started = time.perf_counter()
+            status = []
+            body = b''.join(application(dict(environ), lambda code, headers: status.append(code)))
+            assert status[0].startswith('200'), (status, body[:200])
+            return time.perf_counter() - started
+
+        with ThreadPoolExecutor(options['concurrency']) as pool:
+            started = time.perf_counter()
+            latencies = list(pool.map(one, range(options['requests'])))
+            return latencies, time.perf_counter() - started
+
+    def run_asgi(self, path, options):
+        application = get_asgi_application()
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+            'path': path, 'raw_path': path.encode(), 'root_path': '', 'query_string': b'',
+            'headers': [(b'host', b'localhost')], 'server': ('localhost', 80), 'client': ('127.0.0.1', 1),
+        }
+
+        async def one(semaphore):
+            async with semaphore:
+                if options['cold']:
+                    cache.clear()
+                messages = []
+                sent = False
+
+                async def receive():
+                    nonlocal sent
+                    if not sent:
+                        sent = True
+                        return {'type': 'http.request', 'body': b'', 'more_body': False}
+                    # javob tugaguncha uzilish bo'lmaydi
+                    await asyncio.Future()
+
+                async def send(message):
+                    messages.append(message)
+
+                started = time.perf_counter()
+                await application(dict(scope), receive, send)
+                assert messages[0]['status'] == 200, messages[:2]
+                return time.perf_counter() - started
+
+        async def main():
+            semaphore = asyncio.Semaphore(options['concurrency'])
+            started = time.perf_counter()
+            latencies = await asyncio.gather(*(one(semaphore) for _ in range(options['requests'])))
+            return latencies, time.perf_counter() - started
+
+        return asyncio.run(main())
+
+    def report(self, name, latencies, elapsed):
+        self.stdout.write(
+            f"{name}: {len(latencies) / elapsed:.0f} req/s, "
+            f"p50 {percentile(latencies, 0.5) * 1000:.2f} ms, p99 {percentile(latencies, 0.99) * 1000:.2f} ms"
+        )
+
+    def handle(self, *args, **options):
+        sync_path, async_path = PATHS[options['endpoint']]
+        if options['db_latency']:
+            delay = options['db_latency'] / 1000
+
+            def slow(execute, sql, params, many, context):
+                time.sleep(delay)
+                return execute(sql, params, many, context)
+
+            def install(sender, connection, **kwargs):
+                # har bir thread o'z ulanishini ochadi; qayta ulanganda wrapper ikki marta qo'shilmasin
+                if slow not in connection.execute_wrappers:
+                    connection.execute_wrappers.append(slow)
+
+            connection_created.connect(install, weak=False)
+            connection.close()
+        self.stdout.write(
+            f"vendor: {connection.vendor}, requests: {options['requests']}, "
+            f"concurrency: {options['concurrency']}, cold: {options['cold']}, db latency: {options['db_latency']} ms"
+        )
+        self.report(f'WSGI {sync_path}', *self.run_wsgi(sync_path, options))
+        self.report(f'ASGI {async_path}', *self.run_asgi(async_path, options))
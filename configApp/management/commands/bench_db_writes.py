@@ -0,0 +1,62 @@
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, transaction
+
+from configApp.models import Rooms
+
+PREFIX = 'bench-db-write'
+
+
+class Command(BaseCommand):
+    help = "Parallel yozuv yuklamasi: sozlangan bazaning yozish tezligini o'lchaydi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--writes', type=int, default=200, help="Har bir thread uchun tranzaksiyalar soni")
+        parser.add_argument('--rows', type=int, default=1, help="Har bir tranzaksiyadagi qatorlar soni")
+
+    def worker(self, number, options, latencies, errors):
+        try:
+            for i in range(options['writes']):
+                started = time.perf_counter()
+                try:
+                    with transaction.atomic():
+                        Rooms.objects.bulk_create([
+                            Rooms(title=f'{PREFIX}-{number}-{i}-{j}') for j in range(options['rows'])
+                        ])
+                except OperationalError as e:
+                    errors.append(str(e))
+                    continue
+                latencies.append(time.perf_counter() - started)
+        finally:
+            connection.close()
+
+    def handle(self, *args, **options):
+        latencies, errors = [], []
+        threads = [
+            threading.Thread(target=self.worker, args=(number, options, latencies, errors))
+            for number in range(options['threads'])
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        Rooms.objects.filter(title__startswith=PREFIX).delete()
+
+        latencies.sort()
+        commits = len(latencies)
+        self.stdout.write(f"vendor: {connection.vendor}")
+        self.stdout.write(f"threads: {options['threads']}, commits: {commits}, errors: {len(errors)}")
+        self.stdout.write(f"commits/s: {commits / elapsed:.1f}, rows/s: {commits * options['rows'] / elapsed:.1f}")
+        if latencies:
+            self.stdout.write(
+                f"latency ms: p50 {statistics.median(latencies) * 1000:.2f}, "
+                f"p99 {latencies[int(commits * 0.99) - 1] * 1000:.2f}"
+            )
+        if errors:
+            self.stderr.write(f"birinchi xato: {errors[0]}")
@@ -0,0 +1,170 @@
+import datetime
+import json
+import platform
+import resource
+import statistics
+import subprocess
+import time
+import tracemalloc
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from configApp.models import Attendance, Enrollment, Group, Student, User
+from .bench_asgi import percentile
+from .seed_data import TEACHER_PHONE
+
+PERIOD = 'date1=2025-01-01&date2=2025-12-31'
+ENDPOINTS = {
+    'login': ('POST', '/api/login/'),
+    'group-list': ('GET', '/api/group/'),
+    'students-list': ('GET', '/api/students/'),
+    'teachers-list': ('GET', '/api/teachers/'),
+    'statistics': ('GET', f'/api/statistics/?{PERIOD}'),
+    'statistics-monthly': ('GET', f'/api/statistics/?{PERIOD}&bucket=month&by_course=1'),
+    'attendance-rates': ('GET', f'/api/attendance/rates/?{PERIOD}&source=summary'),
+    'group-bootstrap': ('GET', '/api/group_get/'),
+    'student-bootstrap': ('GET', '/api/student/'),
+    'search': ('GET', '/api/search/?q=karimov'),
+    'conflicts': ('GET', '/api/conflicts/'),
+}
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=5,
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Har bir endpointni process ichida chaqiradi: latency foizliklari, so'rov boshiga SQL soni va "
+        "eng yuqori xotira JSON faylga yoziladi; --compare oldingi natija bilan solishtiradi"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('endpoints', nargs='*', help=f"Bo'sh bo'lsa hammasi: {', '.join(ENDPOINTS)}")
+        parser.add_argument('--requests', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--cold', action='store_true', help="Har so'rovdan oldin keshni tozalash")
+        parser.add_argument('--phone', help="Login uchun foydalanuvchi (standart: seed_data dagi birinchi o'qituvchi)")
+        parser.add_argument('--password', default='seed-password')
+        parser.add_argument('--output', help="Natija fayli (standart: bench-results/endpoints-<vaqt>.json)")
+        parser.add_argument('--compare', help="Oldingi natija fayli: farqlar jadval ko'rinishida chiqadi")
+
+    def call(self, client, method, path, options):
+        if method == 'POST':
+            body = {'phone': options['phone'], 'password': options['password']}
+            return client.post(path, body, content_type='application/json')
+        return client.get(path)
+
+    def measure(self, client, name, options):
+        method, path = ENDPOINTS[name]
+        latencies, queries = [], []
+        for i in range(options['warmup'] + options['requests']):
+            if options['cold']:
+                cache.clear()
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = self.call(client, method, path, options)
+                body = b''.join(response.streaming_content) if response.streaming else response.content
+                elapsed = time.perf_counter() - started
+            if response.status_code >= 400:
+                raise CommandError(f"{name}: {method} {path} -> {response.status_code} {body[:200]!r}")
+            if i >= options['warmup']:
+                latencies.append(elapsed)
+                queries.append(len(captured))
+
+        # xotira alohida so'rovda o'lchanadi: tracemalloc latency ni sekinlashtiradi
+        if options['cold']:
+            cache.clear()
+        tracemalloc.start()
+        self.call(client, method, path, options)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return {
+            'method': method,
+            'path': path,
+            'requests': len(latencies),
+            'mean_ms': round(statistics.fmean(latencies) * 1000, 3),
+            'p50_ms': round(percentile(latencies, 0.5) * 1000, 3),
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+            'max_ms': round(max(latencies) * 1000, 3),
+            'queries': int(statistics.median(queries)),
+            'queries_max': max(queries),
+            'peak_memory_kb': round(peak / 1024),
+            'response_bytes': len(body),
+        }
+
+    def compare(self, results, path):
+        baseline = json.loads(Path(path).read_text())
+        self.stdout.write(f"\n{path} ({baseline.get('git') or '?'}) bilan solishtirish:")
+        self.stdout.write(f"{'endpoint':<20} {'p50 ms':>22} {'p99 ms':>22} {'queries':>10} {'memory kb':>18}")
+        for name, new in results['endpoints'].items():
+            old = baseline.get('endpoints', {}).get(name)
+            if old is None:
+                continue
+
+            def delta(key):
+                change = (new[key] - old[key]) / old[key] * 100 if old[key] else 0
+                return f"{old[key]:.1f} -> {new[key]:.1f} ({change:+.0f}%)"
+
+            self.stdout.write(
+                f"{name:<20} {delta('p50_ms'):>22} {delta('p99_ms'):>22} "
+                f"{old['queries']:>4} -> {new['queries']:<3} {old['peak_memory_kb']:>7} -> {new['peak_memory_kb']:<7}"
+            )
+
+    def handle(self, *args, **options):
+        names = options['endpoints'] or list(ENDPOINTS)
+        unknown = set(names) - set(ENDPOINTS)
+        if unknown:
+            raise CommandError(f"Noma'lum endpoint: {', '.join(sorted(unknown))}")
+        if not options['phone']:
+            user = User.objects.filter(phone__startswith=TEACHER_PHONE).order_by('pk').first()
+            if user is None:
+                raise CommandError("Avval seed_data ni ishga tushiring yoki --phone bering")
+            options['phone'] = user.phone
+
+        client = Client()
+        login = self.call(client, 'POST', ENDPOINTS['login'][1], options)
+        if login.status_code != 200:
+            raise CommandError(f"Login bo'lmadi: {login.status_code} {login.content[:200]!r}")
+        # access token muddati qisqa: har bir endpointdan oldin yangilanadi
+        results = {
+            'started': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'git': git_revision(),
+            'vendor': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'options': {key: options[key] for key in ('requests', 'warmup', 'cold')},
+            'rows': {model.__name__: model.objects.count() for model in (User, Student, Group, Enrollment, Attendance)},
+            'endpoints': {},
+        }
+        self.stdout.write(f"vendor: {connection.vendor}, rows: {results['rows']}")
+        for name in names:
+            token = self.call(client, 'POST', ENDPOINTS['login'][1], options).json()['access']
+            client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+            result = results['endpoints'][name] = self.measure(client, name, options)
+            self.stdout.write(
+                f"{name:<20} p50 {result['p50_ms']:>8.2f} ms  p95 {result['p95_ms']:>8.2f} ms  "
+                f"p99 {result['p99_ms']:>8.2f} ms  {result['queries']:>3} queries  {result['peak_memory_kb']:>7} kb"
+            )
+        # Linux da ru_maxrss kilobaytlarda
+        results['max_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        output = Path(options['output'] or Path('bench-results') / f"endpoints-{time.strftime('%Y%m%d-%H%M%S')}.json")
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(results, indent=2))
+        self.stdout.write(self.style.SUCCESS(f"natija: {output}"))
+        if options['compare']:
+            self.compare(results, options['compare'])
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from configApp import notifications
+from configApp.models import OutboundMessage
+
+KIND = 'bench'
+
+
+class Command(BaseCommand):
+    help = "Navbat + worker o'tkazuvchanligi: LocMemGateway bilan xabar/soniya o'lchaydi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=5000)
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--latency', type=float, default=0.05, help="Bitta gateway chaqiruvining kechikishi (soniya)")
+        parser.add_argument('--failure-rate', type=float, default=0.0)
+
+    def handle(self, *args, **options):
+        gateway = notifications.LocMemGateway(
+            latency=options['latency'], failure_rate=options['failure_rate'], max_batch=options['batch_size'],
+        )
+        started = time.perf_counter()
+        notifications.enqueue_many(
+            [(f'+99890{i:07d}', f'bench {i}') for i in range(options['messages'])], kind=KIND,
+        )
+        enqueued = time.perf_counter() - started
+
+        started = time.perf_counter()
+        totals = notifications.run_worker(
+            threads=options['threads'], batch_size=options['batch_size'], once=True, gateway=gateway,
+        )
+        elapsed = time.perf_counter() - started
+        OutboundMessage.objects.filter(kind=KIND).delete()
+
+        self.stdout.write(f"enqueue: {options['messages'] / enqueued:.0f} msg/s")
+        self.stdout.write(
+            f"deliver: {totals['sent'] / elapsed:.0f} msg/s (sent {totals['sent']}, failed attempts {totals['failed']}, "
+            f"threads {options['threads']}, batch {options['batch_size']}, gateway latency {options['latency'] * 1000:.0f} ms)"
+        )
@@ -0,0 +1,91 @@
+import gzip
+import importlib.util
+import json
+import statistics
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from configApp.models import User
+from configApp.renderers import MessagePackRenderer, ORJSONRenderer
+from .bench_asgi import percentile
+from .bench_endpoints import git_revision
+
+ENDPOINTS = {
+    'student-bootstrap': '/api/student/',
+    'group-bootstrap': '/api/group_get/',
+    'users': '/api/userApi/',
+    'group-list': '/api/group/',
+    'students-list': '/api/students/',
+}
+RENDERERS = {
+    'json': JSONRenderer,
+    'orjson': ORJSONRenderer,
+    'msgpack': MessagePackRenderer,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Eng katta javoblarni har bir renderer bilan qayta render qiladi: vaqt foizliklari, "
+        "bayt va gzip dagi bayt. Ma'lumot bir marta olinadi, faqat render() o'lchanadi"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('endpoints', nargs='*', help=f"Bo'sh bo'lsa hammasi: {', '.join(ENDPOINTS)}")
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--output', help="Natija fayli (standart: bench-results/render-<vaqt>.json)")
+
+    def measure(self, renderer, data, repeat):
+        renderer.render(data)
+        latencies = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            body = renderer.render(data)
+            latencies.append(time.perf_counter() - started)
+        return {
+            'p50_ms': round(percentile(latencies, 0.5) * 1000, 3),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+            'mean_ms': round(statistics.fmean(latencies) * 1000, 3),
+            'bytes': len(body),
+            'gzip_bytes': len(gzip.compress(body, compresslevel=6)),
+        }
+
+    def handle(self, *args, **options):
+        names = options['endpoints'] or list(ENDPOINTS)
+        unknown = set(names) - set(ENDPOINTS)
+        if unknown:
+            raise CommandError(f"Noma'lum endpoint: {', '.join(sorted(unknown))}")
+        renderers = dict(RENDERERS)
+        # o'rnatilmagan bo'lsa ORJSONRenderer stdlib ga qaytadi: o'lchashdan ma'no yo'q
+        for package in ('orjson', 'msgpack'):
+            if not importlib.util.find_spec(package):
+                self.stdout.write(f"{package} o'rnatilmagan: {package} renderer o'lchanmaydi")
+                del renderers[package]
+        user = User.objects.filter(is_staff=True).order_by('pk').first() or User.objects.order_by('pk').first()
+        if user is None:
+            raise CommandError("Avval seed_data ni ishga tushiring")
+
+        client = APIClient()
+        client.force_authenticate(user)
+        results = {'git': git_revision(), 'repeat': options['repeat'], 'endpoints': {}}
+        self.stdout.write(f"{'endpoint':<20} {'renderer':<9} {'p50 ms':>9} {'p99 ms':>9} {'bytes':>11} {'gzip':>10}")
+        for name in names:
+            response = client.get(ENDPOINTS[name], HTTP_ACCEPT='application/json')
+            if response.status_code != 200:
+                raise CommandError(f"{name}: {ENDPOINTS[name]} -> {response.status_code}")
+            result = results['endpoints'][name] = {}
+            for label, renderer_class in renderers.items():
+                row = result[label] = self.measure(renderer_class(), response.data, options['repeat'])
+                self.stdout.write(
+                    f"{name:<20} {label:<9} {row['p50_ms']:>9.2f} {row['p99_ms']:>9.2f} "
+                    f"{row['bytes']:>11} {row['gzip_bytes']:>10}"
+                )
+
+        output = Path(options['output'] or Path('bench-results') / f"render-{time.strftime('%Y%m%d-%H%M%S')}.json")
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(results, indent=2))
+        self.stdout.write(self.style.SUCCESS(f"natija: {output}"))
@@ -0,0 +1,111 @@
+import datetime
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from configApp import schedule
+from configApp.models import Group, Table
+from configApp.schedule import Booking, ScheduleIndex, dates_overlap, days_overlap
+from configApp.serializers import GroupSerializer, TableSerializer
+from .bench_asgi import percentile
+
+
+def naive_report(bookings):
+    found = 0
+    for i, a in enumerate(bookings):
+        for b in bookings[i + 1:]:
+            if a.start < b.end and b.start < a.end and days_overlap(a, b) and dates_overlap(a, b):
+                if a.room == b.room or a.teachers & b.teachers:
+                    found += 1
+    return found
+
+
+class Command(BaseCommand):
+    help = (
+        "Sintetik jadvalda to'qnashuv indeksini o'lchaydi (DB ishlatilmaydi). --saves bilan seed qilingan "
+        "bazada GroupSerializer/TableSerializer save() ni (lock ostidagi qayta tekshiruv bilan) o'lchaydi"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tables', type=int, default=10000)
+        parser.add_argument('--rooms', type=int, default=400)
+        parser.add_argument('--teachers', type=int, default=1500)
+        parser.add_argument('--days', type=int, default=6)
+        parser.add_argument('--checks', type=int, default=10000)
+        parser.add_argument('--naive', action='store_true', help="O(n^2) tekshiruv bilan solishtirish")
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--saves', type=int, default=0,
+                            help="Bazadagi tasodifiy guruhlar uchun save() soni (seed_data --groups 10000)")
+
+    def booking(self, rnd, number, options):
+        start = rnd.randrange(8 * 60, 20 * 60, 30)
+        start_date = datetime.date(2025, 1, 1) + datetime.timedelta(days=rnd.randrange(0, 120))
+        return Booking(
+            start, start + rnd.choice((60, 90, 120)), number, number, rnd.randrange(options['rooms']),
+            frozenset({rnd.randrange(options['teachers'])}),
+            start_date, start_date + datetime.timedelta(days=rnd.randrange(30, 120)),
+            rnd.randrange(options['days']),
+        )
+
+    def bench_saves(self, rnd, count):
+        """Har bir save o'z tranzaksiyasida va orqaga qaytariladi: baza o'zgarmaydi"""
+        groups = list(Group.objects.values_list('pk', flat=True))
+        if not groups:
+            raise CommandError("Avval seed_data ni ishga tushiring")
+        # validate() dagi keshlangan indeks bir marta quriladi va o'lchovga kirmaydi
+        schedule.get_index()
+        results = {'group': ([], []), 'table': ([], [])}
+        for pk in rnd.sample(groups, min(count, len(groups))):
+            group = Group.objects.select_related('table').get(pk=pk)
+            for kind, serializer in (
+                ('group', GroupSerializer(group, data={'end_date': group.end_date}, partial=True)),
+                ('table', TableSerializer(group.table, data={'end_time': group.table.end_time}, partial=True)),
+            ):
+                if not serializer.is_valid():
+                    continue
+                latencies, queries = results[kind]
+                with transaction.atomic(), CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    serializer.save()
+                    latencies.append(time.perf_counter() - started)
+                    transaction.set_rollback(True)
+                queries.append(len(captured))
+        self.stdout.write(f"db tables: {Table.objects.count()}")
+        for kind, (latencies, queries) in results.items():
+            if latencies:
+                self.stdout.write(
+                    f"{kind} save: p50 {percentile(latencies, 0.5) * 1000:.2f} ms, "
+                    f"p99 {percentile(latencies, 0.99) * 1000:.2f} ms, {max(queries)} queries ({len(latencies)} saves)"
+                )
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options['seed'])
+        if options['saves']:
+            self.bench_saves(rnd, options['saves'])
+        bookings = [self.booking(rnd, number, options) for number in range(options['tables'])]
+
+        started = time.perf_counter()
+        index = ScheduleIndex(bookings)
+        build = time.perf_counter() - started
+
+        probes = [self.booking(rnd, None, options) for _ in range(options['checks'])]
+        started = time.perf_counter()
+        for probe in probes:
+            index.conflicts(probe)
+        check = (time.perf_counter() - started) / len(probes)
+
+        started = time.perf_counter()
+        conflicts = index.report()
+        report = time.perf_counter() - started
+
+        self.stdout.write(f"tables: {len(bookings)}")
+        self.stdout.write(f"build: {build * 1000:.1f} ms")
+        self.stdout.write(f"validate: {check * 1e6:.1f} us/check")
+        self.stdout.write(f"report: {report * 1000:.1f} ms, {len(conflicts)} conflicts")
+        if options['naive']:
+            started = time.perf_counter()
+            pairs = naive_report(bookings)
+            self.stdout.write(f"naive O(n^2) report: {(time.perf_counter() - started) * 1000:.1f} ms, {pairs} conflicting pairs")
@@ -0,0 +1,47 @@
+import datetime
+import random
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from configApp.timetable import DEFAULT_SLOTS, GroupDemand, Problem, Room, solve
+
+
+class Command(BaseCommand):
+    help = "Sintetik semestrda timetable solver ni o'lchaydi (DB ishlatilmaydi)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--groups', type=int, default=1000)
+        parser.add_argument('--rooms', type=int, default=30)
+        parser.add_argument('--teachers', type=int, default=250)
+        parser.add_argument('--days', type=int, default=6)
+        parser.add_argument('--unavailable', type=float, default=0.2,
+                            help="Har bir o'qituvchi uchun band kunlar ulushi")
+        parser.add_argument('--time-budget', type=float, default=10)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options['seed'])
+        days = list(range(1, options['days'] + 1))
+        rooms = [Room(number, rnd.choice((12, 16, 20, 25, 30, None))) for number in range(options['rooms'])]
+        groups = [
+            GroupDemand(number, rnd.randrange(6, 26), frozenset({rnd.randrange(options['teachers'])}))
+            for number in range(options['groups'])
+        ]
+        availability = {
+            teacher: {day for day in days if rnd.random() >= options['unavailable']}
+            for teacher in range(options['teachers'])
+        }
+        slots = [(datetime.time.fromisoformat(start), datetime.time.fromisoformat(end)) for start, end in DEFAULT_SLOTS]
+        problem = Problem(groups, rooms, days, slots, availability)
+
+        solution = solve(problem, options['time_budget'], seed=options['seed'])
+        capacity = len(rooms) * len(days) * len(slots)
+        self.stdout.write(f"groups: {len(groups)}, rooms: {len(rooms)}, room-slots: {capacity}")
+        self.stdout.write(f"assigned: {len(solution.assignments)}, unassigned: {len(solution.unassigned)}")
+        self.stdout.write(f"iterations: {solution.iterations}, elapsed: {solution.elapsed:.2f}s")
+
+        # o'qituvchining bo'sh slotlaridan ko'p guruhlari bo'lsa ular hech qachon joylashmaydi
+        load = Counter(teacher for group in groups for teacher in group.teachers)
+        bound = sum(max(0, count - len(availability[teacher]) * len(slots)) for teacher, count in load.items())
+        self.stdout.write(f"lower bound on unassigned (teacher slots): {bound}")
@@ -0,0 +1,25 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from configApp import exporting
+
+
+class Command(BaseCommand):
+    help = "Jadvalni server-side cursor bilan CSV yoki JSON lines ga eksport qiladi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(exporting.DATASETS))
+        parser.add_argument('--format', choices=sorted(exporting.FORMATS), default='csv')
+        parser.add_argument('--output', '-o', help="Fayl yo'li (berilmasa stdout)")
+        parser.add_argument('--chunk-size', type=int, default=exporting.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        chunks = exporting.stream(options['dataset'], options['format'], options['chunk_size'])
+        if not options['output']:
+            for chunk in chunks:
+                sys.stdout.write(chunk)
+            return
+        with open(options['output'], 'w', encoding='utf-8', newline='') as fileobj:
+            for chunk in chunks:
+                fileobj.write(chunk)
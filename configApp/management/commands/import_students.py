@@ -0,0 +1,31 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from configApp.importer import DEFAULT_CHUNK_SIZE, StudentImporter, read_rows
+
+
+class Command(BaseCommand):
+    help = "CSV/XLSX fayldan student, user va parent larni bulk import qiladi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--report', help="Xatolar hisobotini JSON faylga yozish")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], 'rb') as fileobj:
+                report = StudentImporter(chunk_size=options['chunk_size']).run(read_rows(fileobj, options['path']))
+        except (OSError, ValueError) as e:
+            raise CommandError(e)
+
+        if options['report']:
+            with open(options['report'], 'w') as fileobj:
+                json.dump(report, fileobj, ensure_ascii=False, indent=2)
+        for error in report['errors'][:20]:
+            self.stderr.write(f"row {error['row']}: {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['created']}/{report['total']} qator import qilindi, "
+            f"{report['seconds']}s, {report['rows_per_second']} rows/s"
+        ))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from configApp import statistics
+from configApp.models import AttendanceMonthlyStat
+
+
+class Command(BaseCommand):
+    help = "AttendanceMonthlyStat jadvalini Attendance dan qaytadan quradi"
+
+    def handle(self, *args, **options):
+        statistics.rebuild_attendance_stats()
+        self.stdout.write(self.style.SUCCESS(f"{AttendanceMonthlyStat.objects.count()} ta qator yozildi"))
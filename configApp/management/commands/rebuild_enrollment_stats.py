@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from configApp import statistics
+from configApp.models import EnrollmentDailyStat
+
+
+class Command(BaseCommand):
+    help = "EnrollmentDailyStat rollup jadvalini Enrollment dan qaytadan quradi"
+
+    def handle(self, *args, **options):
+        statistics.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"{EnrollmentDailyStat.objects.count()} ta qator yozildi"))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from configApp import search
+from configApp.models import SearchEntry
+
+
+class Command(BaseCommand):
+    help = "SearchEntry qidiruv indeksini User, Student va Parents dan qaytadan quradi"
+
+    def handle(self, *args, **options):
+        search.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"{SearchEntry.objects.count()} ta yozuv indekslandi"))
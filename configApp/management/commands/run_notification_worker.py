@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from configApp import notifications
+
+
+class Command(BaseCommand):
+    help = "OutboundMessage navbatidagi xabarlarni gateway orqali batch lab yuboradi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument('--batch-size', type=int, default=None, help="Bitta gateway chaqiruvidagi xabarlar soni")
+        parser.add_argument('--poll', type=float, default=1.0, help="Navbat bo'sh bo'lsa kutish (soniya)")
+        parser.add_argument('--once', action='store_true', help="Navbat bo'shaganda to'xtash")
+
+    def handle(self, *args, **options):
+        totals = notifications.run_worker(
+            threads=options['threads'], batch_size=options['batch_size'], poll=options['poll'], once=options['once'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"yuborildi: {totals['sent']}, xato: {totals['failed']}"))
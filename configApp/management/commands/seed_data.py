@@ -0,0 +1,291 @@
+import datetime
+import math
+import random
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from configApp import hashing, search, statistics
+from configApp.caching import bump_model_version
+from configApp.models import (
+    Attendance, AttendanceLevel, Course, Day, Departments, Enrollment, Group, GroupHomeWork, HomeWork, Parents,
+    Rooms, Student, Table, TableType, Teacher, Topics, User, Worker,
+)
+from configApp.timetable import DEFAULT_SLOTS
+
+# sintetik raqamlar shu prefikslardan: haqiqiy foydalanuvchilar bilan to'qnashmaydi, qayta ishga tushirilsa davom etadi
+STUDENT_PHONE = '+99877'
+TEACHER_PHONE = '+99878'
+PARENT_PHONE = '+99879'
+DAYS = ('Dushanba', 'Seshanba', 'Chorshanba', 'Payshanba', 'Juma', 'Shanba')
+LEVELS = (('Keldi', 85), ('Kelmadi', 10), ('Kechikdi', 5))
+STATUSES = (('registered', 20), ('studying', 70), ('graduated', 10))
+FIRST_NAMES = ('Ali', 'Vali', 'Aziz', 'Dilshod', 'Jasur', 'Sardor', 'Bekzod', 'Madina', 'Nilufar', 'Gulnora', 'Zarina', 'Kamola')
+LAST_NAMES = ('Karimov', 'Rahimov', 'Toshmatov', 'Yusupov', 'Aliyev', 'Qodirov', 'Ergashev', 'Saidov', 'Nazarov', 'Xolmatov')
+FIRST_LESSON = datetime.date(2025, 1, 6)
+
+
+def chunks(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def lesson_days(start):
+    day = start
+    while True:
+        if day.weekday() != 6:
+            yield day
+        day += datetime.timedelta(days=1)
+
+
+class Command(BaseCommand):
+    help = "configApp modellarini sintetik ma'lumot bilan bulk insert orqali to'ldiradi (benchmark uchun)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=10000)
+        parser.add_argument('--teachers', type=int, default=200)
+        parser.add_argument('--groups', type=int, default=500)
+        parser.add_argument('--courses', type=int, default=40)
+        parser.add_argument('--departments', type=int, default=8)
+        parser.add_argument('--attendance', type=int, default=200000)
+        parser.add_argument('--topics', type=int, default=10, help="Har bir kurs uchun mavzular")
+        parser.add_argument('--homeworks', type=int, default=3, help="Har bir guruh uchun uy vazifalari")
+        parser.add_argument('--password', default='seed-password',
+                            help="Barcha sintetik foydalanuvchilar paroli (bir marta hash qilinadi)")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def stage(self, name, build):
+        started = time.perf_counter()
+        with transaction.atomic():
+            count = build()
+        self.stdout.write(f"{name}: {count} rows, {time.perf_counter() - started:.1f}s")
+
+    def bulk(self, model, objects, keep=True):
+        """objects ni batch_size lik bo'laklarda yozadi; keep=True bo'lsa yaratilganlar (pk bilan) qaytadi"""
+        created, count = [], 0
+        for batch in chunks(objects, self.batch_size):
+            batch = model.objects.bulk_create(batch)
+            count += len(batch)
+            if keep:
+                created += batch
+        bump_model_version(model)
+        return created if keep else count
+
+    def insert_rows(self, model, fields, rows):
+        """
+        Eng katta jadvallar uchun: model obyektlari va har bir qiymatni ORM orqali tayyorlash
+        bulk_create vaqtining asosiy qismi, shuning uchun tayyor tuple lar executemany bilan yoziladi.
+        """
+        quote = connection.ops.quote_name
+        columns = ', '.join(quote(model._meta.get_field(name).column) for name in fields)
+        sql = f'INSERT INTO {quote(model._meta.db_table)} ({columns}) VALUES ({", ".join(["%s"] * len(fields))})'
+        count = 0
+        with connection.cursor() as cursor:
+            for batch in chunks(rows, self.batch_size):
+                cursor.executemany(sql, batch)
+                count += len(batch)
+        bump_model_version(model)
+        return count
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        rnd = random.Random(options['seed'])
+        slots = [(datetime.time.fromisoformat(start), datetime.time.fromisoformat(end)) for start, end in DEFAULT_SLOTS]
+        state = {}
+
+        def person():
+            return f'{rnd.choice(FIRST_NAMES)} {rnd.choice(LAST_NAMES)}'
+
+        def weighted(choices):
+            return rnd.choices([value for value, _ in choices], weights=[weight for _, weight in choices])[0]
+
+        def lookups():
+            state['days'] = [Day.objects.get_or_create(title=title)[0] for title in DAYS]
+            state['levels'] = [(AttendanceLevel.objects.get_or_create(title=title)[0], weight) for title, weight in LEVELS]
+            state['type'] = TableType.objects.get_or_create(title='Seed')[0]
+            offset = Course.objects.filter(name__startswith='seed-').count()
+            state['courses'] = self.bulk(Course, (
+                Course(name=f'seed-{offset + i}', title=f'Kurs {offset + i}') for i in range(options['courses'])
+            ))
+            state['departments'] = self.bulk(Departments, (
+                Departments(title=f'Bo\'lim {i}') for i in range(options['departments'])
+            ))
+            # har bir (xona, kun, slot) da bitta guruh: jadvalda to'qnashuv bo'lmaydi
+            rooms = math.ceil(options['groups'] / (len(slots) * len(DAYS)))
+            state['rooms'] = self.bulk(Rooms, (
+                Rooms(title=f'Seed xona {i}', capacity=rnd.choice((12, 16, 20, 25, 30))) for i in range(rooms)
+            ))
+            return len(state['courses']) + len(state['departments']) + rooms
+
+        def users():
+            password = hashing.hash_password(options['password'])
+            teacher_offset = User.objects.filter(phone__startswith=TEACHER_PHONE).count()
+            student_offset = User.objects.filter(phone__startswith=STUDENT_PHONE).count()
+            state['teacher_users'] = self.bulk(User, (
+                User(phone=f'{TEACHER_PHONE}{teacher_offset + i:07d}', password=password, full_name=person(),
+                     is_teacher=True, is_staff=i % 10 == 0)
+                for i in range(options['teachers'])
+            ))
+            state['student_users'] = self.bulk(User, (
+                User(phone=f'{STUDENT_PHONE}{student_offset + i:07d}', password=password, full_name=person(), is_student=True)
+                for i in range(options['students'])
+            ))
+            return len(state['teacher_users']) + len(state['student_users'])
+
+        def staff():
+            users = state['teacher_users']
+            teachers = self.bulk(Teacher, (Teacher(user=user) for user in users))
+            state['workers'] = workers = self.bulk(Worker, (Worker(user=user) for user in users))
+            count = len(teachers) + len(workers)
+            for model, rows in ((Teacher, teachers), (Worker, workers)):
+                count += self.bulk(model.departments.through, (
+                    model.departments.through(**{f'{model._meta.model_name}_id': row.pk,
+                                                 'departments_id': rnd.choice(state['departments']).pk})
+                    for row in rows
+                ), keep=False)
+                count += self.bulk(model.course.through, (
+                    model.course.through(**{f'{model._meta.model_name}_id': row.pk, 'course_id': course.pk})
+                    for row in rows for course in rnd.sample(state['courses'], min(2, len(state['courses'])))
+                ), keep=False)
+            return count
+
+        def groups():
+            per_room = len(slots) * len(DAYS)
+            rooms, workers = state['rooms'], state['workers']
+            tables = self.bulk(Table, (
+                Table(start_time=slots[g % per_room % len(slots)][0], end_time=slots[g % per_room % len(slots)][1],
+                      room=rooms[g // per_room], type=state['type'], day=state['days'][g % per_room // len(slots)])
+                for g in range(options['groups'])
+            ))
+            offset = Group.objects.filter(title__startswith='seed-').count()
+            starts = [FIRST_LESSON - datetime.timedelta(days=rnd.randrange(0, 30)) for _ in tables]
+            state['groups'] = self.bulk(Group, (
+                Group(name=f'Guruh {offset + g}', title=f'seed-{offset + g}', course=rnd.choice(state['courses']),
+                      table=table, start_date=start, end_date=start + datetime.timedelta(days=180),
+                      price=str(rnd.randrange(300, 900, 50) * 1000))
+                for g, (table, start) in enumerate(zip(tables, starts))
+            ))
+            # bir vaqtdagi guruhlar (bir xil kun/slot, har xil xona) har xil o'qituvchida
+            count = len(tables) + len(state['groups'])
+            count += self.bulk(Group.teacher.through, (
+                Group.teacher.through(group_id=group.pk, worker_id=workers[(g // per_room + g % per_room * len(rooms)) % len(workers)].pk)
+                for g, group in enumerate(state['groups'])
+            ), keep=False)
+            return count
+
+        def students():
+            groups, users = state['groups'], state['student_users']
+            state['students'] = self.bulk(Student, (
+                Student(user=user, full_name=user.full_name, email=f'{user.phone[1:]}@example.com', age=rnd.randrange(12, 40))
+                for user in users
+            ))
+            # asosiy guruh + har uchinchi studentda ikkinchi guruh
+            memberships = []
+            for i, student in enumerate(state['students']):
+                memberships.append((student, groups[i % len(groups)]))
+                if i % 3 == 0 and len(groups) > 1:
+                    memberships.append((student, groups[(i * 7 + 1) % len(groups)]))
+            state['memberships'] = memberships = list(dict.fromkeys(memberships))
+            count = len(state['students'])
+            count += self.bulk(Group.students.through, (
+                Group.students.through(group_id=group.pk, student_id=student.pk) for student, group in memberships
+            ), keep=False)
+            count += self.bulk(Student.group.through, (
+                Student.group.through(group_id=group.pk, student_id=student.pk) for student, group in memberships
+            ), keep=False)
+            count += self.bulk(Student.course.through, (
+                Student.course.through(course_id=course_id, student_id=student_id)
+                for student_id, course_id in dict.fromkeys((student.pk, group.course_id) for student, group in memberships)
+            ), keep=False)
+            state['parents'] = self.bulk(Parents, (
+                Parents(student=student, full_name=person(), phone_number=f'{PARENT_PHONE}{student.user.phone[-7:]}',
+                        address='Toshkent')
+                for student in state['students']
+            ))
+            count += len(state['parents'])
+            count += self.bulk(Enrollment, (
+                Enrollment(student_id=student.user_id, course_id=group.course_id, status=weighted(STATUSES),
+                           date_joined=group.start_date - datetime.timedelta(days=rnd.randrange(0, 14)))
+                for student, group in memberships
+            ), keep=False)
+            return count
+
+        def homework():
+            topics = {}
+            for topic in self.bulk(Topics, (
+                Topics(title=f'Mavzu {i + 1}', course=course) for course in state['courses'] for i in range(options['topics'])
+            )):
+                topics.setdefault(topic.course_id, []).append(topic)
+            group_homeworks = {}
+            for item in self.bulk(GroupHomeWork, (
+                GroupHomeWork(group=group, topic=rnd.choice(topics[group.course_id]))
+                for group in state['groups'] if topics for _ in range(options['homeworks'])
+            )):
+                group_homeworks.setdefault(item.group_id, []).append(item)
+            count = sum(map(len, topics.values())) + sum(map(len, group_homeworks.values()))
+            count += self.bulk(HomeWork, (
+                HomeWork(groupHomeWork=item, student=student, link=f'https://example.com/hw/{item.pk}/{student.pk}',
+                         price=str(rnd.randrange(1, 6)), is_active=True)
+                for student, group in state['memberships'] for item in group_homeworks.get(group.pk, ())
+                if rnd.random() < 0.5
+            ), keep=False)
+            return count
+
+        def attendance():
+            # har bir dars kuni barcha (student, guruh) juftliklari: unique (student, group, date) buzilmaydi
+            pairs = [(student.pk, group.pk) for student, group in state['memberships']]
+            if not pairs:
+                return 0
+            levels = [level.pk for level, _ in state['levels']]
+            weights = [weight for _, weight in state['levels']]
+            now = Attendance._meta.get_field('created').get_db_prep_value(timezone.now(), connection)
+            date_field = Attendance._meta.get_field('date')
+
+            def rows():
+                for day in islice(lesson_days(FIRST_LESSON), math.ceil(options['attendance'] / len(pairs))):
+                    day = date_field.get_db_prep_value(day, connection)
+                    for level_id, (student_id, group_id) in zip(rnd.choices(levels, weights, k=len(pairs)), pairs):
+                        yield level_id, day, now, now, student_id, group_id
+
+            return self.insert_rows(
+                Attendance, ['level', 'date', 'created', 'updated', 'student', 'group'],
+                islice(rows(), options['attendance']),
+            )
+
+        def derived():
+            # bulk_create signal yubormaydi: rollup jadvallari qaytadan quriladi, qidiruvga faqat yangi qatorlar qo'shiladi
+            statistics.rebuild()
+            statistics.rebuild_attendance_stats()
+            count = 0
+            for rows, indexer in (
+                (state['teacher_users'] + state['student_users'], search.index_users),
+                (state['students'], search.index_students),
+                (state['parents'], search.index_parents),
+            ):
+                for batch in chunks(rows, self.batch_size):
+                    indexer(batch)
+                    count += len(batch)
+            return count
+
+        self.stdout.write(f"vendor: {connection.vendor}")
+        started = time.perf_counter()
+        for name, build in (
+            ('courses, departments, rooms', lookups),
+            ('users', users),
+            ('teachers, workers', staff),
+            ('tables, groups', groups),
+            ('students, parents, enrollments', students),
+            ('topics, homework', homework),
+            ('attendance', attendance),
+            ('statistics, search index', derived),
+        ):
+            self.stage(name, build)
+        self.stdout.write(self.style.SUCCESS(
+            f"tayyor: {time.perf_counter() - started:.1f}s; login: {state['teacher_users'][0].phone if state['teacher_users'] else '-'} "
+            f"/ {options['password']}"
+        ))
@@ -0,0 +1,191 @@
+import bisect
+import re
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+DEFAULTS = {
+    'ENABLED': True,
+    'SERVER_TIMING': False,
+    'SLOW_REQUEST_MS': 500,
+    'SLOW_TOP_QUERIES': 5,
+    'TOKEN': '',
+}
+
+TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+current = ContextVar('request_stats', default=None)
+
+
+def config():
+    return {**DEFAULTS, **getattr(settings, 'METRICS', {})}
+
+
+def fingerprint(sql):
+    """So'rov shakli: son va satr qiymatlari, IN (...) ro'yxatlari bitta ? ga aylanadi"""
+    sql = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    sql = re.sub(r'\b\d+(?:\.\d+)?\b', '?', sql)
+    sql = re.sub(r'\(\s*\?(?:\s*,\s*\?)*\s*\)', '(?)', sql)
+    return re.sub(r'\s+', ' ', sql).strip()
+
+
+def query_budget(match):
+    """
+    View klassidagi query_budget: bitta so'rovda ruxsat etilgan SQL so'rovlar soni.
+    Sahifa hajmi va ma'lumot miqdoriga bog'liq emas (QueryBudgetTests tekshiradi).
+    """
+    if match is None:
+        return None
+    view = getattr(match.func, 'view_class', None) or getattr(match.func, 'cls', None)
+    return getattr(view, 'query_budget', None)
+
+
+def label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class RequestStats:
+    """Bitta so'rov davomida yig'iladigan o'lchovlar (contextvar orqali ulanadi)"""
+    __slots__ = ('queries', 'db_time', 'serializer_time', 'render_time')
+
+    def __init__(self):
+        self.queries = []
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.render_time = 0.0
+
+    def top_queries(self, limit):
+        return sorted(self.queries, key=lambda query: query[0], reverse=True)[:limit]
+
+
+def record_queries(execute, sql, params, many, context):
+    stats = current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        stats.db_time += duration
+        stats.queries.append((duration, sql))
+
+
+class Histogram:
+    """Prometheus histogrami: faqat bucket hisoblagichlari, yig'indi va soni saqlanadi"""
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    METRICS = {
+        'http_request_duration_seconds': ('Wall time per request', TIME_BUCKETS),
+        'http_request_db_queries': ('SQL queries per request', COUNT_BUCKETS),
+        'http_request_db_duration_seconds': ('SQL time per request', TIME_BUCKETS),
+        'http_request_serializer_duration_seconds': ('DRF serializer to_representation time', TIME_BUCKETS),
+        'http_request_render_duration_seconds': ('DRF renderer time', TIME_BUCKETS),
+        'http_response_size_bytes': ('Response body size', SIZE_BUCKETS),
+    }
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.requests = {}
+
+    def observe(self, view, method, status, values):
+        with self.lock:
+            key = (view, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            for name, value in values.items():
+                histogram = self.histograms.get((name, view, method))
+                if histogram is None:
+                    histogram = self.histograms[(name, view, method)] = Histogram(self.METRICS[name][1])
+                histogram.observe(value)
+
+    def render(self):
+        lines = []
+        with self.lock:
+            lines.append('# HELP http_requests_total Requests by view, method and status')
+            lines.append('# TYPE http_requests_total counter')
+            for (view, method, status), count in sorted(self.requests.items()):
+                lines.append(
+                    f'http_requests_total{{view="{label(view)}",method="{method}",status="{status}"}} {count}'
+                )
+            for name, (description, _) in self.METRICS.items():
+                lines.append(f'# HELP {name} {description}')
+                lines.append(f'# TYPE {name} histogram')
+                for (metric, view, method), histogram in sorted(self.histograms.items()):
+                    if metric != name:
+                        continue
+                    labels = f'view="{label(view)}",method="{method}"'
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                    lines.append(f'{name}_sum{{{labels}}} {histogram.sum:.6f}')
+                    lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+            self.requests.clear()
+
+
+registry = Registry()
+
+
+def _timed_property(prop, field):
+    def fget(self):
+        stats = current.get()
+        if stats is None:
+            return prop.fget(self)
+        started = time.perf_counter()
+        try:
+            return prop.fget(self)
+        finally:
+            setattr(stats, field, getattr(stats, field) + time.perf_counter() - started)
+    return property(fget, prop.fset, prop.fdel, prop.__doc__)
+
+
+def install():
+    """
+    DRF serializer va renderer vaqtini o'lchash uchun BaseSerializer.data va
+    Response.rendered_content ni o'raydi. Ichma-ich serializerlar .data ni emas,
+    to_representation ni chaqiradi, shuning uchun vaqt ikki marta hisoblanmaydi.
+    """
+    from rest_framework.response import Response
+    from rest_framework.serializers import BaseSerializer
+
+    if getattr(BaseSerializer, '_metrics_installed', False):
+        return
+    BaseSerializer.data = _timed_property(BaseSerializer.data, 'serializer_time')
+    Response.rendered_content = _timed_property(Response.rendered_content, 'render_time')
+    BaseSerializer._metrics_installed = True
+    # wrapper har bir ulanishga bir marta qo'shiladi; so'rov tashqarisida faqat contextvar tekshiriladi.
+    # contextvar sync_to_async threadlariga ham o'tadi, shuning uchun async viewlar ham o'lchanadi
+    connection_created.connect(_wrap_connection, weak=False)
+    for conn in connections.all(initialized_only=True):
+        _wrap_connection(None, conn)
+
+
+def _wrap_connection(sender, connection, **kwargs):
+    if record_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_queries)
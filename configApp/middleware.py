@@ -1,9 +1,102 @@
+import logging
+import time
+from collections import Counter
 
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.core.exceptions import MiddlewareNotUsed
 from django.middleware.common import CommonMiddleware
 
+from . import metrics
+
+slow_logger = logging.getLogger('configApp.slow_requests')
+budget_logger = logging.getLogger('configApp.query_budget')
+
+
 class CustomCorsMiddleware(CommonMiddleware):
     def process_response(self, request, response):
         response["Access-Control-Allow-Origin"] = "*"  # Barcha domenlarga ruxsat
         response["Access-Control-Allow-Methods"] = "GET, POST, PUT, DELETE, OPTIONS"
         response["Access-Control-Allow-Headers"] = "Content-Type, Authorization"
-        return response
\ No newline at end of file
+        return response
+
+
+class PerformanceMiddleware:
+    """
+    Har bir route uchun vaqt, SQL so'rovlar soni va vaqti, serializer/render vaqti va javob
+    hajmini process ichidagi histogramlarga yozadi (/metrics). Ixtiyoriy Server-Timing
+    header, sekin so'rovlar logi (eng uzoq so'rovlar bilan) va query_budget dan oshgan viewlar logi.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.options = metrics.config()
+        if not self.options['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        metrics.install()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = metrics.RequestStats()
+        token = metrics.current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.current.reset(token)
+        return self.finish(request, response, stats, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        stats = metrics.RequestStats()
+        token = metrics.current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.current.reset(token)
+        return self.finish(request, response, stats, time.perf_counter() - started)
+
+    def finish(self, request, response, stats, elapsed):
+        match = request.resolver_match
+        # router regex route lari: '^course/$' -> 'course/'
+        view = match.route.replace('^', '').replace('$', '') if match else 'unmatched'
+        size = len(response.content) if not response.streaming else int(response.get('Content-Length') or 0)
+        metrics.registry.observe(view, request.method, response.status_code, {
+            'http_request_duration_seconds': elapsed,
+            'http_request_db_queries': len(stats.queries),
+            'http_request_db_duration_seconds': stats.db_time,
+            'http_request_serializer_duration_seconds': stats.serializer_time,
+            'http_request_render_duration_seconds': stats.render_time,
+            'http_response_size_bytes': size,
+        })
+
+        if self.options['SERVER_TIMING']:
+            response['Server-Timing'] = (
+                f'db;dur={stats.db_time * 1000:.1f};desc="{len(stats.queries)} queries", '
+                f'ser;dur={stats.serializer_time * 1000:.1f}, render;dur={stats.render_time * 1000:.1f}, '
+                f'total;dur={elapsed * 1000:.1f}'
+            )
+
+        # budjet GET ning standart ko'rinishi uchun; ?expand= har bir ichki obyekt uchun prefetch qo'shadi
+        checked = request.method in ('GET', 'HEAD') and 'expand' not in request.GET
+        budget = metrics.query_budget(match) if checked else None
+        if budget is not None and len(stats.queries) > budget:
+            repeated = Counter(metrics.fingerprint(sql) for _, sql in stats.queries)
+            budget_logger.warning(
+                'query budget exceeded %s %s (%s): %d queries, budget %d%s',
+                request.method, request.path, view, len(stats.queries), budget,
+                ''.join(f'\n  {count}x  {sql[:500]}' for sql, count in repeated.most_common(self.options['SLOW_TOP_QUERIES'])),
+            )
+
+        if elapsed * 1000 >= self.options['SLOW_REQUEST_MS']:
+            top = stats.top_queries(self.options['SLOW_TOP_QUERIES'])
+            slow_logger.warning(
+                'slow request %s %s (%s): %.0f ms, %d queries in %.0f ms%s',
+                request.method, request.path, view, elapsed * 1000, len(stats.queries), stats.db_time * 1000,
+                ''.join(f'\n  {duration * 1000:.1f} ms  {sql[:500]}' for duration, sql in top),
+            )
+        return response
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_enrollment_stats(apps, schema_editor):
+    Enrollment = apps.get_model('configApp', 'Enrollment')
+    EnrollmentDailyStat = apps.get_model('configApp', 'EnrollmentDailyStat')
+    rows = Enrollment.objects.values('date_joined', 'course_id', 'status').annotate(total=Count('id')).order_by()
+    EnrollmentDailyStat.objects.bulk_create(
+        (
+            EnrollmentDailyStat(day=row['date_joined'], course_id=row['course_id'], status=row['status'], count=row['total'])
+            for row in rows.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configApp', '0002_alter_student_email'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EnrollmentDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(choices=[('registered', 'Registered'), ('studying', 'Studying'), ('graduated', 'Graduated')], max_length=10)),
+                ('count', models.IntegerField(default=0)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='configApp.course')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'course', 'status'), name='unique_enrollment_daily_stat')],
+            },
+        ),
+        migrations.RunPython(fill_enrollment_stats, migrations.RunPython.noop),
+    ]
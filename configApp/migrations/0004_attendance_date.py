@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:56
+
+import logging
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Count, Max
+from django.db.models.functions import TruncDate
+
+logger = logging.getLogger('configApp.migrations')
+
+
+def fill_attendance_date(apps, schema_editor):
+    Attendance = apps.get_model('configApp', 'Attendance')
+    # bitta UPDATE; TruncDate joriy (TIME_ZONE) vaqt zonasida, localdate kabi
+    Attendance.objects.update(date=TruncDate('created'))
+
+    # bir kunda bir nechta yo'qlama bo'lsa oxirgisini qoldiramiz;
+    # reverse yo'q, shuning uchun o'chiriladigan qatorlar to'liq logga yoziladi
+    duplicates = (
+        Attendance.objects.values('student_id', 'group_id', 'date')
+        .annotate(total=Count('id'), last_id=Max('id'))
+        .filter(total__gt=1)
+        .order_by()
+    )
+    for row in duplicates.iterator():
+        extra = Attendance.objects.filter(
+            student_id=row['student_id'], group_id=row['group_id'], date=row['date'],
+        ).exclude(pk=row['last_id'])
+        for values in extra.values('id', 'student_id', 'group_id', 'level_id', 'created', 'updated'):
+            logger.warning("takroriy yo'qlama o'chirildi (%s qoldi): %r", row['last_id'], values)
+        extra.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configApp', '0003_enrollmentdailystat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendance',
+            name='date',
+            field=models.DateField(default=django.utils.timezone.localdate),
+        ),
+        migrations.RunPython(fill_attendance_date, migrations.RunPython.noop),
+    ]
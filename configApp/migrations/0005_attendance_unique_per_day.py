@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configApp', '0004_attendance_date'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='attendance',
+            constraint=models.UniqueConstraint(fields=('student', 'group', 'date'), name='unique_attendance_per_day'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('configApp', '0005_attendance_unique_per_day'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['group', 'created'], name='attendance_group_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['student', 'created'], name='attendance_student_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['status', 'date_joined'], name='enrollment_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('is_student', True)), fields=['id'], name='user_is_student_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('is_teacher', True)), fields=['id'], name='user_is_teacher_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('is_staff', True)), fields=['id'], name='user_is_staff_idx'),
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+
+
+def fill_attendance_stats(apps, schema_editor):
+    Attendance = apps.get_model('configApp', 'Attendance')
+    AttendanceMonthlyStat = apps.get_model('configApp', 'AttendanceMonthlyStat')
+    rows = (
+        Attendance.objects.annotate(month=TruncMonth('date'))
+        .values('month', 'group_id', 'student_id', 'level_id')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    AttendanceMonthlyStat.objects.bulk_create(
+        (
+            AttendanceMonthlyStat(month=row['month'], group_id=row['group_id'], student_id=row['student_id'],
+                                  level_id=row['level_id'], count=row['total'])
+            for row in rows.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configApp', '0006_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceMonthlyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['group', 'date'], name='attendance_group_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['date'], name='attendance_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='attendancemonthlystat',
+            name='group',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='configApp.group'),
+        ),
+        migrations.AddField(
+            model_name='attendancemonthlystat',
+            name='level',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='configApp.attendancelevel'),
+        ),
+        migrations.AddField(
+            model_name='attendancemonthlystat',
+            name='student',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='configApp.student'),
+        ),
+        migrations.AddIndex(
+            model_name='attendancemonthlystat',
+            index=models.Index(fields=['month'], name='attendance_stat_month_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='attendancemonthlystat',
+            constraint=models.UniqueConstraint(fields=('group', 'month', 'student', 'level'), name='unique_attendance_monthly_stat'),
+        ),
+        migrations.RunPython(fill_attendance_stats, migrations.RunPython.noop),
+    ]
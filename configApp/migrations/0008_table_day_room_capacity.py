@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configApp', '0007_attendance_monthly_stat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rooms',
+            name='capacity',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='table',
+            name='day',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.RESTRICT, to='configApp.day'),
+        ),
+    ]
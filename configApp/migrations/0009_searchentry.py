@@ -0,0 +1,101 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:06
+
+import re
+
+from django.db import migrations, models
+
+# configApp.search dagi SQL va yordamchilarning shu migratsiya vaqtidagi nusxasi:
+# keyingi o'zgarishlar eski migratsiyani o'zgartirmasligi kerak
+FTS_TABLE = 'configApp_searchentry_fts'
+SQLITE_SETUP = [
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+    f"text, content='configApp_searchentry', content_rowid='id', tokenize='trigram')",
+    f"CREATE TRIGGER configApp_searchentry_ai AFTER INSERT ON configApp_searchentry BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); END",
+    f"CREATE TRIGGER configApp_searchentry_ad AFTER DELETE ON configApp_searchentry BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) VALUES ('delete', old.id, old.text); END",
+    f"CREATE TRIGGER configApp_searchentry_au AFTER UPDATE ON configApp_searchentry BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) VALUES ('delete', old.id, old.text); "
+    f"INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); END",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+SQLITE_TEARDOWN = [
+    'DROP TRIGGER IF EXISTS configApp_searchentry_ai',
+    'DROP TRIGGER IF EXISTS configApp_searchentry_ad',
+    'DROP TRIGGER IF EXISTS configApp_searchentry_au',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+POSTGRES_SETUP = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX IF NOT EXISTS configapp_searchentry_text_trgm '
+    'ON "configApp_searchentry" USING gin (text gin_trgm_ops)',
+]
+POSTGRES_TEARDOWN = ['DROP INDEX IF EXISTS configapp_searchentry_text_trgm']
+
+
+def digits(value):
+    return re.sub(r'\D', '', value or '')
+
+
+def normalize(*parts):
+    return ' '.join(str(part).lower().strip() for part in parts if part)[:600]
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for sql in {'sqlite': SQLITE_SETUP, 'postgresql': POSTGRES_SETUP}.get(vendor, []):
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for sql in {'sqlite': SQLITE_TEARDOWN, 'postgresql': POSTGRES_TEARDOWN}.get(vendor, []):
+        schema_editor.execute(sql)
+
+
+def fill_search_index(apps, schema_editor):
+    SearchEntry = apps.get_model('configApp', 'SearchEntry')
+    User = apps.get_model('configApp', 'User')
+    Student = apps.get_model('configApp', 'Student')
+    Parents = apps.get_model('configApp', 'Parents')
+    entries = []
+    for user in User.objects.iterator():
+        entries.append(SearchEntry(kind='teacher' if user.is_teacher else 'user', object_id=user.pk,
+                                   label=user.full_name or user.phone, extra=user.phone,
+                                   text=normalize(user.full_name, digits(user.phone))))
+    for student in Student.objects.select_related('user').iterator():
+        entries.append(SearchEntry(kind='student', object_id=student.pk, label=student.full_name,
+                                   extra=student.user.phone,
+                                   text=normalize(student.full_name, student.email, digits(student.user.phone))))
+    for parent in Parents.objects.iterator():
+        entries.append(SearchEntry(kind='parent', object_id=parent.pk,
+                                   label=parent.full_name or parent.phone_number or '',
+                                   extra=parent.phone_number or '',
+                                   text=normalize(parent.full_name, digits(parent.phone_number))))
+    SearchEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configApp', '0008_table_day_room_capacity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('user', 'User'), ('teacher', 'Teacher'), ('student', 'Student'), ('parent', 'Parent')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('label', models.CharField(max_length=255)),
+                ('extra', models.CharField(blank=True, max_length=255)),
+                ('text', models.CharField(db_index=True, max_length=600)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_search_entry')],
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(fill_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:09
+
+import re
+from collections import defaultdict
+
+import configApp.models
+import django.core.validators
+from django.conf import settings
+from django.db import migrations
+
+# configApp.phones va configApp.search yordamchilarining shu migratsiya vaqtidagi nusxasi
+DEFAULT_COUNTRY_CODE = getattr(settings, 'PHONE_DEFAULT_COUNTRY_CODE', '998')
+LOCAL_NUMBER_LENGTH = getattr(settings, 'PHONE_LOCAL_NUMBER_LENGTH', 9)
+
+
+def normalize_phone(value):
+    if value is None:
+        return value
+    raw = str(value).strip()
+    digits = re.sub(r'\D', '', raw)
+    if not digits or re.search(r'[^\d\s+().-]', raw):
+        return raw
+    if raw.startswith('00'):
+        digits = digits[2:]
+    elif not raw.startswith('+') and len(digits) == LOCAL_NUMBER_LENGTH:
+        digits = DEFAULT_COUNTRY_CODE + digits
+    return '+' + digits
+
+
+def digits(value):
+    return re.sub(r'\D', '', value or '')
+
+
+def search_text(*parts):
+    return ' '.join(str(part).lower().strip() for part in parts if part)[:600]
+
+
+def normalize_phones(apps, schema_editor):
+    User = apps.get_model('configApp', 'User')
+    Student = apps.get_model('configApp', 'Student')
+    SearchEntry = apps.get_model('configApp', 'SearchEntry')
+    owners = defaultdict(list)
+    for pk, phone in User.objects.order_by('pk').values_list('pk', 'phone').iterator(chunk_size=2000):
+        owners[normalize_phone(phone)].append(pk)
+    # bir xil raqamga tushadigan akkauntlardan biri endi topilmay qolardi: avval qo'lda birlashtirilsin
+    collisions = {phone: pks for phone, pks in owners.items() if len(pks) > 1}
+    if collisions:
+        raise RuntimeError('Bir xil raqamga normallashadigan foydalanuvchilar (pk): ' + '; '.join(
+            f"{phone}: {', '.join(map(str, pks))}" for phone, pks in sorted(collisions.items())
+        ))
+
+    changed = []
+    for user in User.objects.only('pk', 'phone', 'full_name').order_by('pk').iterator(chunk_size=2000):
+        phone = normalize_phone(user.phone)
+        if phone != user.phone:
+            user.phone = phone
+            changed.append(user)
+    for start in range(0, len(changed), 1000):
+        batch = {user.pk: user for user in changed[start:start + 1000]}
+        User.objects.bulk_update(batch.values(), ['phone'])
+        for user in batch.values():
+            SearchEntry.objects.filter(kind__in=['user', 'teacher'], object_id=user.pk).update(
+                extra=user.phone, text=search_text(user.full_name, digits(user.phone)),
+            )
+        for student in Student.objects.filter(user_id__in=batch).only('pk', 'user_id', 'full_name', 'email'):
+            phone = batch[student.user_id].phone
+            SearchEntry.objects.filter(kind='student', object_id=student.pk).update(
+                extra=phone, text=search_text(student.full_name, student.email, digits(phone)),
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configApp', '0009_searchentry'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='phone',
+            field=configApp.models.PhoneField(max_length=17, unique=True, validators=[django.core.validators.RegexValidator(message="Phone number must be entered in the format: '998900404001'. Up to 14 digits allowed.", regex='^\\+?1?\\d{9,14}$')]),
+        ),
+        migrations.RunPython(normalize_phones, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations
+
+
+def drop_student_user_entries(apps, schema_editor):
+    # studentlar endi faqat 'student' yozuvi bilan indekslanadi
+    SearchEntry = apps.get_model('configApp', 'SearchEntry')
+    User = apps.get_model('configApp', 'User')
+    SearchEntry.objects.filter(
+        kind='user', object_id__in=User.objects.filter(is_student=True, is_teacher=False).values('pk'),
+    ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configApp', '0012_timetablejob'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_student_user_entries, migrations.RunPython.noop),
+    ]
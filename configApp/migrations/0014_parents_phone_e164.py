@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:09
+
+import re
+
+import configApp.models
+from django.conf import settings
+from django.db import migrations
+
+# configApp.phones va configApp.search yordamchilarining shu migratsiya vaqtidagi nusxasi
+DEFAULT_COUNTRY_CODE = getattr(settings, 'PHONE_DEFAULT_COUNTRY_CODE', '998')
+LOCAL_NUMBER_LENGTH = getattr(settings, 'PHONE_LOCAL_NUMBER_LENGTH', 9)
+
+
+def normalize_phone(value):
+    if value is None:
+        return value
+    raw = str(value).strip()
+    digits = re.sub(r'\D', '', raw)
+    if not digits or re.search(r'[^\d\s+().-]', raw):
+        return raw
+    if raw.startswith('00'):
+        digits = digits[2:]
+    elif not raw.startswith('+') and len(digits) == LOCAL_NUMBER_LENGTH:
+        digits = DEFAULT_COUNTRY_CODE + digits
+    return '+' + digits
+
+
+def search_text(full_name, phone):
+    return ' '.join(str(part).lower().strip() for part in (full_name, re.sub(r'\D', '', phone or '')) if part)[:600]
+
+
+def normalize_phones(apps, schema_editor):
+    Parents = apps.get_model('configApp', 'Parents')
+    SearchEntry = apps.get_model('configApp', 'SearchEntry')
+    changed = []
+    parents = Parents.objects.exclude(phone_number__isnull=True).exclude(phone_number='')
+    for parent in parents.only('pk', 'phone_number', 'full_name').order_by('pk').iterator(chunk_size=2000):
+        phone = normalize_phone(parent.phone_number)
+        if phone != parent.phone_number:
+            parent.phone_number = phone
+            changed.append(parent)
+    for start in range(0, len(changed), 1000):
+        batch = changed[start:start + 1000]
+        Parents.objects.bulk_update(batch, ['phone_number'])
+        for parent in batch:
+            SearchEntry.objects.filter(kind='parent', object_id=parent.pk).update(
+                label=parent.full_name or parent.phone_number, extra=parent.phone_number,
+                text=search_text(parent.full_name, parent.phone_number),
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configApp', '0013_drop_student_user_search_entries'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='parents',
+            name='phone_number',
+            field=configApp.models.PhoneField(blank=True, max_length=17, null=True),
+        ),
+        migrations.RunPython(normalize_phones, migrations.RunPython.noop),
+    ]
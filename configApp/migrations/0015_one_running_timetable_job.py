@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:32
+
+from django.db import migrations, models
+
+
+def fail_extra_running_jobs(apps, schema_editor):
+    # eng oxirgi yangilangan running vazifa qoladi, qolganlari constraint ni buzmasligi uchun failed
+    TimetableJob = apps.get_model('configApp', 'TimetableJob')
+    for job in TimetableJob.objects.filter(status='running').order_by('-updated')[1:]:
+        job.status = 'failed'
+        job.data = {**job.data, 'status': 'failed', 'error': "vazifa to'xtab qoldi"}
+        job.save(update_fields=['status', 'data'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configApp', '0014_parents_phone_e164'),
+    ]
+
+    operations = [
+        migrations.RunPython(fail_extra_running_jobs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='timetablejob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'running')), fields=('status',), name='one_running_timetable_job'),
+        ),
+    ]
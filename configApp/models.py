@@ -1,9 +1,25 @@
 
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.core.validators import RegexValidator
 from django.contrib.auth.models import User
 
+from . import hashing
+from .phones import normalize_phone
+
+
+class PhoneField(models.CharField):
+    """Saqlashda ham, har bir lookup da ham qiymatni E.164 ga keltiradi -> unique indeks bo'yicha aniq tenglik"""
+
+    def get_prep_value(self, value):
+        return normalize_phone(super().get_prep_value(value))
+
+    def pre_save(self, model_instance, add):
+        value = normalize_phone(getattr(model_instance, self.attname))
+        setattr(model_instance, self.attname, value)
+        return value
+
 
 class UserManager(BaseUserManager):
     
@@ -11,11 +27,14 @@ class UserManager(BaseUserManager):
         
         if not phone:
             raise ValueError('The Phone number must be set')
-        user = self.model(phone=phone, **extra_fields)
+        user = self.model(phone=normalize_phone(phone), **extra_fields)
         user.set_password(password)
         user.save(using=self._db)
         return user
 
+    def get_by_natural_key(self, phone):
+        return self.get(phone=normalize_phone(phone))
+
     def create_superuser(self, phone, password=None, **extra_fields):
         
         extra_fields.setdefault('is_staff', True)
@@ -29,7 +48,7 @@ class UserManager(BaseUserManager):
 class User(AbstractBaseUser, PermissionsMixin):
     phone_regex = RegexValidator(regex=r'^\+?1?\d{9,14}$',
                                  message="Phone number must be entered in the format: '998900404001'. Up to 14 digits allowed.")
-    phone = models.CharField(validators=[phone_regex], max_length=17, unique=True)
+    phone = PhoneField(validators=[phone_regex], max_length=17, unique=True)
     full_name = models.CharField(max_length=50, null=True, blank=True)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
@@ -50,12 +69,33 @@ class User(AbstractBaseUser, PermissionsMixin):
     def __str__(self):
         return self.phone
 
+    def set_password(self, raw_password):
+        self.password = hashing.hash_password(raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password):
+        is_correct, must_update = hashing.verify_password(raw_password, self.password)
+        if is_correct and must_update:
+            # eski algoritm bilan saqlangan parol login paytida yangisiga o'tkaziladi. update() signal
+            # yubormaydi: bu parol o'zgarishi emas, foydalanuvchi tokenlari bekor qilinmasligi kerak
+            self.password = hashing.hash_password(raw_password)
+            User.objects.filter(pk=self.pk).update(password=self.password)
+        return is_correct
+
     def has_perm(self, perm, obj=None):
         return self.is_admin
 
     def has_module_perms(self, app_label):
         return self.is_admin
 
+    class Meta:
+        indexes = [
+            # rol bo'yicha ro'yxatlar uchun qisman indekslar: faqat kerakli qatorlar indekslanadi
+            models.Index(fields=['id'], condition=models.Q(is_student=True), name='user_is_student_idx'),
+            models.Index(fields=['id'], condition=models.Q(is_teacher=True), name='user_is_teacher_idx'),
+            models.Index(fields=['id'], condition=models.Q(is_staff=True), name='user_is_staff_idx'),
+        ]
+
 class Teacher(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     departments = models.ManyToManyField('Departments', related_name='teachers')
@@ -93,6 +133,35 @@ class Enrollment(models.Model):
     def __str__(self):
         return f"{self.student} - {self.course} ({self.status})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # statistika signali eski (kun, kurs, status) ni qo'shimcha SELECT siz bilsin
+        instance = super().from_db(db, field_names, values)
+        loaded = instance.__dict__
+        if all(name in loaded for name in ('date_joined', 'course_id', 'status')):
+            instance._stat_key_before = (loaded['date_joined'], loaded['course_id'], loaded['status'])
+        return instance
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'date_joined'], name='enrollment_status_date_idx'),
+        ]
+
+class EnrollmentDailyStat(models.Model):
+    """Enrollment lar soni kun / kurs / status bo'yicha (signal orqali yangilanadi)"""
+    day = models.DateField()
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='daily_stats')
+    status = models.CharField(max_length=10, choices=Enrollment.STATUS_CHOICES)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'course', 'status'], name='unique_enrollment_daily_stat'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.course_id} {self.status}: {self.count}"
+
 class Worker(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     departments = models.ManyToManyField('Departments', related_name='worker')
@@ -140,7 +209,7 @@ class Student(models.Model):
 class Parents(models.Model):
     student = models.OneToOneField(Student, on_delete=models.CASCADE)
     full_name = models.CharField(max_length=50, null=True, blank=True)
-    phone_number = models.CharField(max_length=15, null=True, blank=True)
+    phone_number = PhoneField(max_length=17, null=True, blank=True)
     address = models.CharField(max_length=200, null=True, blank=True)
     descriptions = models.CharField(max_length=500, null=True, blank=True)
     created = models.DateTimeField(auto_now_add=True)
@@ -149,6 +218,31 @@ class Parents(models.Model):
     def __str__(self):
         return self.full_name
 
+class SearchEntry(models.Model):
+    """
+    Qidiruv indeksi uchun bitta qator: kind + object_id manbaga ishora qiladi.
+    SQLite da FTS5 (trigram), PostgreSQL da pg_trgm GIN indeksi shu jadval ustida quriladi.
+    """
+    KIND_CHOICES = (
+        ('user', 'User'),
+        ('teacher', 'Teacher'),
+        ('student', 'Student'),
+        ('parent', 'Parent'),
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    label = models.CharField(max_length=255)
+    extra = models.CharField(max_length=255, blank=True)
+    text = models.CharField(max_length=600, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='unique_search_entry'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id} {self.label}"
+
 class Day(models.Model):
     title = models.CharField(max_length=50)
     descriptions = models.CharField(max_length=500, blank=True, null=True)
@@ -158,6 +252,7 @@ class Day(models.Model):
 
 class Rooms(models.Model):
     title = models.CharField(max_length=50)
+    capacity = models.PositiveIntegerField(null=True, blank=True)
     descriptions = models.CharField(max_length=500, blank=True, null=True)
 
     def __str__(self):
@@ -175,6 +270,8 @@ class Table(models.Model):
     end_time = models.TimeField()
     room = models.ForeignKey(Rooms, on_delete=models.RESTRICT)
     type = models.ForeignKey(TableType, on_delete=models.RESTRICT)
+    # bo'sh bo'lsa jadval har kuni takrorlanadi
+    day = models.ForeignKey(Day, on_delete=models.RESTRICT, null=True, blank=True)
     descriptions = models.CharField(max_length=500, blank=True, null=True)
 
     def __str__(self):
@@ -232,6 +329,7 @@ class AttendanceLevel(models.Model):
 
 class Attendance(models.Model):
     level = models.ForeignKey(AttendanceLevel, on_delete=models.RESTRICT)
+    date = models.DateField(default=timezone.localdate)
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
     
@@ -239,7 +337,92 @@ class Attendance(models.Model):
     group = models.ForeignKey(Group, on_delete=models.RESTRICT)
 
     def __str__(self):
-        return self.level
+        return str(self.level)
+
+    class Meta:
+        constraints = [
+            # bitta dars kuni uchun bitta yo'qlama: qayta yuborilsa yangilanadi
+            models.UniqueConstraint(fields=['student', 'group', 'date'], name='unique_attendance_per_day'),
+        ]
+        indexes = [
+            models.Index(fields=['group', 'created'], name='attendance_group_created_idx'),
+            models.Index(fields=['student', 'created'], name='attendance_student_created_idx'),
+            models.Index(fields=['group', 'date'], name='attendance_group_date_idx'),
+            models.Index(fields=['date'], name='attendance_date_idx'),
+        ]
+
+
+class AttendanceMonthlyStat(models.Model):
+    """Yo'qlamalar soni oy / student / guruh / level bo'yicha (guruh-oy bo'lagi bilan yangilanadi)"""
+    month = models.DateField()
+    student = models.ForeignKey(Student, on_delete=models.CASCADE)
+    group = models.ForeignKey(Group, on_delete=models.CASCADE)
+    level = models.ForeignKey(AttendanceLevel, on_delete=models.CASCADE)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['group', 'month', 'student', 'level'], name='unique_attendance_monthly_stat'),
+        ]
+        indexes = [
+            models.Index(fields=['month'], name='attendance_stat_month_idx'),
+        ]
+
+
+class OutboundMessage(models.Model):
+    """Tashqi gateway orqali yuboriladigan xabarlar navbati (SMS va h.k.), worker yuboradi"""
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    )
+    channel = models.CharField(max_length=20, default='sms')
+    kind = models.CharField(max_length=20)
+    recipient = models.CharField(max_length=32)
+    body = models.CharField(max_length=500)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    leased_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.CharField(max_length=500, blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # worker navbatdan faqat pending/sending qatorlarni oladi: qisman indeks kichik qoladi
+            models.Index(fields=['next_attempt_at'], condition=models.Q(status='pending'),
+                         name='outbound_pending_idx'),
+            models.Index(fields=['leased_until'], condition=models.Q(status='sending'),
+                         name='outbound_sending_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} -> {self.recipient}'
+
+
+class TimetableJob(models.Model):
+    """Dars jadvali tuzish vazifasi: holati bazada, shuning uchun uni istalgan worker qaytara oladi"""
+    STATUS_CHOICES = (
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+    id = models.CharField(max_length=32, primary_key=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='running')
+    data = models.JSONField(default=dict)
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            # bir vaqtda bitta vazifa: ikkitasi bir-birining rejasini bilmay yozib yuborardi
+            models.UniqueConstraint(fields=['status'], condition=models.Q(status='running'), name='one_running_timetable_job'),
+        ]
+
+    def __str__(self):
+        return f'{self.id} ({self.status})'
 
 from typing import TYPE_CHECKING, Any, List, Optional, Union
 
@@ -247,10 +430,10 @@ from django.contrib.auth import models as auth_models
 from django.db.models.manager import EmptyManager
 from django.utils.functional import cached_property
 
-from rest_framework.settings import api_settings
+from rest_framework_simplejwt.settings import api_settings
 
 if TYPE_CHECKING:
-    from .models import Token
+    from rest_framework_simplejwt.tokens import Token
 
 
 class TokenUser:
@@ -296,6 +479,18 @@ class TokenUser:
     def is_superuser(self) -> bool:
         return self.token.get("is_superuser", False)
 
+    @cached_property
+    def is_admin(self) -> bool:
+        return self.token.get("is_admin", False)
+
+    @cached_property
+    def is_student(self) -> bool:
+        return self.token.get("is_student", False)
+
+    @cached_property
+    def is_teacher(self) -> bool:
+        return self.token.get("is_teacher", False)
+
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, TokenUser):
             return NotImplemented
@@ -334,13 +529,13 @@ class TokenUser:
         return set()
 
     def has_perm(self, perm: str, obj: Optional[object] = None) -> bool:
-        return False
+        return self.is_admin
 
     def has_perms(self, perm_list: List[str], obj: Optional[object] = None) -> bool:
-        return False
+        return self.is_admin
 
     def has_module_perms(self, module: str) -> bool:
-        return False
+        return self.is_admin
 
     @property
     def is_anonymous(self) -> bool:
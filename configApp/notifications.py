@@ -0,0 +1,219 @@
+import logging
+import random
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import AttendanceLevel, OutboundMessage, Parents
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'GATEWAY': 'configApp.notifications.ConsoleGateway',
+    'OPTIONS': {},
+    'MAX_ATTEMPTS': 5,
+    'BACKOFF': 5,
+    'LEASE': 60,
+}
+
+
+# bu turdagi xabar matni (OTP kod) logga yozilmaydi va yuborilgandan keyin bazada saqlanmaydi
+SECRET_KINDS = {'otp'}
+REDACTED = '***'
+
+
+def config():
+    return {**DEFAULTS, **getattr(settings, 'NOTIFICATIONS', {})}
+
+
+class Gateway:
+    """
+    Tashqi provayder interfeysi. send_batch bitta tarmoq chaqiruvida max_batch tagacha
+    xabar yuboradi va har bir xabar uchun xato matnini (yoki None) qaytaradi.
+    """
+    max_batch = 100
+
+    def send_batch(self, messages):
+        raise NotImplementedError
+
+
+class ConsoleGateway(Gateway):
+    """Lokal ishlab chiqish uchun: xabarlarni logga yozadi"""
+
+    def send_batch(self, messages):
+        for message in messages:
+            body = REDACTED if message.kind in SECRET_KINDS else message.body
+            logger.info('%s -> %s: %s', message.channel, message.recipient, body)
+        return [None] * len(messages)
+
+
+class LocMemGateway(Gateway):
+    """Testlar va benchmark uchun: xabarlar xotirada qoladi, kechikish va xatolar simulyatsiya qilinadi"""
+    outbox = []
+    lock = threading.Lock()
+
+    def __init__(self, latency=0, failure_rate=0, max_batch=100):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.max_batch = max_batch
+
+    def send_batch(self, messages):
+        time.sleep(self.latency)
+        results = []
+        with self.lock:
+            for message in messages:
+                if random.random() < self.failure_rate:
+                    results.append('simulated failure')
+                else:
+                    self.outbox.append((message.recipient, message.body))
+                    results.append(None)
+        return results
+
+
+_gateway = None
+
+
+def get_gateway():
+    global _gateway
+    if _gateway is None:
+        options = config()
+        _gateway = import_string(options['GATEWAY'])(**options['OPTIONS'])
+    return _gateway
+
+
+def enqueue(recipient, body, kind, channel='sms'):
+    enqueue_many([(recipient, body)], kind, channel)
+
+
+def enqueue_many(items, kind, channel='sms'):
+    """Xabarlarni navbatga yozadi; chaqiruvchi tranzaksiyasi ichida bo'lsa u bilan birga commit bo'ladi"""
+    OutboundMessage.objects.bulk_create([
+        OutboundMessage(channel=channel, kind=kind, recipient=recipient, body=body[:500])
+        for recipient, body in items
+    ], batch_size=1000)
+
+
+def notify_absences(date, items):
+    """Roll-call dagi ATTENDANCE_NOTIFY_LEVELS levellari uchun ota-onalarga xabar navbatga qo'yiladi"""
+    levels = set(getattr(settings, 'ATTENDANCE_NOTIFY_LEVELS', ()))
+    marked = {item['student']: item['level'] for item in items if item['level'] in levels}
+    if not marked:
+        return 0
+    titles = dict(AttendanceLevel.objects.filter(pk__in=set(marked.values())).values_list('pk', 'title'))
+    parents = (
+        Parents.objects.filter(student_id__in=marked, phone_number__isnull=False)
+        .exclude(phone_number='')
+        .values_list('student_id', 'phone_number', 'student__full_name')
+    )
+    messages = [
+        (phone, f"{full_name}: {date:%d.%m.%Y} - {titles[marked[student_id]]}")
+        for student_id, phone, full_name in parents
+    ]
+    enqueue_many(messages, kind='attendance')
+    return len(messages)
+
+
+def claim(limit, lease):
+    """
+    Yuborishga tayyor xabarlarni lease bilan band qiladi. PostgreSQL da SKIP LOCKED
+    bir nechta worker bir-birini kutmasligini ta'minlaydi, SQLite da BEGIN IMMEDIATE navbatga qo'yadi.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        # worker o'lib qolgan bo'lsa lease tugagan xabarlar qaytadan navbatga tushadi
+        OutboundMessage.objects.filter(status='sending', leased_until__lt=now).update(status='pending')
+        messages = list(
+            OutboundMessage.objects.select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=now)
+            .order_by('next_attempt_at')[:limit]
+        )
+        if messages:
+            OutboundMessage.objects.filter(pk__in=[message.pk for message in messages]).update(
+                status='sending', leased_until=now + timedelta(seconds=lease), attempts=F('attempts') + 1,
+            )
+    for message in messages:
+        message.attempts += 1
+    return messages
+
+
+def deliver(messages, gateway, max_attempts, backoff):
+    try:
+        errors = gateway.send_batch(messages)
+    except Exception as e:
+        logger.exception('gateway xatosi')
+        errors = [str(e) or e.__class__.__name__] * len(messages)
+
+    now = timezone.now()
+    sent = [message.pk for message, error in zip(messages, errors) if error is None]
+    failed = []
+    for message, error in zip(messages, errors):
+        if error is None:
+            continue
+        message.last_error = str(error)[:500]
+        message.leased_until = None
+        if message.attempts >= max_attempts:
+            message.status = 'failed'
+            if message.kind in SECRET_KINDS:
+                message.body = REDACTED
+        else:
+            # eksponensial backoff + jitter: provayder tiklanganda hamma birdan qaytmasin
+            delay = backoff * 2 ** (message.attempts - 1) * random.uniform(0.5, 1.5)
+            message.status = 'pending'
+            message.next_attempt_at = now + timedelta(seconds=delay)
+        failed.append(message)
+
+    if sent:
+        OutboundMessage.objects.filter(pk__in=sent).update(
+            status='sent', sent_at=now, leased_until=None, last_error='',
+            body=Case(When(kind__in=SECRET_KINDS, then=Value(REDACTED)), default=F('body')),
+        )
+    if failed:
+        OutboundMessage.objects.bulk_update(failed, ['status', 'next_attempt_at', 'leased_until', 'last_error', 'body'])
+    return len(sent), len(failed)
+
+
+def run_worker(threads=4, batch_size=None, poll=1.0, once=False, stop=None, gateway=None):
+    """
+    threads ta oqim navbatni bo'shatadi: har biri batch_size tagacha xabarni bitta gateway
+    chaqiruvida yuboradi. once=True bo'lsa navbat bo'shaganda to'xtaydi. {'sent', 'failed'} qaytaradi.
+    """
+    options = config()
+    gateway = gateway or get_gateway()
+    batch_size = min(batch_size or gateway.max_batch, gateway.max_batch)
+    stop = stop or threading.Event()
+    totals = {'sent': 0, 'failed': 0}
+    lock = threading.Lock()
+
+    def loop():
+        try:
+            while not stop.is_set():
+                messages = claim(batch_size, options['LEASE'])
+                if not messages:
+                    if once:
+                        return
+                    stop.wait(poll)
+                    continue
+                sent, failed = deliver(messages, gateway, options['MAX_ATTEMPTS'], options['BACKOFF'])
+                with lock:
+                    totals['sent'] += sent
+                    totals['failed'] += failed
+        finally:
+            connection.close()
+
+    workers = [threading.Thread(target=loop, daemon=True) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        stop.set()
+        for worker in workers:
+            worker.join()
+    return totals
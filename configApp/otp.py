@@ -0,0 +1,198 @@
+import hashlib
+import hmac
+import math
+import secrets
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from django.conf import settings
+
+OK = 'ok'
+INVALID = 'invalid'
+EXPIRED = 'expired'
+LOCKED = 'locked'
+
+Issued = namedtuple('Issued', 'code retry_after')
+
+
+def _hash(phone, code):
+    # kod ochiq saqlanmaydi: store o'g'irlansa ham kodlarni o'qib bo'lmaydi
+    return hmac.new(settings.SECRET_KEY.encode(), f'{phone}:{code}'.encode(), hashlib.sha256).hexdigest()
+
+
+class OTPStore:
+    """
+    Bir martalik kodlar uchun umumiy store. Barcha amallar backend ichida atomar:
+    issue - cooldown tugamagan bo'lsa yangi kod bermaydi (set-if-absent),
+    verify - urinishlarni sanaydi, MAX_ATTEMPTS dan keyin kod bloklanadi,
+    to'g'ri kod consume=True bo'lsa o'chiriladi -> bir kod faqat bir marta o'tadi.
+    """
+
+    def __init__(self, ttl=300, cooldown=60, max_attempts=5, length=4):
+        self.ttl = ttl
+        self.cooldown = cooldown
+        self.max_attempts = max_attempts
+        self.length = length
+
+    def generate(self):
+        return str(secrets.randbelow(10 ** self.length)).zfill(self.length)
+
+    def issue(self, phone, code=None):
+        code = code or self.generate()
+        retry_after = self._issue(phone, _hash(phone, code))
+        return Issued(None, retry_after) if retry_after else Issued(code, 0)
+
+    def verify(self, phone, code, consume=True):
+        return self._verify(phone, _hash(phone, str(code)), consume)
+
+    def _issue(self, phone, code_hash):
+        raise NotImplementedError
+
+    def _verify(self, phone, code_hash, consume):
+        raise NotImplementedError
+
+
+class SQLiteOTPStore(OTPStore):
+    """
+    Alohida SQLite fayl (WAL): bitta serverdagi barcha worker processlar uchun umumiy,
+    asosiy bazaga so'rov yubormaydi. BEGIN IMMEDIATE yozuvchilarni navbatga qo'yadi.
+    """
+
+    def __init__(self, location, **options):
+        super().__init__(**options)
+        self.location = str(location)
+        self.local = threading.local()
+        self._connect()
+
+    def _connect(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.location, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS otp ('
+                'phone TEXT PRIMARY KEY, code_hash TEXT NOT NULL, expires REAL NOT NULL, '
+                'attempts INTEGER NOT NULL DEFAULT 0, sent_at REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS otp_expires ON otp (expires)')
+            self.local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def _issue(self, phone, code_hash):
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute('SELECT sent_at FROM otp WHERE phone = ?', (phone,)).fetchone()
+            if row and now - row[0] < self.cooldown:
+                return max(1, math.ceil(row[0] + self.cooldown - now))
+            conn.execute(
+                'INSERT OR REPLACE INTO otp (phone, code_hash, expires, attempts, sent_at) VALUES (?, ?, ?, 0, ?)',
+                (phone, code_hash, now + self.ttl, now),
+            )
+            # kod ham, cooldown ham tugagan qatorlar: ishlatilgan kod (expires=0) cooldown davomida qoladi
+            conn.execute('DELETE FROM otp WHERE expires < ? AND sent_at < ?', (now, now - self.cooldown))
+            return 0
+
+    def _verify(self, phone, code_hash, consume):
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute('SELECT code_hash, expires, attempts FROM otp WHERE phone = ?', (phone,)).fetchone()
+            if row is None or row[1] < now:
+                return EXPIRED
+            if row[2] >= self.max_attempts:
+                return LOCKED
+            if hmac.compare_digest(row[0], code_hash):
+                if consume:
+                    # cooldown saqlanib qolishi uchun qator o'chirilmaydi, faqat kod yaroqsiz qilinadi
+                    conn.execute('UPDATE otp SET code_hash = ?, expires = 0 WHERE phone = ?', ('', phone))
+                return OK
+            conn.execute('UPDATE otp SET attempts = attempts + 1 WHERE phone = ?', (phone,))
+            return LOCKED if row[2] + 1 >= self.max_attempts else INVALID
+
+
+REDIS_ISSUE = """
+if redis.call('SET', KEYS[2], '1', 'NX', 'PX', ARGV[3]) then
+    redis.call('DEL', KEYS[1])
+    redis.call('HSET', KEYS[1], 'h', ARGV[1], 'a', 0)
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    return 0
+end
+return redis.call('PTTL', KEYS[2])
+"""
+
+REDIS_VERIFY = """
+local stored = redis.call('HGET', KEYS[1], 'h')
+if not stored then return 'expired' end
+local attempts = tonumber(redis.call('HGET', KEYS[1], 'a'))
+if attempts >= tonumber(ARGV[2]) then return 'locked' end
+if stored == ARGV[1] then
+    if ARGV[3] == '1' then redis.call('DEL', KEYS[1]) end
+    return 'ok'
+end
+attempts = redis.call('HINCRBY', KEYS[1], 'a', 1)
+if attempts >= tonumber(ARGV[2]) then return 'locked' end
+return 'invalid'
+"""
+
+
+class RedisOTPStore(OTPStore):
+    """Redis (yoki mos keluvchi server): har bir amal bitta Lua skript -> bitta round trip, atomar"""
+
+    def __init__(self, location, **options):
+        super().__init__(**options)
+        try:
+            import redis
+        except ImportError:
+            raise ValueError("Redis OTP store uchun redis paketi o'rnatilishi kerak")
+        client = redis.Redis.from_url(location)
+        self.issue_script = client.register_script(REDIS_ISSUE)
+        self.verify_script = client.register_script(REDIS_VERIFY)
+
+    @staticmethod
+    def keys(phone):
+        # {phone} - Redis Cluster da ikkala kalit bitta slotga tushadi
+        return [f'otp:{{{phone}}}', f'otp-cooldown:{{{phone}}}']
+
+    def _issue(self, phone, code_hash):
+        pttl = self.issue_script(keys=self.keys(phone),
+                                 args=[code_hash, int(self.ttl * 1000), int(self.cooldown * 1000)])
+        return max(1, math.ceil(pttl / 1000)) if pttl else 0
+
+    def _verify(self, phone, code_hash, consume):
+        result = self.verify_script(keys=self.keys(phone)[:1],
+                                    args=[code_hash, self.max_attempts, '1' if consume else '0'])
+        return result.decode() if isinstance(result, bytes) else result
+
+
+BACKENDS = {
+    'sqlite': SQLiteOTPStore,
+    'redis': RedisOTPStore,
+}
+
+_store = None
+_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _lock:
+            if _store is None:
+                config = dict(settings.OTP_STORE)
+                backend = BACKENDS[config.pop('BACKEND')]
+                _store = backend(config.pop('LOCATION'), **{key.lower(): value for key, value in config.items()})
+    return _store
@@ -0,0 +1,74 @@
+from collections import OrderedDict
+
+from django.db import connections
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+
+
+def approximate_count(queryset):
+    """
+    COUNT(*) siz taxminiy son. Faqat filtrsiz querysetlar uchun:
+    PostgreSQL da pg_class.reltuples (ANALYZE dagi baho), boshqa bazalarda MAX(id) -
+    bu yuqori chegara, o'chirilgan qatorlar bo'lsa haqiqiy sondan katta.
+    """
+    if queryset.query.where:
+        return None
+    model = queryset.model
+    connection = connections[queryset.db]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [model._meta.db_table])
+        else:
+            cursor.execute(
+                f"SELECT MAX({connection.ops.quote_name(model._meta.pk.column)}) "
+                f"FROM {connection.ops.quote_name(model._meta.db_table)}"
+            )
+        row = cursor.fetchone()
+    return max(row[0] or 0, 0) if row else None
+
+
+class KeysetPagination(CursorPagination):
+    """-id bo'yicha cursor pagination: OFFSET va COUNT(*) ishlatilmaydi"""
+    ordering = '-id'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    total_query_param = 'total'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.approximate_total = None
+        if request.query_params.get(self.total_query_param) == 'approx':
+            self.approximate_total = approximate_count(queryset)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        response = OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+        ])
+        if self.approximate_total is not None:
+            response['count'] = self.approximate_total
+        response['results'] = data
+        return Response(response)
+
+
+class ViewSetPagination(PageNumberPagination):
+    """
+    Odatiy holda PageNumberPagination. ?cursor=... yoki ?pagination=cursor
+    berilsa KeysetPagination ga o'tadi.
+    """
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        params = request.query_params
+        if self.keyset_class.cursor_query_param in params or params.get('pagination') == 'cursor':
+            self.keyset = self.keyset_class()
+            if self.page_size:
+                self.keyset.page_size = self.page_size
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,26 @@
+import re
+
+from django.conf import settings
+
+# mamlakat kodisiz kiritilgan mahalliy raqamlar uchun (O'zbekiston: 9 xonali, +998)
+DEFAULT_COUNTRY_CODE = getattr(settings, 'PHONE_DEFAULT_COUNTRY_CODE', '998')
+LOCAL_NUMBER_LENGTH = getattr(settings, 'PHONE_LOCAL_NUMBER_LENGTH', 9)
+
+
+def normalize_phone(value):
+    """
+    Telefon raqamini E.164 ko'rinishiga keltiradi:
+    '+998 (90) 123-45-67', '998901234567', '00998901234567', '901234567' -> '+998901234567'.
+    Raqam bo'lmagan qiymat o'zgarmaydi, uni validator rad etadi.
+    """
+    if value is None:
+        return value
+    raw = str(value).strip()
+    digits = re.sub(r'\D', '', raw)
+    if not digits or re.search(r'[^\d\s+().-]', raw):
+        return raw
+    if raw.startswith('00'):
+        digits = digits[2:]
+    elif not raw.startswith('+') and len(digits) == LOCAL_NUMBER_LENGTH:
+        digits = DEFAULT_COUNTRY_CODE + digits
+    return '+' + digits
@@ -0,0 +1,94 @@
+import io
+import re
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    # orjson ixtiyoriy: bo'lmasa ORJSONRenderer/ORJSONParser stdlib json bilan ishlaydi
+    orjson = None
+
+# orjson o'zi bilmagan turlar (Decimal, lazy satr, QuerySet, ...) DRF encoderi orqali,
+# shuning uchun javob stdlib JSONRenderer nikidan farq qilmaydi
+default = JSONEncoder().default
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z if orjson else None
+# orjson i64/u64 dan tashqaridagi butun sonni float qilib o'qiydi; 19 raqamdan qisqasi sig'adi
+LONG_NUMBER = re.compile(rb'\d{19}')
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer ning orjson varianti. datetime/date/time/UUID ni orjson o'zi yozadi
+    (UTC -> 'Z', DRF encoderi bilan bir xil). indent so'ralsa (browsable API), orjson
+    o'rnatilmagan bo'lsa yoki 64 bitdan katta int kabi orjson yoza olmaydigan qiymatda
+    stdlib ga qaytadi. API dagi o'zgarish: NaN va Infinity stdlib dagidek ValueError emas,
+    null bo'ladi (ularni tekshirish uchun butun javobni aylanib chiqish orjson yutug'ini yeydi).
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # JSONRenderer kabi: javob JavaScript ichida ham xavfsiz bo'lsin
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class ORJSONParser(JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        body = stream.read()
+        if LONG_NUMBER.search(body):
+            return super().parse(io.BytesIO(body), media_type, parser_context)
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+
+
+def _msgpack():
+    try:
+        import msgpack
+    except ImportError:
+        raise ValueError("MessagePack uchun msgpack paketi o'rnatilishi kerak")
+    return msgpack
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Mobil ilova uchun: Accept: application/msgpack. Sana va Decimal JSON dagidek satr/son bo'ladi"""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return _msgpack().packb(data, default=default, use_bin_type=True)
+
+
+class MessagePackParser(BaseParser):
+    media_type = 'application/msgpack'
+    renderer_class = MessagePackRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        msgpack = _msgpack()
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, TypeError, msgpack.UnpackException) as exc:
+            raise ParseError(f'MessagePack parse error - {exc}')
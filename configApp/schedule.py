@@ -0,0 +1,162 @@
+import threading
+from bisect import bisect_left, bisect_right
+from collections import defaultdict, namedtuple
+
+from django.db.models import Q
+
+from .caching import models_version
+from .models import Group, Rooms, Table, Worker
+
+Booking = namedtuple('Booking', 'start end group table room teachers start_date end_date day')
+
+
+def minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def dates_overlap(a, b):
+    return a.start_date <= b.end_date and b.start_date <= a.end_date
+
+
+def days_overlap(a, b):
+    # kun ko'rsatilmagan jadval har kuni bo'ladi
+    return a.day is None or b.day is None or a.day == b.day
+
+
+class IntervalIndex:
+    """
+    Boshlanish vaqti bo'yicha saralangan intervallar. Eng uzun interval
+    uzunligi ma'lum bo'lgani uchun [start, end) bilan kesishadiganlar
+    starts ning (start - max_length, end) oralig'ida yotadi: O(log n + k).
+    """
+
+    def __init__(self, bookings=()):
+        self.items = sorted(bookings, key=lambda booking: booking.start)
+        self.starts = [booking.start for booking in self.items]
+        self.max_length = max((booking.end - booking.start for booking in self.items), default=0)
+
+    def __len__(self):
+        return len(self.items)
+
+    def overlapping(self, start, end):
+        lo = bisect_right(self.starts, start - self.max_length)
+        hi = bisect_left(self.starts, end)
+        for booking in self.items[lo:hi]:
+            if booking.end > start:
+                yield booking
+
+
+class ScheduleIndex:
+    """
+    Har bir (xona, kun) va (o'qituvchi, kun) uchun alohida IntervalIndex.
+    Kuni yo'q (har kungi) jadval None kaliti ostida turadi va har qanday kun bilan tekshiriladi.
+    """
+
+    def __init__(self, bookings):
+        self.bookings = list(bookings)
+        self.by_table = defaultdict(list)
+        rooms, teachers = defaultdict(lambda: defaultdict(list)), defaultdict(lambda: defaultdict(list))
+        for booking in self.bookings:
+            self.by_table[booking.table].append(booking)
+            rooms[booking.room][booking.day].append(booking)
+            for teacher in booking.teachers:
+                teachers[teacher][booking.day].append(booking)
+        self.rooms = self._build(rooms)
+        self.teachers = self._build(teachers)
+
+    @staticmethod
+    def _build(resources):
+        return {
+            resource: {day: IntervalIndex(items) for day, items in by_day.items()}
+            for resource, by_day in resources.items()
+        }
+
+    @classmethod
+    def from_db(cls, groups=None):
+        """groups berilsa faqat shu guruhlar (queryset) yuklanadi"""
+        through = Group.teacher.through.objects.all()
+        if groups is None:
+            groups = Group.objects.all()
+        else:
+            through = through.filter(group__in=groups.values('pk'))
+        teachers = defaultdict(set)
+        for group_id, worker_id in through.values_list('group_id', 'worker_id').iterator():
+            teachers[group_id].add(worker_id)
+        rows = groups.values_list(
+            'id', 'table_id', 'table__room_id', 'table__start_time', 'table__end_time', 'start_date', 'end_date',
+            'table__day_id',
+        )
+        return cls(
+            Booking(minutes(start), minutes(end), group_id, table_id, room_id,
+                    frozenset(teachers[group_id]), start_date, end_date, day_id)
+            for group_id, table_id, room_id, start, end, start_date, end_date, day_id in rows.iterator()
+        )
+
+    @staticmethod
+    def _overlapping(by_day, booking):
+        days = by_day.keys() if booking.day is None else (booking.day, None)
+        for day in days:
+            index = by_day.get(day)
+            if index is not None:
+                yield from index.overlapping(booking.start, booking.end)
+
+    def conflicts(self, booking, ignore_groups=()):
+        """Berilgan band qilish bilan to'qnashadigan guruhlar"""
+        found = []
+        checks = [('room', booking.room, self.rooms)]
+        checks += [('teacher', teacher, self.teachers) for teacher in booking.teachers]
+        for kind, resource, indexes in checks:
+            by_day = indexes.get(resource)
+            if by_day is None:
+                continue
+            for other in self._overlapping(by_day, booking):
+                if other.group == booking.group or other.group in ignore_groups:
+                    continue
+                if dates_overlap(booking, other):
+                    found.append({'type': kind, 'resource': resource, 'group': booking.group, 'conflict_with': other.group})
+        return found
+
+    def report(self):
+        """Butun jadval bo'yicha barcha to'qnashuvlar (har bir juftlik bir marta)"""
+        found = []
+        for booking in self.bookings:
+            for conflict in self.conflicts(booking):
+                if booking.group is not None and conflict['conflict_with'] > booking.group:
+                    found.append(conflict)
+        return found
+
+
+_lock = threading.Lock()
+_cached = {'version': None, 'index': None}
+
+
+def get_index():
+    """Process ichida keshlangan indeks; Group/Table o'zgarganda bir marta qayta quriladi"""
+    version = models_version([Group, Table])
+    with _lock:
+        if _cached['version'] != version:
+            _cached['index'] = ScheduleIndex.from_db()
+            _cached['version'] = version
+        return _cached['index']
+
+
+def locked_index(rooms, teachers, days=None, tables=()):
+    """
+    Tranzaksiya ichida chaqiriladi: xona va o'qituvchi qatorlarini lock qilib, bazadan faqat shu
+    resurslarning days dagi (None - har kuni) band qilishlari va tables dagi guruhlar bilan indeks
+    quradi. Bir resursni band qilayotgan parallel yozuvlar shu yerda navbatga turadi (SQLite da
+    IMMEDIATE tranzaksiya buni o'zi ta'minlaydi).
+    """
+    list(Rooms.objects.select_for_update().filter(pk__in=rooms).order_by('pk').values_list('pk', flat=True))
+    list(Worker.objects.select_for_update().filter(pk__in=teachers).order_by('pk').values_list('pk', flat=True))
+    taught = Group.teacher.through.objects.filter(worker__in=teachers).values('group')
+    related = Q(table__room__in=rooms) | Q(pk__in=taught)
+    if days is not None and None not in days:
+        # kuni yo'q jadval har kuni bo'ladi
+        related &= Q(table__day__in=days) | Q(table__day__isnull=True)
+    return ScheduleIndex.from_db(Group.objects.filter(related | Q(table__in=tables)))
+
+
+def group_booking(table, teachers, start_date, end_date, group_id=None):
+    return Booking(minutes(table.start_time), minutes(table.end_time), group_id, table.pk, table.room_id,
+                   frozenset(teacher.pk for teacher in teachers), start_date, end_date, table.day_id)
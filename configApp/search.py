@@ -0,0 +1,209 @@
+import re
+
+from django.db import connection
+
+from .models import Parents, SearchEntry, Student, User
+
+FTS_TABLE = 'configApp_searchentry_fts'
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+SQLITE_SETUP = [
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+    f"text, content='configApp_searchentry', content_rowid='id', tokenize='trigram')",
+    f"CREATE TRIGGER configApp_searchentry_ai AFTER INSERT ON configApp_searchentry BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); END",
+    f"CREATE TRIGGER configApp_searchentry_ad AFTER DELETE ON configApp_searchentry BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) VALUES ('delete', old.id, old.text); END",
+    f"CREATE TRIGGER configApp_searchentry_au AFTER UPDATE ON configApp_searchentry BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) VALUES ('delete', old.id, old.text); "
+    f"INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); END",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+SQLITE_TEARDOWN = [
+    'DROP TRIGGER IF EXISTS configApp_searchentry_ai',
+    'DROP TRIGGER IF EXISTS configApp_searchentry_ad',
+    'DROP TRIGGER IF EXISTS configApp_searchentry_au',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+POSTGRES_SETUP = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX IF NOT EXISTS configapp_searchentry_text_trgm '
+    'ON "configApp_searchentry" USING gin (text gin_trgm_ops)',
+]
+POSTGRES_TEARDOWN = ['DROP INDEX IF EXISTS configapp_searchentry_text_trgm']
+
+
+def setup_index(schema_editor):
+    vendor = schema_editor.connection.vendor
+    for sql in {'sqlite': SQLITE_SETUP, 'postgresql': POSTGRES_SETUP}.get(vendor, []):
+        schema_editor.execute(sql)
+
+
+def teardown_index(schema_editor):
+    vendor = schema_editor.connection.vendor
+    for sql in {'sqlite': SQLITE_TEARDOWN, 'postgresql': POSTGRES_TEARDOWN}.get(vendor, []):
+        schema_editor.execute(sql)
+
+
+def digits(value):
+    return re.sub(r'\D', '', value or '')
+
+
+def normalize(*parts):
+    return ' '.join(str(part).lower().strip() for part in parts if part)[:600]
+
+
+def user_kind(user):
+    if user.is_teacher:
+        return 'teacher'
+    # student bitta 'student' yozuvi bilan topiladi, ikkinchi 'user' yozuvi dublikat bo'lardi
+    return None if user.is_student else 'user'
+
+
+def user_entry(user):
+    return SearchEntry(kind=user_kind(user), object_id=user.pk, label=user.full_name or user.phone, extra=user.phone,
+                       text=normalize(user.full_name, digits(user.phone)))
+
+
+def student_entry(student):
+    phone = student.user.phone
+    return SearchEntry(kind='student', object_id=student.pk, label=student.full_name, extra=phone,
+                       text=normalize(student.full_name, student.email, digits(phone)))
+
+
+def parent_entry(parent):
+    return SearchEntry(kind='parent', object_id=parent.pk, label=parent.full_name or parent.phone_number or '',
+                       extra=parent.phone_number or '', text=normalize(parent.full_name, digits(parent.phone_number)))
+
+
+def _save(entries):
+    SearchEntry.objects.bulk_create(
+        entries, batch_size=1000,
+        update_conflicts=True, unique_fields=['kind', 'object_id'], update_fields=['label', 'extra', 'text'],
+    )
+
+
+def index_users(users):
+    users = list(users)
+    # rol o'zgargan bo'lsa eski turdagi yozuvni olib tashlaymiz
+    for kind in ('user', 'teacher'):
+        stale = [user.pk for user in users if user_kind(user) != kind]
+        if stale:
+            SearchEntry.objects.filter(kind=kind, object_id__in=stale).delete()
+    _save([user_entry(user) for user in users if user_kind(user)])
+
+
+def index_students(students):
+    _save([student_entry(student) for student in students])
+
+
+def index_parents(parents):
+    _save([parent_entry(parent) for parent in parents])
+
+
+def remove(kinds, object_id):
+    SearchEntry.objects.filter(kind__in=kinds, object_id=object_id).delete()
+
+
+def rebuild():
+    SearchEntry.objects.all().delete()
+    for queryset, indexer in (
+        (User.objects.all(), index_users),
+        (Student.objects.select_related('user'), index_students),
+        (Parents.objects.all(), index_parents),
+    ):
+        batch = []
+        for obj in queryset.iterator(chunk_size=2000):
+            batch.append(obj)
+            if len(batch) == 2000:
+                indexer(batch)
+                batch = []
+        if batch:
+            indexer(batch)
+
+
+def _query_text(query):
+    query = query.strip().lower()
+    # telefon raqam qidirilsa faqat raqamlar qoladi: "+998 90 123" -> "99890123"
+    if query and len(digits(query)) >= len(re.sub(r'[\s+()-]', '', query)):
+        return digits(query)
+    return query
+
+
+def _rows(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def _sqlite_search(query, kind, limit, fuzzy):
+    terms = query.split()
+    long_terms = [term for term in terms if len(term) >= 3]
+    short_terms = [term for term in terms if len(term) < 3]
+    kind_sql, kind_params = ('AND e.kind = %s', [kind]) if kind else ('', [])
+    columns = 'e.id, e.kind, e.object_id, e.label, e.extra'
+
+    if not long_terms:
+        # trigram indeks 3 belgidan qisqa so'rovni qo'llamaydi: text ustidagi B-tree bilan prefiks
+        return _rows(
+            f"SELECT {columns}, 0 FROM configApp_searchentry e "
+            f"WHERE e.text >= %s AND e.text < %s {kind_sql} ORDER BY e.text LIMIT %s",
+            [query, query + '\U0010ffff', *kind_params, limit],
+        )
+
+    match = ' '.join('"%s"' % term.replace('"', '""') for term in long_terms)
+    like_sql = ''.join(' AND e.text LIKE %s' for _ in short_terms)
+    like_params = ['%' + term.replace('%', '').replace('_', '') + '%' for term in short_terms]
+    rows = _rows(
+        f"SELECT {columns}, bm25({FTS_TABLE}) AS score FROM {FTS_TABLE} "
+        f"JOIN configApp_searchentry e ON e.id = {FTS_TABLE}.rowid "
+        f"WHERE {FTS_TABLE} MATCH %s{like_sql} {kind_sql} "
+        f"ORDER BY (e.text LIKE %s) DESC, score LIMIT %s",
+        [match, *like_params, *kind_params, query.replace('%', '') + '%', limit],
+    )
+    if fuzzy and len(rows) < limit and len(query) >= 4 and not query.isdigit():
+        # xatoli yozuvlar uchun: so'rov trigrammalaridan istalgani mos kelsa, bm25 bo'yicha tartiblanadi
+        grams = {query[i:i + 3] for i in range(len(query) - 2) if ' ' not in query[i:i + 3]}
+        found = [row[0] for row in rows] or [0]
+        rows += _rows(
+            f"SELECT {columns}, bm25({FTS_TABLE}) AS score FROM {FTS_TABLE} "
+            f"JOIN configApp_searchentry e ON e.id = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH %s AND e.id NOT IN ({', '.join(['%s'] * len(found))}) {kind_sql} "
+            f"ORDER BY score LIMIT %s",
+            [' OR '.join('"%s"' % gram.replace('"', '""') for gram in sorted(grams)), *found, *kind_params,
+             limit - len(rows)],
+        )
+    return rows
+
+
+def _postgres_search(query, kind, limit, fuzzy):
+    kind_sql, kind_params = ('AND kind = %s', [kind]) if kind else ('', [])
+    like = '%' + query.replace('%', '').replace('_', '') + '%'
+    fuzzy = fuzzy and not query.isdigit()
+    condition = '(text %% %s OR text LIKE %s)' if fuzzy else '(text LIKE %s)'
+    condition_params = [query, like] if fuzzy else [like]
+    return _rows(
+        f'SELECT id, kind, object_id, label, extra, similarity(text, %s) AS score FROM "configApp_searchentry" '
+        f'WHERE {condition} {kind_sql} ORDER BY (text LIKE %s) DESC, score DESC LIMIT %s',
+        [query, *condition_params, *kind_params, query.replace('%', '') + '%', limit],
+    )
+
+
+def _fallback_search(query, kind, limit, fuzzy):
+    queryset = SearchEntry.objects.filter(text__contains=query)
+    if kind:
+        queryset = queryset.filter(kind=kind)
+    return list(queryset.order_by('text').values_list('id', 'kind', 'object_id', 'label', 'extra')[:limit])
+
+
+def search(query, kind=None, limit=DEFAULT_LIMIT, fuzzy=True):
+    query = _query_text(query)
+    if not query:
+        return []
+    limit = max(1, min(limit, MAX_LIMIT))
+    backend = {'sqlite': _sqlite_search, 'postgresql': _postgres_search}.get(connection.vendor, _fallback_search)
+    return [
+        {'kind': row[1], 'id': row[2], 'label': row[3], 'extra': row[4]}
+        for row in backend(query, kind, limit, fuzzy)
+    ]
@@ -1,47 +1,266 @@
+from collections import Counter
 
 from rest_framework import serializers
-from django.contrib.auth.hashers import make_password
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Prefetch
 from .models import *
-
-
-class ParentsSerializer(serializers.ModelSerializer):
+from .caching import bump_model_version
+from . import hashing, notifications, schedule, search, statistics
+from .phones import normalize_phone
+
+
+def parse_paths(paths):
+    """['id', 'students.full_name', 'students.user'] -> {'id': [], 'students': ['full_name', 'user']}"""
+    parsed = {}
+    for path in paths:
+        name, _, rest = path.strip().partition('.')
+        if name:
+            parsed.setdefault(name, [])
+            if rest:
+                parsed[name].append(rest)
+    return parsed
+
+
+def sparse_fields(request):
+    """GET so'rovidagi ?fields=a,b.c va ?expand=x,y.z -> serializer kwarglari; yozuv so'rovlarida bo'sh"""
+    if request is None or request.method not in ('GET', 'HEAD'):
+        return {}
+    return {name: request.GET[name].split(',') for name in ('fields', 'expand') if request.GET.get(name)}
+
+
+def _nested(field):
+    return field.child if isinstance(field, serializers.ListSerializer) else field
+
+
+class SparseFieldsMixin:
+    """
+    fields=[...] - faqat shu maydonlar (ichkilari nuqta bilan: 'students.full_name'),
+    expand=[...] - Meta.expandable_fields dagi id maydon o'rniga ichki obyekt.
+    Kesilgan daraxt bo'yicha eager_loading_plan va load_only_plan tuziladi: SQL ham kichrayadi.
+    Noma'lum nomlar konstruktordayoq ValidationError beradi, ro'yxat bo'sh bo'lsa ham.
+    """
+    # expandable_fields dagi nomlar keyin e'lon qilingan klasslarga ham ishora qiladi
+    registry = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        SparseFieldsMixin.registry[cls.__name__] = cls
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.requested_fields = parse_paths(fields) if fields else None
+        self.requested_expand = parse_paths(expand) if expand else {}
+        if fields or expand:
+            self.fields  # noma'lum nomlar shu yerda tekshiriladi
+
+    @classmethod
+    def expandable_serializer(cls, name):
+        serializer_class, options = cls.Meta.expandable_fields[name]
+        try:
+            return SparseFieldsMixin.registry[serializer_class], options
+        except KeyError:
+            raise ImproperlyConfigured(f"{cls.__name__}.Meta.expandable_fields: {serializer_class} topilmadi")
+
+    def get_fields(self):
+        fields = super().get_fields()
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+        for name in self.requested_expand:
+            if name in expandable:
+                serializer_class, options = self.expandable_serializer(name)
+                fields[name] = serializer_class(read_only=True, **options)
+            elif not isinstance(_nested(fields.get(name)), SparseFieldsMixin):
+                raise serializers.ValidationError({'expand': [f"kengaytirib bo'lmaydi: {name}"]})
+
+        if self.requested_fields is not None:
+            unknown = set(self.requested_fields) - set(fields)
+            if unknown:
+                raise serializers.ValidationError({'fields': [f"noma'lum maydon: {', '.join(sorted(unknown))}"]})
+            fields = {name: field for name, field in fields.items() if name in self.requested_fields}
+
+        for name, field in fields.items():
+            nested = _nested(field)
+            if isinstance(nested, SparseFieldsMixin):
+                if self.requested_fields and self.requested_fields.get(name):
+                    nested.requested_fields = parse_paths(self.requested_fields[name])
+                if self.requested_expand.get(name):
+                    nested.requested_expand = parse_paths(self.requested_expand[name])
+                if nested.requested_fields is not None or nested.requested_expand:
+                    nested.fields
+        return fields
+
+
+def eager_loading_plan(serializer, prefix=''):
+    """
+    Serializer daraxtidan select_related / prefetch_related rejasini tuzadi.
+    FK ichki serializerlar -> select_related, M2M va many=True -> prefetch.
+    """
+    select, prefetch = [], []
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*' or '.' in field.source:
+            continue
+        lookup = prefix + field.source
+        if isinstance(field, serializers.ManyRelatedField):
+            relation = field.child_relation
+            if isinstance(relation, serializers.PrimaryKeyRelatedField) and relation.queryset is not None:
+                # faqat id lar kerak -> butun qatorni o'qimaymiz
+                prefetch.append(Prefetch(lookup, queryset=relation.queryset.model._default_manager.only('pk')))
+            else:
+                prefetch.append(lookup)
+        elif isinstance(field, serializers.ListSerializer):
+            child = field.child
+            # teskari FK da bog'lovchi ustun kerak: only() faqat M2M uchun
+            reverse = serializer.Meta.model._meta.get_field(field.source).one_to_many
+            queryset = eager_load(child.Meta.model._default_manager.all(), child, only=not reverse)
+            prefetch.append(Prefetch(lookup, queryset=queryset))
+        elif isinstance(field, serializers.ModelSerializer):
+            select.append(lookup)
+            nested_select, nested_prefetch = eager_loading_plan(field, lookup + '__')
+            select += nested_select
+            prefetch += nested_prefetch
+    return select, prefetch
+
+
+def load_only_plan(serializer, prefix=''):
+    """
+    only() uchun ustunlar: serializer o'qiydigan model maydonlari va select_related qilingan
+    ichki serializerlar ustunlari. Method/property maydon bo'lsa aniqlab bo'lmaydi -> None.
+    """
+    model = serializer.Meta.model
+    columns = [prefix + model._meta.pk.name]
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if field.source == '*' or '.' in field.source:
+            return None
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            return None
+        if model_field.many_to_many or model_field.one_to_many:
+            continue
+        if not model_field.concrete:
+            return None
+        columns.append(prefix + field.source)
+        if isinstance(field, serializers.ModelSerializer):
+            nested = load_only_plan(field, prefix + field.source + '__')
+            if nested is None:
+                return None
+            columns += nested
+    return columns
+
+
+def eager_load(queryset, serializer, only=True):
+    select, prefetch = eager_loading_plan(serializer)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    if only and getattr(serializer, 'requested_fields', None) is not None:
+        # ?fields= berilganda qolgan ustunlar SELECT ga kirmaydi
+        columns = load_only_plan(serializer)
+        if columns:
+            queryset = queryset.only(*columns)
+    return queryset
+
+
+class EagerLoadingMixin(SparseFieldsMixin):
+    @classmethod
+    def setup_eager_loading(cls, queryset, **kwargs):
+        return eager_load(queryset, cls(**kwargs))
+
+
+class PhoneNumberField(serializers.CharField):
+    """Kiritilgan raqamni validatorlardan oldin E.164 ga keltiradi"""
+
+    def to_internal_value(self, data):
+        return normalize_phone(super().to_internal_value(data))
+
+
+class PhoneSerializerMixin:
+    serializer_field_mapping = {**serializers.ModelSerializer.serializer_field_mapping, PhoneField: PhoneNumberField}
+
+
+class ParentsSerializer(EagerLoadingMixin, PhoneSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Parents
         fields = "__all__"
+        expandable_fields = {'student': ('StudentSerializer', {})}
         
-class StudentSerializer(serializers.ModelSerializer):
+class StudentSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     class Meta:
         model = Student
         fields = "__all__"
+        expandable_fields = {
+            'user': ('UserAllSerializer', {}),
+            'group': ('GroupSerializer', {'many': True}),
+            'course': ('CourseSerializer', {'many': True}),
+        }
 
-class UserAllSerializer(serializers.ModelSerializer):
+class UserAllSerializer(EagerLoadingMixin, PhoneSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = "__all__"
+        # hash javobga chiqmaydi; kelgan parol bir marta hash qilinadi
+        extra_kwargs = {'password': {'write_only': True}}
+
+    def create(self, validated_data):
+        validated_data['password'] = hashing.hash_password(validated_data['password'])
+        return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        if 'password' in validated_data:
+            validated_data['password'] = hashing.hash_password(validated_data['password'])
+        return super().update(instance, validated_data)
 
-class UserSerializer(serializers.ModelSerializer):
+class UserListSerializer(serializers.ListSerializer):
+    """Ommaviy ro'yxatdan o'tkazish: parollar bitta hash_passwords chaqiruvida, qatorlar bulk_create bilan"""
+
+    def validate(self, attrs):
+        phones = Counter(item['phone'] for item in attrs)
+        repeated = sorted(phone for phone, count in phones.items() if count > 1)
+        if repeated:
+            raise serializers.ValidationError(f"takrorlangan telefon raqamlar: {', '.join(repeated)}")
+        return attrs
+
+    def create(self, validated_data):
+        passwords = hashing.hash_passwords(item['password'] for item in validated_data)
+        with transaction.atomic():
+            users = User.objects.bulk_create([
+                User(**dict(item, password=password)) for item, password in zip(validated_data, passwords)
+            ])
+            # bulk_create signal yubormaydi
+            search.index_users(users)
+            bump_model_version(User)
+        return users
+
+class UserSerializer(EagerLoadingMixin, PhoneSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('id', 'phone','password', "full_name", 'is_active', 'is_staff', "is_teacher",'is_admin', 'is_student')
-        
+        list_serializer_class = UserListSerializer
+        extra_kwargs = {'password': {'write_only': True}}
+
     def create(self, validated_data):
-        validated_data['password'] = make_password(validated_data['password'])
+        validated_data['password'] = hashing.hash_password(validated_data['password'])
         return super().create(validated_data)
     
-class CourseSerializer(serializers.ModelSerializer):
+class CourseSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     class Meta:
         model = Course
         fields = ['id', 'name', 'title', 'descriptions']
 
-class EnrollmentSerializer(serializers.ModelSerializer):
+class EnrollmentSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     class Meta:
         model = Enrollment
         fields = ['id', 'student', 'course', 'status', 'date_joined']
+        expandable_fields = {'student': ('UserAllSerializer', {}), 'course': ('CourseSerializer', {})}
 
-class TeacherSerializer(serializers.ModelSerializer):
+class TeacherSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     class Meta:
         model = Teacher
         fields = ['id', 'user', 'course', 'descriptions']
+        expandable_fields = {'user': ('UserAllSerializer', {}), 'course': ('CourseSerializer', {'many': True})}
 
 
 class ChangePasswordSerializer(serializers.ModelSerializer):
@@ -58,86 +277,269 @@ class ChangePasswordSerializer(serializers.ModelSerializer):
         if not validated_data['old_password']:
             raise serializers.ValidationError({'old_password': 'not found'})
 
-        if not instance.check_password(validated_data['old_password']):
-            raise serializers.ValidationError({'old_password': 'wrong password'})
-
         if validated_data['new_password'] != validated_data['re_new_password']:
             raise serializers.ValidationError({'passwords': 'passwords do not match'})
 
-        if validated_data['new_password'] == validated_data['re_new_password'] and instance.check_password(
-                validated_data['old_password']):
-            instance.set_password(validated_data['new_password'])
-            instance.save()
-            return instance
+        # eski parol bir marta tekshiriladi, yangisi bir marta hash qilinadi
+        if not instance.check_password(validated_data['old_password']):
+            raise serializers.ValidationError({'old_password': 'wrong password'})
+
+        instance.set_password(validated_data['new_password'])
+        instance.save()
+        return instance
 
     class Meta:
         model = User
         fields = ['old_password', 'new_password', 're_new_password']
 
-class HomeWorkSerializer(serializers.ModelSerializer):
+class HomeWorkSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     class Meta:
         model = HomeWork
         fields = ['id', 'groupHomeWork', 'price', 'student','link', 'is_active', 'descriptions']
+        expandable_fields = {'groupHomeWork': ('GroupHomeWorkSerializer', {}), 'student': ('StudentSerializer', {})}
 
-class DepartmentsSerializer(serializers.ModelSerializer):
+class DepartmentsSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     class Meta:
         model = Departments
         fields = ['id', 'title', 'is_active', 'descriptions']
 
-class WorkerSerializer(serializers.ModelSerializer):
+class WorkerSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     class Meta:
         model = Worker
         fields = ["id", 'user', 'departments', 'course', 'descriptions']
+        expandable_fields = {
+            'user': ('UserAllSerializer', {}),
+            'departments': ('DepartmentsSerializer', {'many': True}),
+            'course': ('CourseSerializer', {'many': True}),
+        }
 
-class TopicsSerializer(serializers.ModelSerializer):
+class TopicsSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     class Meta:
         model = Topics
         fields = ['id', 'title', 'course', 'descriptions']
-        
+        expandable_fields = {'course': ('CourseSerializer', {})}
+
 class SMSSerializer(serializers.Serializer):
-    phone_number = serializers.CharField()
+    phone_number = PhoneNumberField()
 
 class VerifySMSSerializer(serializers.Serializer):
-    phone_number = serializers.CharField()
+    phone_number = PhoneNumberField()
     verification_code = serializers.CharField()
 
-class RoomSerializer(serializers.ModelSerializer):
+class RoomSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     class Meta:
         model = Rooms
-        fields = ['id', 'title', 'descriptions']
+        fields = ['id', 'title', 'capacity', 'descriptions']
 
-class GroupSerializer(serializers.ModelSerializer):
+class GroupSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     students = StudentSerializer(many=True)
 
     class Meta:
         model = Group
         fields = "__all__"
-
-class DaySerializer(serializers.ModelSerializer):
+        expandable_fields = {
+            'course': ('CourseSerializer', {}),
+            'teacher': ('WorkerSerializer', {'many': True}),
+            'table': ('TableSerializer', {}),
+        }
+
+    def validate(self, attrs):
+        instance = self.instance
+        table = attrs.get('table', instance.table if instance else None)
+        start_date = attrs.get('start_date', instance.start_date if instance else None)
+        end_date = attrs.get('end_date', instance.end_date if instance else None)
+        if 'teacher' in attrs:
+            teachers = attrs['teacher']
+        else:
+            teachers = list(instance.teacher.all()) if instance else []
+        self._booking = None
+        if table is None or start_date is None or end_date is None:
+            return attrs
+        if start_date > end_date:
+            raise serializers.ValidationError({'end_date': 'end_date start_date dan oldin'})
+
+        self._booking = schedule.group_booking(table, teachers, start_date, end_date, instance.pk if instance else None)
+        conflicts = schedule.get_index().conflicts(self._booking)
+        if conflicts:
+            raise serializers.ValidationError({'schedule': conflicts})
+        return attrs
+
+    def save(self, **kwargs):
+        booking = getattr(self, '_booking', None)
+        if booking is None:
+            return super().save(**kwargs)
+        # validate keshlangan indeksni ko'rgan: yozishdan oldin lock ostida bazadan qayta tekshiriladi
+        with transaction.atomic():
+            index = schedule.locked_index({booking.room}, booking.teachers, {booking.day})
+            conflicts = index.conflicts(booking)
+            if conflicts:
+                raise serializers.ValidationError({'schedule': conflicts})
+            return super().save(**kwargs)
+
+class DaySerializer(EagerLoadingMixin, serializers.ModelSerializer):
     class Meta:
         model = Day
         fields = ['id', 'title', 'descriptions']
 
-class TableTypeSerializer(serializers.ModelSerializer):
+class TableTypeSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     class Meta:
         model = TableType
         fields = ['id', 'title', 'descriptions']
 
-class TableSerializer(serializers.ModelSerializer):
+class TableSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     class Meta:
         model = Table
-        fields = ['id', 'start_time', 'end_time', 'room','type', 'descriptions']
-
-class GroupHomeWorkSerializer(serializers.ModelSerializer):
+        fields = ['id', 'start_time', 'end_time', 'room','type', 'day', 'descriptions']
+        expandable_fields = {'room': ('RoomSerializer', {}), 'type': ('TableTypeSerializer', {}), 'day': ('DaySerializer', {})}
+
+    def validate(self, attrs):
+        instance = self.instance
+        start_time = attrs.get('start_time', instance.start_time if instance else None)
+        end_time = attrs.get('end_time', instance.end_time if instance else None)
+        if start_time and end_time and start_time >= end_time:
+            raise serializers.ValidationError({'end_time': 'end_time start_time dan keyin bo\'lishi kerak'})
+        if instance is None:
+            return attrs
+
+        self._schedule_attrs = attrs
+        conflicts = self.schedule_conflicts(schedule.get_index())
+        if conflicts:
+            raise serializers.ValidationError({'schedule': conflicts})
+        return attrs
+
+    def schedule_conflicts(self, index):
+        """Jadval o'zgarsa undagi har bir guruh yangi vaqt/xonada tekshiriladi"""
+        instance, attrs = self.instance, self._schedule_attrs
+        room = attrs.get('room', instance.room)
+        day = attrs.get('day', instance.day)
+        bookings = index.by_table.get(instance.pk, [])
+        same_table = {booking.group for booking in bookings}
+        conflicts = []
+        for booking in bookings:
+            moved = booking._replace(
+                start=schedule.minutes(attrs['start_time']) if 'start_time' in attrs else booking.start,
+                end=schedule.minutes(attrs['end_time']) if 'end_time' in attrs else booking.end,
+                room=room.pk,
+                day=day.pk if day else None,
+            )
+            conflicts += index.conflicts(moved, ignore_groups=same_table)
+        return conflicts
+
+    def save(self, **kwargs):
+        if self.instance is None:
+            return super().save(**kwargs)
+        with transaction.atomic():
+            room = self._schedule_attrs.get('room', self.instance.room)
+            day = self._schedule_attrs.get('day', self.instance.day)
+            teachers = Group.teacher.through.objects.filter(group__table=self.instance).values_list('worker_id', flat=True)
+            index = schedule.locked_index({room.pk}, set(teachers), {day.pk if day else None}, tables=[self.instance.pk])
+            conflicts = self.schedule_conflicts(index)
+            if conflicts:
+                raise serializers.ValidationError({'schedule': conflicts})
+            return super().save(**kwargs)
+
+class GroupHomeWorkSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     class Meta:
         model = GroupHomeWork
         fields = ['id', 'group', 'topic','is_active', 'descriptions']
+        expandable_fields = {'group': ('GroupSerializer', {}), 'topic': ('TopicsSerializer', {})}
 
-class AttendanceLevelSerializer(serializers.ModelSerializer):
+class AttendanceLevelSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     class Meta:
         model = AttendanceLevel
         fields = ['id', 'title', 'descriptions']
 
+class AttendanceSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Attendance
+        fields = ['id', 'student', 'group', 'level', 'date', 'created', 'updated']
+        expandable_fields = {
+            'student': ('StudentSerializer', {}),
+            'group': ('GroupSerializer', {}),
+            'level': ('AttendanceLevelSerializer', {}),
+        }
+
+class AttendanceMarkSerializer(serializers.Serializer):
+    student = serializers.IntegerField()
+    level = serializers.IntegerField()
+
+class AttendanceRollCallSerializer(serializers.Serializer):
+    group = serializers.IntegerField()
+    date = serializers.DateField()
+    items = AttendanceMarkSerializer(many=True, allow_empty=False)
+
+    def validate_items(self, items):
+        students = [item['student'] for item in items]
+        if len(students) != len(set(students)):
+            raise serializers.ValidationError('student takrorlangan')
+        return items
+
+    def validate(self, attrs):
+        # a'zolik va levelni bittadan so'rov bilan tekshiramiz
+        group_id = attrs['group']
+        if not Group.objects.filter(pk=group_id).exists():
+            raise serializers.ValidationError({'group': 'Group not found'})
+
+        student_ids = {item['student'] for item in attrs['items']}
+        members = set(
+            Group.students.through.objects
+            .filter(group_id=group_id, student_id__in=student_ids)
+            .values_list('student_id', flat=True)
+        )
+        missing = sorted(student_ids - members)
+        if missing:
+            raise serializers.ValidationError({'items': f'guruh a\'zosi emas: {missing}'})
+
+        level_ids = {item['level'] for item in attrs['items']}
+        found = set(AttendanceLevel.objects.filter(pk__in=level_ids).values_list('pk', flat=True))
+        if level_ids - found:
+            raise serializers.ValidationError({'items': f'level topilmadi: {sorted(level_ids - found)}'})
+        return attrs
+
+    def save(self):
+        group_id = self.validated_data['group']
+        date = self.validated_data['date']
+        rows = [
+            Attendance(group_id=group_id, date=date, student_id=item['student'], level_id=item['level'])
+            for item in self.validated_data['items']
+        ]
+        with transaction.atomic():
+            # qayta yuborilganda faqat leveli o'zgargan qatorlar uchun xabar ketadi
+            previous = dict(
+                Attendance.objects.select_for_update()
+                .filter(group_id=group_id, date=date, student_id__in=[row.student_id for row in rows])
+                .values_list('student_id', 'level_id')
+            )
+            Attendance.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=['student', 'group', 'date'],
+                update_fields=['level', 'updated'],
+            )
+            bump_model_version(Attendance)
+            statistics.refresh_attendance_month(group_id, date)
+            notifications.notify_absences(date, [
+                item for item in self.validated_data['items'] if previous.get(item['student']) != item['level']
+            ])
+        return rows
+
+class TimetableSolveSerializer(serializers.Serializer):
+    slots = serializers.ListField(
+        child=serializers.ListField(child=serializers.TimeField(), min_length=2, max_length=2), required=False,
+    )
+    days = serializers.ListField(child=serializers.IntegerField(), required=False)
+    groups = serializers.ListField(child=serializers.IntegerField(), required=False)
+    availability = serializers.DictField(child=serializers.ListField(child=serializers.IntegerField()), required=False)
+    table_type = serializers.IntegerField(required=False)
+    time_budget = serializers.FloatField(default=10, min_value=0.1, max_value=120)
+    apply = serializers.BooleanField(default=False)
+
+    def validate_slots(self, slots):
+        for start, end in slots:
+            if start >= end:
+                raise serializers.ValidationError('slot boshlanishi tugashidan oldin bo\'lishi kerak')
+        return [(start.isoformat(), end.isoformat()) for start, end in slots]
+
 class DepartamentAddWorker(serializers.Serializer):
     worker_id = serializers.IntegerField()
 
@@ -0,0 +1,141 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import search, statistics
+from .caching import bump_model_version
+from .authentication import revoke_user_tokens
+from .models import Attendance, Enrollment, Parents, Student, User
+
+TOKEN_FIELDS = ('password', 'is_active', 'is_staff', 'is_admin', 'is_student', 'is_teacher')
+
+
+def _stat_key(enrollment):
+    return enrollment.date_joined, enrollment.course_id, enrollment.status
+
+
+@receiver(pre_save, sender=Enrollment)
+def remember_enrollment_state(sender, instance, **kwargs):
+    if not instance.pk:
+        instance._stat_key_before = None
+    elif instance._state.adding or not hasattr(instance, '_stat_key_before'):
+        # Enrollment(pk=...) yoki defer qilingan ustunlar: from_db eski qiymatni bermagan
+        old = Enrollment.objects.filter(pk=instance.pk).values_list('date_joined', 'course_id', 'status').first()
+        instance._stat_key_before = old
+
+
+@receiver(post_save, sender=Enrollment)
+def update_enrollment_stats_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    before = getattr(instance, '_stat_key_before', None)
+    after = _stat_key(instance)
+    instance._stat_key_before = after
+    if before == after:
+        return
+    if before:
+        statistics.bump(*before, -1)
+    statistics.bump(*after, 1)
+
+
+@receiver(post_delete, sender=Enrollment)
+def update_enrollment_stats_on_delete(sender, instance, **kwargs):
+    statistics.bump(*_stat_key(instance), -1)
+
+
+@receiver(pre_save, sender=User)
+def remember_user_token_state(sender, instance, **kwargs):
+    instance._token_state_before = None
+    if instance.pk:
+        instance._token_state_before = User.objects.filter(pk=instance.pk).values_list(*TOKEN_FIELDS).first()
+
+
+@receiver(post_save, sender=User)
+def revoke_tokens_on_role_change(sender, instance, created=False, raw=False, **kwargs):
+    # rol, parol yoki aktivlik o'zgarsa eski tokenlardagi claimlar endi noto'g'ri
+    before = getattr(instance, '_token_state_before', None)
+    if created or raw or before is None:
+        return
+    if before != tuple(getattr(instance, field) for field in TOKEN_FIELDS):
+        revoke_user_tokens(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def revoke_tokens_on_delete(sender, instance, **kwargs):
+    revoke_user_tokens(instance.pk)
+
+
+def _is_local(model):
+    return model._meta.app_label == 'configApp'
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def bump_version_on_write(sender, raw=False, **kwargs):
+    if _is_local(sender) and not raw:
+        bump_model_version(sender)
+
+
+@receiver(m2m_changed)
+def bump_version_on_m2m_change(sender, instance, action, model, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    for changed in (type(instance), model):
+        if _is_local(changed):
+            bump_model_version(changed)
+
+
+@receiver(pre_save, sender=Attendance)
+def remember_attendance_slice(sender, instance, **kwargs):
+    instance._slice_before = None
+    if instance.pk:
+        instance._slice_before = Attendance.objects.filter(pk=instance.pk).values_list('group_id', 'date').first()
+
+
+@receiver(post_save, sender=Attendance)
+def refresh_attendance_stats_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    before = getattr(instance, '_slice_before', None)
+    if before and before != (instance.group_id, instance.date):
+        statistics.refresh_attendance_month(*before)
+    statistics.refresh_attendance_month(instance.group_id, instance.date)
+
+
+@receiver(post_delete, sender=Attendance)
+def refresh_attendance_stats_on_delete(sender, instance, **kwargs):
+    statistics.refresh_attendance_month(instance.group_id, instance.date)
+
+
+@receiver(post_save, sender=User)
+def index_user(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_users([instance])
+        # student yozuvi telefonni User dan oladi
+        search.index_students(Student.objects.filter(user=instance).select_related('user'))
+
+
+@receiver(post_save, sender=Student)
+def index_student(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_students([instance])
+
+
+@receiver(post_save, sender=Parents)
+def index_parent(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_parents([instance])
+
+
+@receiver(post_delete, sender=User)
+def unindex_user(sender, instance, **kwargs):
+    search.remove(['user', 'teacher'], instance.pk)
+
+
+@receiver(post_delete, sender=Student)
+def unindex_student(sender, instance, **kwargs):
+    search.remove(['student'], instance.pk)
+
+
+@receiver(post_delete, sender=Parents)
+def unindex_parent(sender, instance, **kwargs):
+    search.remove(['parent'], instance.pk)
@@ -0,0 +1,180 @@
+import asyncio
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.db.models import F
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.exceptions import NotAcceptable
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .caching import models_version
+from .models import Course, Group, Rooms, Student, Table, User, Worker
+
+SNAPSHOT_KEY = 'snapshot:{}:{}'
+
+# async viewlar uchun alohida threadlar: har biri o'z DB ulanishini ushlaydi, loop ning
+# standart executori (CPU+4 thread) parallel so'rovlarda navbat hosil qiladi
+executor = ThreadPoolExecutor(getattr(settings, 'ASYNC_DB_THREADS', 16), thread_name_prefix='snapshot')
+
+
+class Section:
+    """Forma uchun ixcham id/label proyeksiyasi, o'z modellari o'zgargandagina qayta quriladi"""
+
+    def __init__(self, name, models, build):
+        self.name = name
+        self.models = models
+        self.build = build
+
+    def version(self):
+        return models_version(self.models)
+
+    def key(self, version):
+        return SNAPSHOT_KEY.format(self.name, version)
+
+    def get(self, version=None):
+        key = self.key(version or self.version())
+        data = cache.get(key)
+        if data is None:
+            data = self.build()
+            cache.set(key, data, timeout=None)
+        return data
+
+    def rebuild(self, version):
+        data = self.build()
+        cache.set(self.key(version), data, timeout=None)
+        return data
+
+
+def _teachers():
+    rows = Worker.objects.filter(user__is_teacher=True).order_by('-id').values('id', 'user__full_name', 'user__phone')
+    return [{'id': row['id'], 'label': row['user__full_name'] or row['user__phone']} for row in rows]
+
+
+def _students():
+    rows = Student.objects.filter(user__is_student=True).order_by('-id').values('id', 'full_name', 'user__phone')
+    return [{'id': row['id'], 'label': row['full_name'], 'phone': row['user__phone']} for row in rows]
+
+
+def _tables():
+    rows = Table.objects.order_by('-id').values('id', 'start_time', 'end_time', room_title=F('room__title'))
+    return [
+        {
+            'id': row['id'],
+            'label': f"{row['start_time']:%H:%M}-{row['end_time']:%H:%M} {row['room_title']}",
+            'start_time': row['start_time'],
+            'end_time': row['end_time'],
+        }
+        for row in rows
+    ]
+
+
+def _courses():
+    return list(Course.objects.order_by('-id').values('id', 'name', label=F('title')))
+
+
+def _groups():
+    return list(Group.objects.order_by('-id').values('id', 'name', 'course_id', label=F('title')))
+
+
+SECTIONS = {
+    section.name: section for section in [
+        Section('teachers', [Worker, User], _teachers),
+        Section('students', [Student, User], _students),
+        Section('tables', [Table, Rooms], _tables),
+        Section('courses', [Course], _courses),
+        Section('groups', [Group], _groups),
+    ]
+}
+
+
+def _etag(versions):
+    return '"%s"' % hashlib.md5('|'.join(versions).encode()).hexdigest()
+
+
+def bootstrap_response(request, names):
+    """
+    Bir nechta sectionni bitta javobda beradi. ETag barcha versiyalardan
+    olinadi, shuning uchun 304 javobi uchun bitta cache.get_many yetarli.
+    """
+    sections = [SECTIONS[name] for name in names]
+    versions = [section.version() for section in sections]
+    etag = _etag(versions)
+
+    if etag in request.headers.get('If-None-Match', ''):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        data = {section.name: section.get(version) for section, version in zip(sections, versions)}
+        response = Response(data=data)
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def in_executor(func):
+    """
+    func ni executor threadida bajaradigan coroutine funksiya. Har bir ish so'rov kabi o'raladi:
+    oldidan va keyin close_old_connections, shuning uchun CONN_MAX_AGE/pool qoidalari shu
+    threadlarning ulanishlariga ham qo'llanadi va ulanishlar eskirib yoki osilib qolmaydi.
+    """
+    def run(*args):
+        close_old_connections()
+        try:
+            return func(*args)
+        finally:
+            close_old_connections()
+    return sync_to_async(run, thread_sensitive=False, executor=executor)
+
+
+def negotiate(request):
+    """DRF viewlari kabi Accept/?format= bo'yicha DEFAULT_RENDERER_CLASSES dan renderer tanlaydi"""
+    # browsable API ga DRF view kerak
+    renderers = [renderer() for renderer in api_settings.DEFAULT_RENDERER_CLASSES if renderer.format != 'api']
+    return DefaultContentNegotiation().select_renderer(Request(request), renderers)
+
+
+def render(renderer, accepted_media_type, data, status_code=status.HTTP_200_OK):
+    content_type = f'{renderer.media_type}; charset={renderer.charset}' if renderer.charset else renderer.media_type
+    return HttpResponse(renderer.render(data, accepted_media_type, {}), content_type=content_type, status=status_code)
+
+
+def _lookup(sections):
+    versions = [section.version() for section in sections]
+    found = cache.get_many([section.key(version) for section, version in zip(sections, versions)])
+    return versions, found
+
+
+async def abootstrap_response(request, names):
+    """
+    bootstrap_response ning ASGI varianti, renderer DRF dagidek Accept bo'yicha tanlanadi.
+    Keshda yo'q sectionlar bir vaqtda quriladi: Django async ORM so'rovlari bitta umumiy threadda navbat bilan bajariladi, shuning uchun
+    har bir section thread_sensitive=False bilan o'z threadi va DB ulanishida quriladi.
+    """
+    try:
+        renderer, accepted_media_type = negotiate(request)
+    except NotAcceptable as e:
+        renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+        return render(renderer, renderer.media_type, {'detail': e.detail}, status.HTTP_406_NOT_ACCEPTABLE)
+    sections = [SECTIONS[name] for name in names]
+    versions, found = await in_executor(_lookup)(sections)
+    etag = _etag(versions)
+
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        keys = [section.key(version) for section, version in zip(sections, versions)]
+        missing = [(section, version) for section, version, key in zip(sections, versions, keys) if key not in found]
+        built = await asyncio.gather(*(in_executor(section.rebuild)(version) for section, version in missing))
+        found.update((section.key(version), data) for (section, version), data in zip(missing, built))
+        data = {section.name: found[key] for section, key in zip(sections, keys)}
+        response = render(renderer, accepted_media_type, data)
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
@@ -0,0 +1,214 @@
+import datetime
+from collections import Counter, defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+
+from .models import Attendance, AttendanceLevel, AttendanceMonthlyStat, Enrollment, EnrollmentDailyStat, Group
+
+BUCKETS = {
+    'day': None,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+
+def bump(day, course_id, status, delta):
+    """Bitta (kun, kurs, status) hisoblagichini atomik tarzda o'zgartiradi"""
+    lookup = {'day': day, 'course_id': course_id, 'status': status}
+    if EnrollmentDailyStat.objects.filter(**lookup).update(count=F('count') + delta):
+        return
+    try:
+        with transaction.atomic():
+            EnrollmentDailyStat.objects.create(count=delta, **lookup)
+    except IntegrityError:
+        # parallel so'rov qatorni bizdan oldin yaratdi
+        EnrollmentDailyStat.objects.filter(**lookup).update(count=F('count') + delta)
+
+
+def rebuild():
+    """Rollup jadvalini Enrollment jadvalidan qaytadan quradi"""
+    rows = (
+        Enrollment.objects
+        .values('date_joined', 'course_id', 'status')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    with transaction.atomic():
+        EnrollmentDailyStat.objects.all().delete()
+        EnrollmentDailyStat.objects.bulk_create(
+            (
+                EnrollmentDailyStat(day=row['date_joined'], course_id=row['course_id'],
+                                    status=row['status'], count=row['total'])
+                for row in rows.iterator()
+            ),
+            batch_size=1000,
+        )
+
+
+def enrollment_statistics(date1, date2, bucket=None, by_course=False):
+    """
+    Bitta guruhlangan agregat so'rov. Natija O(kunlar) qatordan olinadi,
+    O(enrollmentlar) emas.
+    """
+    queryset = EnrollmentDailyStat.objects.filter(day__range=[date1, date2], count__gt=0)
+    group_by = ['status']
+    if bucket:
+        trunc = BUCKETS[bucket]
+        queryset = queryset.annotate(period=trunc('day') if trunc else F('day'))
+        group_by.append('period')
+    if by_course:
+        group_by.append('course_id')
+    rows = queryset.values(*group_by).annotate(total=Sum('count')).order_by(*group_by[1:])
+
+    if not bucket and not by_course:
+        data = {key: 0 for key, _ in Enrollment.STATUS_CHOICES}
+        for row in rows:
+            data[row['status']] = row['total']
+        return data
+
+    series = {}
+    for row in rows:
+        key = (row.get('period'), row.get('course_id'))
+        if key not in series:
+            item = {key: 0 for key, _ in Enrollment.STATUS_CHOICES}
+            if bucket:
+                item['period'] = row['period'].isoformat()
+            if by_course:
+                item['course'] = row['course_id']
+            series[key] = item
+        series[key][row['status']] = row['total']
+    return list(series.values())
+
+
+def _month(day):
+    return day.replace(day=1)
+
+
+def _next_month(day):
+    return (day.replace(day=1) + datetime.timedelta(days=32)).replace(day=1)
+
+
+def refresh_attendance_month(group_id, day):
+    """
+    Bitta (guruh, oy) bo'lagini Attendance dan qayta hisoblaydi. Guruh qatori lock qilinadi,
+    qatorlar upsert bilan yoziladi va faqat endi yo'q (student, level) juftlari o'chiriladi:
+    parallel yangilanishlar bir-birining natijasini yo'qotmaydi.
+    """
+    month = _month(day)
+    with transaction.atomic():
+        Group.objects.select_for_update().filter(pk=group_id).first()
+        rows = (
+            Attendance.objects
+            .filter(group_id=group_id, date__gte=month, date__lt=_next_month(month))
+            .values('student_id', 'level_id')
+            .annotate(total=Count('id'))
+            .order_by()
+        )
+        stats = [
+            AttendanceMonthlyStat(month=month, group_id=group_id, student_id=row['student_id'],
+                                  level_id=row['level_id'], count=row['total'])
+            for row in rows
+        ]
+        AttendanceMonthlyStat.objects.bulk_create(
+            stats,
+            update_conflicts=True,
+            unique_fields=['group', 'month', 'student', 'level'],
+            update_fields=['count'],
+        )
+        keys = {(stat.student_id, stat.level_id) for stat in stats}
+        stale = [
+            pk for pk, student_id, level_id in AttendanceMonthlyStat.objects
+            .filter(group_id=group_id, month=month)
+            .values_list('pk', 'student_id', 'level_id')
+            if (student_id, level_id) not in keys
+        ]
+        if stale:
+            AttendanceMonthlyStat.objects.filter(pk__in=stale).delete()
+
+
+def rebuild_attendance_stats():
+    rows = (
+        Attendance.objects
+        .annotate(month=TruncMonth('date'))
+        .values('month', 'group_id', 'student_id', 'level_id')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    with transaction.atomic():
+        AttendanceMonthlyStat.objects.all().delete()
+        AttendanceMonthlyStat.objects.bulk_create(
+            (
+                AttendanceMonthlyStat(month=row['month'], group_id=row['group_id'], student_id=row['student_id'],
+                                      level_id=row['level_id'], count=row['total'])
+                for row in rows.iterator()
+            ),
+            batch_size=1000,
+        )
+
+
+def _attendance_filters(group_id=None, course_id=None, student_id=None):
+    filters = {}
+    if group_id:
+        filters['group_id'] = group_id
+    if course_id:
+        filters['group__course_id'] = course_id
+    if student_id:
+        filters['student_id'] = student_id
+    return filters
+
+
+def attendance_rates(date1, date2, use_summary=False, **filters):
+    """
+    Har bir (student, guruh) uchun level bo'yicha yo'qlama foizlari.
+    Xom ma'lumot bitta shartli agregat so'rov bilan hisoblanadi; use_summary
+    bo'lsa to'liq oylar AttendanceMonthlyStat dan, chetki kunlar Attendance dan olinadi.
+    """
+    levels = list(AttendanceLevel.objects.order_by('id').values_list('id', 'title'))
+    filters = _attendance_filters(**filters)
+    counts = defaultdict(Counter)
+
+    raw_range = Q(date__range=[date1, date2])
+    if use_summary:
+        first_month = date1 if date1.day == 1 else _next_month(date1)
+        end_month = _month(date2 + datetime.timedelta(days=1))
+        if first_month < end_month:
+            summary = (
+                AttendanceMonthlyStat.objects
+                .filter(month__gte=first_month, month__lt=end_month, **filters)
+                .values('student_id', 'group_id', 'level_id')
+                .annotate(total=Sum('count'))
+                .order_by()
+            )
+            for row in summary:
+                counts[row['student_id'], row['group_id']][row['level_id']] += row['total']
+            raw_range = Q(date__gte=date1, date__lt=first_month) | Q(date__gte=end_month, date__lte=date2)
+
+    rows = (
+        Attendance.objects
+        .filter(raw_range, **filters)
+        .values('student_id', 'group_id')
+        .annotate(**{f'level_{level_id}': Count('id', filter=Q(level_id=level_id)) for level_id, _ in levels})
+        .order_by()
+    )
+    for row in rows:
+        for level_id, _ in levels:
+            counts[row['student_id'], row['group_id']][level_id] += row[f'level_{level_id}']
+
+    result = []
+    for (student_id, group_id), by_level in sorted(counts.items(), key=lambda item: (item[0][1], item[0][0])):
+        total = sum(by_level.values())
+        if not total:
+            continue
+        result.append({
+            'student': student_id,
+            'group': group_id,
+            'total': total,
+            'levels': [
+                {'level': level_id, 'title': title, 'count': by_level[level_id],
+                 'rate': round(by_level[level_id] * 100 / total, 2)}
+                for level_id, title in levels
+            ],
+        })
+    return result
@@ -1,3 +1,1678 @@
-from django.test import TestCase
+import csv
+import datetime
+import decimal
+import importlib
+import importlib.util
+import io
+import json
+import re
+import tempfile
+import unittest
+import uuid
+from collections import Counter
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import close_old_connections, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import Count, Sum, Value
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, resolve
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework import viewsets
+from rest_framework.exceptions import ParseError, ValidationError
+from rest_framework.parsers import JSONParser
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory
+
+from . import authentication, exporting, hashing, metrics, notifications, otp, renderers, schedule, search, snapshots, statistics, timetable, urls
+from .caching import CachedResponseMixin
+from .importer import StudentImporter, read_csv
+from .renderers import MessagePackParser, MessagePackRenderer, ORJSONParser, ORJSONRenderer
+from .phones import normalize_phone
+from .serializers import CourseSerializer, GroupSerializer, ParentsSerializer, SparseFieldsMixin, TableSerializer
+from .models import *
+
+
+class QueryPlanTests(TestCase):
+    """
+    Qaynoq endpoint so'rovlarining EXPLAIN natijasini tekshiradi: ko'rsatilgan
+    jadvallardan birortasi to'liq skan qilinsa test yiqiladi.
+    """
+
+    def setUp(self):
+        if connection.vendor == 'postgresql':
+            # bo'sh jadvalda PostgreSQL har doim Seq Scan ni tanlaydi; indeks yo'li borligini tekshiramiz
+            with connection.cursor() as cursor:
+                cursor.execute('SET enable_seqscan = off')
+
+    def hot_queries(self):
+        day = datetime.date(2025, 1, 1)
+        since = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+        return {
+            'statistics: enrollment status/date': (
+                Enrollment.objects.filter(status='registered', date_joined__range=[day, day]),
+                [Enrollment],
+            ),
+            'statistics: daily rollup': (
+                EnrollmentDailyStat.objects.filter(day__range=[day, day]).values('status').annotate(total=Sum('count')),
+                [EnrollmentDailyStat],
+            ),
+            'attendance by group': (Attendance.objects.filter(group_id=1, created__gte=since), [Attendance]),
+            'attendance by student': (Attendance.objects.filter(student_id=1, created__gte=since), [Attendance]),
+            'roll call by group/date': (Attendance.objects.filter(group_id=1, date=day), [Attendance]),
+            'StudentApiView students': (Student.objects.filter(user__is_student=True).order_by('-id'), [User]),
+            'TeacherApiView teachers': (Worker.objects.filter(user__is_teacher=True).order_by('-id'), [User]),
+            'WorkerApiView workers': (Worker.objects.filter(user__is_staff=True).order_by('-id'), [User]),
+            'students by role': (User.objects.filter(is_student=True).order_by('-id'), [User]),
+            'teachers by role': (User.objects.filter(is_teacher=True).order_by('-id'), [User]),
+            'staff by role': (User.objects.filter(is_staff=True).order_by('-id'), [User]),
+            'phone lookup': (User.objects.filter(phone='998900404001'), [User]),
+        }
+
+    def full_scans(self, plan, models):
+        tables = [model._meta.db_table for model in models]
+        scans = []
+        for line in plan.splitlines():
+            for table in tables:
+                if connection.vendor == 'postgresql':
+                    if re.search(r'Seq Scan on "?%s"?' % re.escape(table), line):
+                        scans.append(line.strip())
+                elif re.search(r'\bSCAN "?%s"?(\s|$)' % re.escape(table), line) and 'INDEX' not in line:
+                    scans.append(line.strip())
+        return scans
+
+    def test_hot_queries_use_indexes(self):
+        for name, (queryset, models) in self.hot_queries().items():
+            with self.subTest(name):
+                plan = queryset.explain()
+                scans = self.full_scans(plan, models)
+                self.assertFalse(scans, f"{name}: full table scan\n{plan}")
+
+
+class QueryBudgetTests(TestCase):
+    """
+    configApp/urls.py dagi har bir GET endpoint ikki xil hajmdagi ma'lumot bilan chaqiriladi.
+    So'rovlar soni ma'lumot bilan o'ssa (N+1) yoki view dagi query_budget dan oshsa test
+    yiqiladi va ortib ketgan so'rovlarning fingerprint lari ko'rsatiladi.
+    """
+    SMALL = 2
+    LARGE = 6
+    DAY = datetime.date(2025, 3, 3)
+    # async viewlar sectionlarni alohida threadlarda quradi: test tranzaksiyasini ko'rmaydi,
+    # sectionlar GroupApi/StudentApiView orqali tekshiriladi
+    SKIP = {'GroupApiAsync', 'StudentApiAsync'}
+    # path parametri qaysi modelga tegishli (view queryset idan aniqlanmasa)
+    PARAM_MODELS = {
+        'teacher_id': Teacher,
+        'student_id': Student,
+        'WorkerApiViewId': Worker,
+        'StudentApiViewId': Student,
+        'ParentsViewSet': Parents,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(phone='+998990000000', is_staff=True, is_admin=True)
+        cls.level = AttendanceLevel.objects.create(title='Kelmadi')
+        cls.type = TableType.objects.create(title='Toq')
+        cls.seeded = 0
+        cls.seed(cls.SMALL)
+
+    @classmethod
+    def seed(cls, count):
+        """Har bir modeldan yana count ta yozuv; birinchi student va o'qituvchi har bir yangi guruhga qo'shiladi"""
+        for i in range(cls.seeded, cls.seeded + count):
+            department = Departments.objects.create(title=f'Bo\'lim {i}')
+            course = Course.objects.create(name=f'course-{i}', title=f'Kurs {i}')
+            room = Rooms.objects.create(title=f'Xona {i}', capacity=20)
+            day = Day.objects.create(title=f'Kun {i}')
+            table = Table.objects.create(
+                start_time=datetime.time(8 + i % 10), end_time=datetime.time(9 + i % 10),
+                room=room, type=cls.type, day=day,
+            )
+            teacher_user = User.objects.create(phone=f'+99891{i:07d}', full_name=f'Ustoz {i}', is_teacher=True, is_staff=True)
+            teacher = Teacher.objects.create(user=teacher_user)
+            teacher.departments.add(department)
+            teacher.course.add(course)
+            worker = Worker.objects.create(user=teacher_user)
+            worker.departments.add(department)
+            worker.course.add(course)
+            group = Group.objects.create(
+                name=f'Guruh {i}', title=f'G-{i}', course=course, table=table,
+                start_date=datetime.date(2025, 1, 1), end_date=datetime.date(2025, 12, 31),
+            )
+            group.teacher.add(Worker.objects.order_by('pk').first(), worker)
+            topic = Topics.objects.create(title=f'Mavzu {i}', course=course)
+            group_homework = GroupHomeWork.objects.create(group=group, topic=topic)
+            for j in range(3):
+                user = User.objects.create(phone=f'+99890{i:05d}{j:02d}', full_name=f'Ali {i} {j}', is_student=True)
+                student = Student.objects.create(user=user, full_name=f'Ali {i} {j}', email=f's{i}{j}@example.com', age=18)
+                student.course.add(course)
+                student.group.add(group)
+                group.students.add(Student.objects.order_by('pk').first(), student)
+                Parents.objects.create(student=student, full_name=f'Ota {i} {j}', phone_number=f'+99893{i:05d}{j:02d}')
+                Enrollment.objects.create(student=user, course=course, status='registered', date_joined=cls.DAY)
+                Attendance.objects.create(level=cls.level, student=student, group=Group.objects.order_by('pk').first(), date=cls.DAY)
+                HomeWork.objects.create(groupHomeWork=group_homework, student=student, link='https://example.com/hw')
+        cls.seeded += count
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def endpoints(self, patterns=None, prefix='/api/'):
+        """(view klassi, url) juftliklari: GET qabul qiladigan har bir route"""
+        for pattern in patterns if patterns is not None else urls.urlpatterns:
+            route = str(pattern.pattern).lstrip('^').rstrip('$')
+            if isinstance(pattern, URLResolver):
+                yield from self.endpoints(pattern.url_patterns, prefix + route)
+                continue
+            callback = pattern.callback
+            view = getattr(callback, 'cls', None) or getattr(callback, 'view_class', None)
+            if view is None or view.__module__ != 'configApp.views' or view.__name__ in self.SKIP:
+                continue
+            if 'get' not in (getattr(callback, 'actions', None) or {m: m for m in view.http_method_names if hasattr(view, m)}):
+                continue
+            if 'format' in pattern.pattern.regex.groupindex:
+                continue
+            for url in self.fill(view, prefix + route, pattern.pattern.regex.groupindex):
+                # oldinroq route bilan to'silgan pattern ga so'rov hech qachon yetib kelmaydi
+                if resolve(url.split('?')[0]).func is callback:
+                    yield view, url
+
+    def fill(self, view, route, params):
+        values = [{}]
+        for name in params:
+            if name == 'dataset':
+                values = [dict(value, dataset=dataset) for value in values for dataset in exporting.DATASETS]
+                continue
+            if name == 'job_id':
+                values = [dict(value, job_id='missing') for value in values]
+                continue
+            model = self.PARAM_MODELS.get(view.__name__) or self.PARAM_MODELS.get(name) or view.queryset.model
+            values = [dict(value, **{name: model.objects.order_by('pk').first().pk}) for value in values]
+
+        for value in values:
+            url = re.sub(r'<(?:\w+:)?(\w+)>|\(\?P<(\w+)>[^)]*\)', lambda m: str(value[m.group(1) or m.group(2)]), route)
+            # bir nechta so'rov satri bo'lsa har biri alohida o'lchanadi
+            queries = {
+                'statistics/': ['date1=2025-01-01&date2=2025-12-31'],
+                'attendance/rates/': [f'date1=2025-01-01&date2=2025-12-31&source={source}' for source in ('raw', 'summary')],
+                'attendance/roll-call/': [f'group={Group.objects.order_by("pk").first().pk}&date={self.DAY}'],
+                'search/': ['q=Ali'],
+            }.get(route[len('/api/'):], [None])
+            for query in queries:
+                yield f'{url}?{query}' if query else url
+
+    def measure(self):
+        results = {}
+        for view, url in self.endpoints():
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+            self.assertLess(response.status_code, 500, f'{url}: {response.status_code}')
+            results[url] = (view, [metrics.fingerprint(query['sql']) for query in queries.captured_queries])
+        return results
+
+    def test_query_counts_do_not_grow_with_data(self):
+        small = self.measure()
+        self.seed(self.LARGE - self.SMALL)
+        large = self.measure()
+        self.assertLessEqual(
+            {f'/api/attendance/rates/?date1=2025-01-01&date2=2025-12-31&source={source}' for source in ('raw', 'summary')},
+            set(large),
+        )
+
+        failures = []
+        for url, (view, queries) in large.items():
+            budget = getattr(view, 'query_budget', None)
+            grown = Counter(queries) - Counter(small[url][1])
+            if len(queries) > len(small[url][1]):
+                failures.append(
+                    f'{url} ({view.__name__}): {len(small[url][1])} -> {len(queries)} queries\n'
+                    + '\n'.join(f'  +{count}  {sql[:300]}' for sql, count in grown.most_common())
+                )
+            elif budget is None:
+                failures.append(f'{url} ({view.__name__}): query_budget yo\'q ({len(queries)} queries)')
+            elif len(queries) > budget:
+                failures.append(
+                    f'{url} ({view.__name__}): {len(queries)} queries > budget {budget}\n'
+                    + '\n'.join(f'  {sql[:300]}' for sql in queries)
+                )
+        self.assertFalse(failures, '\n' + '\n'.join(failures))
+
+
+class SparseFieldsTests(TestCase):
+    """?fields= va ?expand= javobni ham, SQL ni ham kichraytiradi"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(phone='+998990000000', is_staff=True, is_admin=True)
+        course = Course.objects.create(name='python', title='Python')
+        table = Table.objects.create(
+            start_time=datetime.time(8), end_time=datetime.time(9),
+            room=Rooms.objects.create(title='Xona', capacity=20),
+            type=TableType.objects.create(title='Toq'), day=Day.objects.create(title='Dushanba'),
+        )
+        group = Group.objects.create(
+            name='Guruh', title='G-1', course=course, table=table,
+            start_date=datetime.date(2025, 1, 1), end_date=datetime.date(2025, 12, 31),
+        )
+        for i in range(2):
+            user = User.objects.create(phone=f'+9989000000{i:02d}', full_name=f'Ali {i}', is_student=True)
+            group.students.add(Student.objects.create(user=user, full_name=f'Ali {i}', email=f's{i}@example.com', age=18))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json(), queries.captured_queries
+
+    def test_fields_narrow_output_and_sql(self):
+        full, full_queries = self.get('/api/group/')
+        sparse, sparse_queries = self.get('/api/group/?fields=id,name')
+
+        self.assertIn('students', full['results'][0])
+        self.assertEqual(set(sparse['results'][0]), {'id', 'name'})
+        self.assertLess(len(sparse_queries), len(full_queries))
+        select = next(query['sql'] for query in sparse_queries if 'FROM "configApp_group"' in query['sql'])
+        self.assertNotIn('descriptions', select.split('FROM')[0])
+
+    def test_nested_fields_and_expand(self):
+        data, _ = self.get('/api/group/?fields=id,course,students.full_name&expand=course')
+        group = data['results'][0]
+        self.assertEqual(group['course']['name'], 'python')
+        self.assertEqual([set(student) for student in group['students']], [{'full_name'}, {'full_name'}])
+
+    def test_unknown_field_is_rejected(self):
+        self.assertEqual(self.client.get('/api/group/?fields=id,nope').status_code, 400)
+        self.assertEqual(self.client.get('/api/group/?expand=name').status_code, 400)
+        student = Student.objects.order_by('pk').first()
+        response = self.client.get(f'/api/student/{student.pk}/?fields=nope')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('nope', response.json()['fields'][0])
+        worker = Worker.objects.create(user=self.admin)
+        response = self.client.get(f'/api/workerId/{worker.pk}/?fields=id,nope')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('nope', response.json()['fields'][0])
+        self.assertEqual(self.client.get(f'/api/workerId/{worker.pk + 1}/?fields=id').status_code, 404)
+        self.assertEqual(self.client.get('/api/group/?fields=id,students.nope').status_code, 400)
+
+    def test_unknown_field_is_rejected_on_empty_list(self):
+        self.assertFalse(Parents.objects.exists())
+        self.assertEqual(self.client.get('/api/parents/?fields=nope').status_code, 400)
+        self.assertEqual(self.client.get('/api/parents/?fields=student.nope&expand=student').status_code, 400)
+        self.assertEqual(self.client.get('/api/parents/?fields=id').status_code, 200)
+
+    def test_expandable_fields_resolve_to_serializers(self):
+        for serializer_class in SparseFieldsMixin.registry.values():
+            for name in getattr(getattr(serializer_class, 'Meta', None), 'expandable_fields', {}):
+                expanded, _ = serializer_class.expandable_serializer(name)
+                self.assertTrue(issubclass(expanded, SparseFieldsMixin), f'{serializer_class.__name__}.{name}')
+
+    def test_password_hash_is_not_serialized(self):
+        data, _ = self.get('/api/user/')
+        self.assertTrue(data['results'])
+        self.assertNotIn('password', data['results'][0])
+
+
+class RendererTests(TestCase):
+    """orjson renderer stdlib JSONRenderer bilan bayt-baytigacha bir xil (NaN/Infinity dan tashqari)"""
+    data = {
+        'created': datetime.datetime(2025, 1, 2, 3, 4, 5, 6789, tzinfo=datetime.timezone.utc),
+        'date': datetime.date(2025, 1, 2),
+        'start_time': datetime.time(8, 30),
+        'price': decimal.Decimal('12.50'),
+        'uuid': uuid.UUID(int=1),
+        'names': ["O'zbek", 'тест\u2028'],
+        1: None,
+    }
+
+    def test_orjson_matches_stdlib(self):
+        expected = JSONRenderer().render(self.data)
+        self.assertEqual(ORJSONRenderer().render(self.data), expected)
+        self.assertEqual(ORJSONRenderer().render(self.data, 'application/json; indent=4'),
+                         JSONRenderer().render(self.data, 'application/json; indent=4'))
+        self.assertEqual(ORJSONParser().parse(io.BytesIO(expected))['price'], 12.5)
+
+    def test_orjson_edge_cases(self):
+        # 64 bitdan katta int ni orjson yoza olmaydi -> stdlib
+        big = {'id': 2 ** 64, 'small': -2 ** 63}
+        self.assertEqual(ORJSONRenderer().render(big), JSONRenderer().render(big))
+        # NaN/Infinity: stdlib STRICT_JSON xato beradi, orjson null yozadi
+        for value in (float('nan'), float('inf')):
+            with self.assertRaises(ValueError):
+                JSONRenderer().render({'rate': value})
+            self.assertEqual(ORJSONRenderer().render({'rate': value}), b'{"rate":null}')
+        # orjson 64 bitdan katta int ni float qilib o'qirdi: bunday body stdlib JSONParser ga
+        body = b'{"id": 18446744073709551616, "min": -9223372036854775809, "phone": "+998901234567"}'
+        self.assertEqual(ORJSONParser().parse(io.BytesIO(body)), JSONParser().parse(io.BytesIO(body)))
+        self.assertEqual(ORJSONParser().parse(io.BytesIO(body))['id'], 2 ** 64)
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(io.BytesIO(b'{"id": 18446744073709551616'))
+
+    def test_without_orjson(self):
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(ORJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+            self.assertEqual(ORJSONParser().parse(io.BytesIO(b'{"id": 18446744073709551616}')), {'id': 2 ** 64})
+            with self.assertRaises(ValueError):
+                ORJSONRenderer().render({'rate': float('nan')})
+
+    @unittest.skipUnless(importlib.util.find_spec('msgpack'), "msgpack o'rnatilmagan")
+    def test_msgpack_round_trip(self):
+        data = {key: value for key, value in self.data.items() if isinstance(key, str)}
+        parsed = MessagePackParser().parse(io.BytesIO(MessagePackRenderer().render(data)))
+        self.assertEqual(parsed['created'], '2025-01-02T03:04:05.006789Z')
+        self.assertEqual(parsed['price'], 12.5)
+
+        client = APIClient()
+        client.force_authenticate(User.objects.create(phone='+998990000000', is_staff=True))
+        Course.objects.create(name='python', title='Python')
+        response = client.get('/api/course/', HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        parsed = MessagePackParser().parse(io.BytesIO(response.content))
+        self.assertEqual(parsed['results'][0]['name'], 'python')
+
+
+class EnrollmentStatisticsTests(TestCase):
+    """EnrollmentDailyStat signallar orqali Enrollment jadvalidagi jonli agregatga teng bo'lib turadi"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(phone='+998990000000', is_staff=True)
+        cls.python = Course.objects.create(name='python', title='Python')
+        cls.go = Course.objects.create(name='go', title='Go')
+
+    def assertRollupMatches(self):
+        live = Counter({
+            (row['date_joined'], row['course_id'], row['status']): row['total']
+            for row in Enrollment.objects.values('date_joined', 'course_id', 'status').annotate(total=Count('id'))
+        })
+        rollup = Counter({
+            (row.day, row.course_id, row.status): row.count
+            for row in EnrollmentDailyStat.objects.filter(count__gt=0)
+        })
+        self.assertEqual(rollup, live)
+
+    def test_rollup_follows_create_update_delete(self):
+        day = datetime.date(2025, 3, 3)
+        enrollments = [
+            Enrollment.objects.create(student=self.user, course=self.python, status='registered', date_joined=day)
+            for _ in range(3)
+        ]
+        self.assertRollupMatches()
+
+        enrollment = Enrollment.objects.get(pk=enrollments[0].pk)
+        with CaptureQueriesContext(connection) as queries:
+            enrollment.status = 'studying'
+            enrollment.save()
+        # eski holat from_db dan olinadi: qo'shimcha SELECT yo'q
+        selects = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('SELECT')]
+        self.assertFalse([sql for sql in selects if 'FROM "configApp_enrollment"' in sql])
+        self.assertRollupMatches()
+
+        enrollments[1].course = self.go
+        enrollments[1].date_joined = day + datetime.timedelta(days=40)
+        enrollments[1].save()
+        enrollments[1].save()
+        Enrollment(pk=enrollments[2].pk, student=self.user, course=self.go, status='graduated', date_joined=day).save()
+        self.assertRollupMatches()
+
+        enrollment.delete()
+        Enrollment.objects.get(pk=enrollments[1].pk).delete()
+        self.assertRollupMatches()
+
+    def test_statistics_view_by_course(self):
+        day = datetime.date(2025, 3, 3)
+        Enrollment.objects.create(student=self.user, course=self.python, status='registered', date_joined=day)
+        Enrollment.objects.create(student=self.user, course=self.go, status='studying', date_joined=day)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = '/api/statistics/?date1=2025-01-01&date2=2025-12-31'
+
+        self.assertEqual(client.get(url).json(), {'registered': 1, 'studying': 1, 'graduated': 0})
+        rows = client.get(url + '&by_course=1').json()
+        self.assertEqual(
+            {row['course']: (row['registered'], row['studying']) for row in rows},
+            {self.python.pk: (1, 0), self.go.pk: (0, 1)},
+        )
+
+
+class KeysetPaginationTests(TestCase):
+    """?pagination=cursor: teng qiymatli qatorlar va sahifalar orasida o'chirishda ham har bir qator bir marta"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(phone='+998990000000', is_staff=True)
+        course = Course.objects.create(name='python', title='Python')
+        # id dan boshqa hamma maydon bir xil
+        cls.topics = [Topics.objects.create(title='Mavzu', course=course) for _ in range(8)]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def walk(self, url, between_pages=None):
+        seen = []
+        while url:
+            data = self.client.get(url).json()
+            seen += [row['id'] for row in data['results']]
+            if between_pages:
+                between_pages(seen)
+            url = data['next']
+        return seen
+
+    def test_traversal_with_ties(self):
+        ids = sorted((topic.pk for topic in self.topics), reverse=True)
+        self.assertEqual(self.walk('/api/topic/?pagination=cursor&page_size=3'), ids)
+
+    def test_traversal_with_deletes(self):
+        ids = sorted((topic.pk for topic in self.topics), reverse=True)
+
+        def delete(seen):
+            # cursor turgan oxirgi qator va keyingi sahifaning birinchisi o'chiriladi
+            remaining = [pk for pk in ids if pk < seen[-1]]
+            Topics.objects.filter(pk__in=[seen[-1]] + remaining[:1]).delete()
+
+        seen = self.walk('/api/topic/?pagination=cursor&page_size=3', delete)
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(seen, sorted(seen, reverse=True))
+        self.assertFalse(Topics.objects.exclude(pk__in=seen).exists())
+
+    def test_approximate_count_is_upper_bound(self):
+        Topics.objects.filter(pk__in=[topic.pk for topic in self.topics[2:5]]).delete()
+        data = self.client.get('/api/topic/?pagination=cursor&total=approx').json()
+        self.assertGreaterEqual(data['count'], Topics.objects.count())
+        self.assertNotIn('count', self.client.get('/api/topic/?pagination=cursor').json())
+
+
+class AttendanceRollCallTests(TestCase):
+    """Yo'qlama upsert: qayta yuborilsa qatorlar ko'paymaydi, level yangilanadi"""
+    DAY = datetime.date(2025, 3, 3)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(phone='+998990000000', is_staff=True)
+        cls.present = AttendanceLevel.objects.create(title='Keldi')
+        cls.absent = AttendanceLevel.objects.create(title='Kelmadi')
+        table = Table.objects.create(
+            start_time=datetime.time(8), end_time=datetime.time(9),
+            room=Rooms.objects.create(title='Xona', capacity=20), type=TableType.objects.create(title='Toq'),
+        )
+        cls.group = Group.objects.create(
+            name='Guruh', title='G-1', course=Course.objects.create(name='python', title='Python'), table=table,
+            start_date=datetime.date(2025, 1, 1), end_date=datetime.date(2025, 12, 31),
+        )
+        cls.students = []
+        for i in range(3):
+            user = User.objects.create(phone=f'+9989000000{i:02d}', full_name=f'Ali {i}', is_student=True)
+            cls.students.append(Student.objects.create(user=user, full_name=f'Ali {i}', email=f's{i}@example.com', age=18))
+        cls.group.students.add(*cls.students)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def roll_call(self, levels):
+        return self.client.post('/api/attendance/roll-call/', {
+            'group': self.group.pk,
+            'date': str(self.DAY),
+            'items': [{'student': student.pk, 'level': level.pk} for student, level in zip(self.students, levels)],
+        }, format='json')
+
+    def levels(self):
+        return dict(Attendance.objects.filter(group=self.group, date=self.DAY).values_list('student_id', 'level_id'))
+
+    def test_resubmit_updates_in_place(self):
+        response = self.roll_call([self.present, self.present, self.absent])
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['count'], 3)
+        ids = set(Attendance.objects.values_list('pk', flat=True))
+
+        self.assertEqual(self.roll_call([self.absent, self.present]).status_code, 200)
+        self.assertEqual(set(Attendance.objects.values_list('pk', flat=True)), ids)
+        self.assertEqual(self.levels(), {
+            self.students[0].pk: self.absent.pk, self.students[1].pk: self.present.pk, self.students[2].pk: self.absent.pk,
+        })
+        rows = self.client.get(f'/api/attendance/roll-call/?group={self.group.pk}&date={self.DAY}').json()
+        self.assertEqual([row['level'] for row in rows], [self.absent.pk, self.present.pk, self.absent.pk])
+
+    def test_invalid_roll_call(self):
+        outsider = Student.objects.create(
+            user=User.objects.create(phone='+998900000099'), full_name='Boshqa', email='o@example.com', age=18,
+        )
+        response = self.client.post('/api/attendance/roll-call/', {
+            'group': self.group.pk, 'date': str(self.DAY), 'items': [{'student': outsider.pk, 'level': self.present.pk}],
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Attendance.objects.exists())
+        self.assertEqual(self.client.get(f'/api/attendance/roll-call/?group=abc&date={self.DAY}').status_code, 400)
+
+
+class AttendanceDateMigrationTests(TransactionTestCase):
+    """0004: bir kundagi takroriy yo'qlamalar o'chirilishidan oldin logga yoziladi"""
+
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate([('configApp', target)])
+        return executor.loader.project_state([('configApp', target)]).apps
+
+    def test_deleted_duplicates_are_logged(self):
+        latest = MigrationExecutor(connection).loader.graph.leaf_nodes('configApp')[0][1]
+        self.addCleanup(self.migrate, latest)
+        table = Table.objects.create(
+            start_time=datetime.time(8), end_time=datetime.time(9),
+            room=Rooms.objects.create(title='Xona', capacity=20), type=TableType.objects.create(title='Toq'),
+        )
+        group = Group.objects.create(
+            name='Guruh', title='G-1', course=Course.objects.create(name='python', title='Python'), table=table,
+            start_date=datetime.date(2025, 1, 1), end_date=datetime.date(2025, 12, 31),
+        )
+        user = User.objects.create(phone='+998900000001', full_name='Ali', is_student=True)
+        student = Student.objects.create(user=user, full_name='Ali', email='ali@example.com', age=15)
+        level = AttendanceLevel.objects.create(title='Keldi')
+
+        Attendance = self.migrate('0003_enrollmentdailystat').get_model('configApp', 'Attendance')
+        first, second, last = [
+            Attendance.objects.create(level_id=level.pk, student_id=student.pk, group_id=group.pk).pk for _ in range(3)
+        ]
+        with self.assertLogs('configApp.migrations', 'WARNING') as logs:
+            Attendance = self.migrate('0004_attendance_date').get_model('configApp', 'Attendance')
+        self.assertEqual(list(Attendance.objects.values_list('pk', flat=True)), [last])
+        self.assertEqual(len(logs.output), 2)
+        for pk, line in zip((first, second), logs.output):
+            self.assertIn(f"({last} qoldi): {{'id': {pk}, 'student_id': {student.pk}", line)
+
+
+class StudentImporterTests(TestCase):
+    """Import hisobotida har bir yomon qator raqami bilan, yaxshi qatorlar yoziladi"""
+    HEADER = 'phone,password,full_name,email,age,groups,courses,parent_full_name,parent_phone\n'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.course = Course.objects.create(name='python', title='Python')
+
+    def rows(self, *lines):
+        return read_csv(io.BytesIO((self.HEADER + ''.join(line + '\n' for line in lines)).encode()))
+
+    def test_invalid_rows_are_reported(self):
+        report = StudentImporter(chunk_size=2).run(self.rows(
+            f'+998901111111,,Ali,ali@example.com,18,,{self.course.pk},Ota,+998931111111',
+            '+998901111112,,Vali,bad-email,18,,,,',
+            '+998901111111,,Takror,t@example.com,18,,,,',
+            '+998901111113,,Guli,guli@example.com,x,999,,,',
+        ))
+        self.assertEqual((report['total'], report['created']), (4, 1))
+        self.assertEqual({error['row']: set(error['errors']) for error in report['errors']}, {
+            3: {'email'}, 4: {'phone'}, 5: {'age'},
+        })
+        student = Student.objects.get(user__phone='+998901111111')
+        self.assertEqual(list(student.course.all()), [self.course])
+        self.assertEqual(student.parents.full_name, 'Ota')
+
+    def test_integrity_error_names_the_row(self):
+        class RacingImporter(StudentImporter):
+            def validate_chunk(self, numbered):
+                valid = super().validate_chunk(numbered)
+                # tekshiruvdan keyin boshqa so'rov shu raqamni ro'yxatdan o'tkazdi
+                User.objects.create(phone='+998902222222')
+                return valid
+
+        report = RacingImporter(chunk_size=10).run(self.rows(
+            '+998902222221,,Ali,a@example.com,18,,,,',
+            '+998902222222,,Vali,v@example.com,18,,,,',
+            '+998902222223,,Guli,g@example.com,18,,,,',
+        ))
+        self.assertEqual(report['created'], 2)
+        self.assertEqual([error['row'] for error in report['errors']], [3])
+        self.assertEqual(Student.objects.count(), 2)
+
+    def test_broken_file_names_the_row(self):
+        valid = f'{self.HEADER}+998903333331,,Ali,a@example.com,18,,,,\n'.encode()
+        client = APIClient()
+        client.force_authenticate(User.objects.create(phone='+998990000000', is_staff=True))
+        for content, message in [
+            (f'{self.HEADER}+998903333331,,G\xfcli,g@example.com,18,,,,\n'.encode('latin-1'), '2-qator: fayl UTF-8 da emas'),
+            (valid + '+998903333332,,G\xfcli,g@example.com,18,,,,\n'.encode('latin-1'), '3-qator: fayl UTF-8 da emas'),
+            (valid + b'+998903333332,,' + b'V' * (csv.field_size_limit() + 1) + b',v@example.com,18,,,,\n', '3-qator: CSV xatosi'),
+        ]:
+            with self.subTest(message=message):
+                upload = io.BytesIO(content)
+                upload.name = 'students.csv'
+                response = client.post('/api/import/students/', {'file': upload}, format='multipart')
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(message, response.json()['error'])
+
+    def test_chunk_size_must_be_positive(self):
+        for size in (0, -1):
+            with self.assertRaises(ValueError):
+                StudentImporter(chunk_size=size)
+        client = APIClient()
+        client.force_authenticate(User.objects.create(phone='+998990000000', is_staff=True))
+        upload = io.BytesIO(self.HEADER.encode())
+        upload.name = 'students.csv'
+        response = client.post('/api/import/students/', {'file': upload, 'chunk_size': '0'}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+
+
+class ExportTests(TestCase):
+    """Eksport oqimi: chunk hajmidan qat'i nazar bir xil qatorlar, M2M id lar bilan"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(phone='+998990000000', is_staff=True)
+        cls.courses = [Course.objects.create(name=f'c{i}', title=f'Kurs {i}') for i in range(2)]
+        cls.students = []
+        for i in range(3):
+            user = User.objects.create(phone=f'+9989000000{i:02d}', full_name=f'Ali {i}', is_student=True)
+            student = Student.objects.create(user=user, full_name=f'Ali, "{i}"', email=f's{i}@example.com', age=18)
+            student.course.add(*cls.courses[:i])
+            cls.students.append(student)
+
+    def test_csv_stream(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get('/api/export/students/?as=csv')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+
+        self.assertEqual([row['full_name'] for row in rows], [student.full_name for student in self.students])
+        self.assertEqual(rows[0]['user__phone'], '+998900000000')
+        self.assertEqual(
+            [row['course'] for row in rows],
+            ['', str(self.courses[0].pk), f'{self.courses[0].pk};{self.courses[1].pk}'],
+        )
+
+    def test_staff_only(self):
+        client = APIClient()
+        client.force_authenticate(self.students[0].user)
+        self.assertEqual(client.get('/api/export/users/?as=csv').status_code, 403)
+        client.force_authenticate(None)
+        self.assertEqual(client.get('/api/export/users/?as=csv').status_code, 401)
+
+    def test_jsonl_is_independent_of_chunk_size(self):
+        whole = [json.loads(line) for line in exporting.stream('students', 'jsonl')]
+        chunked = [json.loads(line) for line in exporting.stream('students', 'jsonl', chunk_size=1)]
+        self.assertEqual(chunked, whole)
+        self.assertEqual([row['course'] for row in whole], [[], [self.courses[0].pk], [c.pk for c in self.courses]])
+        users = [json.loads(line) for line in exporting.stream('users', 'jsonl', chunk_size=2)]
+        self.assertEqual(len(users), User.objects.count())
+        self.assertNotIn('password', users[0])
+
+
+class TokenRevocationTests(TestCase):
+    """Parol/rol o'zgarsa eski tokenlar rad etiladi, shu sekundda olingan yangisi ishlaydi"""
+
+    def setUp(self):
+        cache.clear()
+        authentication.token_store().clear()
+        self.user = User.objects.create(phone='+998901234567', full_name='Ali')
+        self.user.set_password('old-password')
+        self.user.save()
+        self.client = APIClient()
+
+    def login(self, password):
+        response = self.client.post('/api/login/', {'phone': self.user.phone, 'password': password}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def status(self, tokens):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        try:
+            return self.client.get('/api/user/').status_code
+        finally:
+            self.client.credentials()
+
+    def test_relogin_right_after_password_change(self):
+        old = self.login('old-password')
+        self.assertEqual(self.status(old), 200)
+
+        self.user.set_password('new-password')
+        self.user.save()
+        new = self.login('new-password')
+
+        self.assertEqual(self.status(old), 401)
+        self.assertEqual(self.status(new), 200)
+        self.assertEqual(self.client.post('/api/refresh/', {'refresh': old['refresh']}).status_code, 401)
+        refreshed = self.client.post('/api/refresh/', {'refresh': new['refresh']}).json()
+        self.assertEqual(self.status(refreshed), 200)
+
+    def test_role_change_revokes(self):
+        tokens = self.login('old-password')
+        self.user.full_name = 'Vali'
+        self.user.save()
+        self.assertEqual(self.status(tokens), 200)
+
+        self.user.is_staff = True
+        self.user.save()
+        self.assertEqual(self.status(tokens), 401)
+        self.assertEqual(self.status(self.login('old-password')), 200)
+
+    def test_revocation_survives_full_default_cache(self):
+        tokens = self.login('old-password')
+        self.user.is_staff = True
+        self.user.save()
+        cache.set_many({f'filler:{i}': i for i in range(settings.CACHES['default']['OPTIONS']['MAX_ENTRIES'] + 100)})
+        self.assertEqual(self.status(tokens), 401)
+
+    def test_unavailable_store_rejects_tokens(self):
+        tokens = self.login('old-password')
+
+        class Broken:
+            def get(self, key, default=None):
+                raise ConnectionError('redis down')
+
+        with mock.patch.object(authentication, 'token_store', Broken), self.assertLogs('configApp.authentication', 'ERROR'):
+            self.assertEqual(self.status(tokens), 401)
+        self.assertEqual(self.status(tokens), 200)
+
+
+class CachedResponseTests(TestCase):
+    """Versiyalangan javob keshi: hit DB ga bormaydi, commit dan keyin yozuv keshni eskirtiradi"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(phone='+998990000000', is_staff=True)
+        Course.objects.create(name='python', title='Python')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def names(self, url='/api/course/'):
+        return [row['name'] for row in self.client.get(url).json()['results']]
+
+    def test_hit_skips_database_and_writes_invalidate(self):
+        self.assertEqual(self.names(), ['python'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.names(), ['python'])
+
+        # versiya commit dan keyin oshadi
+        Course.objects.create(name='go', title='Go')
+        self.assertEqual(self.names(), ['python'])
+        with self.captureOnCommitCallbacks(execute=True):
+            Course.objects.create(name='rust', title='Rust')
+        self.assertEqual(self.names(), ['rust', 'go', 'python'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f'/api/course/{Course.objects.get(name="go").pk}/', {'title': 'Golang'})
+        self.assertEqual(response.status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            Course.objects.filter(name='rust').delete()
+        self.assertEqual(self.names(), ['go', 'python'])
+
+    def test_hit_keeps_headers(self):
+        class Base(viewsets.ModelViewSet):
+            queryset = Course.objects.order_by('-id')
+            serializer_class = CourseSerializer
+            permission_classes = []
+
+            def list(self, request, *args, **kwargs):
+                response = super().list(request, *args, **kwargs)
+                response['X-Total'] = str(len(response.data))
+                return response
+
+        class View(CachedResponseMixin, Base):
+            pass
+
+        view = View.as_view({'get': 'list'})
+        miss, hit = (view(APIRequestFactory().get('/courses/')) for _ in range(2))
+        miss.render()
+        self.assertFalse(isinstance(hit, Response))
+        self.assertEqual(hit.content, miss.content)
+        self.assertEqual(dict(hit.items()), dict(miss.items()))
+        self.assertIn('X-Total', hit)
+
+
+class SnapshotTests(TestCase):
+    """Forma snapshotlari: ETag bo'yicha 304, o'zgarishsiz so'rov SQL siz, yozuvdan keyin yangi versiya"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(phone='+998990000000', full_name='Ustoz', is_teacher=True, is_staff=True)
+        Worker.objects.create(user=cls.user)
+        Course.objects.create(name='python', title='Python')
+        Table.objects.create(
+            start_time=datetime.time(8), end_time=datetime.time(9, 30),
+            room=Rooms.objects.create(title='A-1', capacity=20), type=TableType.objects.create(title='Toq'),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_etag_and_304(self):
+        response = self.client.get('/api/group_get/')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        data = response.json()
+        self.assertEqual(data['teachers'][0]['label'], 'Ustoz')
+        self.assertEqual(data['courses'][0]['label'], 'Python')
+        self.assertEqual(data['tables'][0]['label'], '08:00-09:30 A-1')
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/group_get/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(response.content)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/group_get/').json(), data)
+
+    def test_write_changes_etag(self):
+        etag = self.client.get('/api/group_get/')['ETag']
+        students_etag = self.client.get('/api/student/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Course.objects.create(name='go', title='Go')
+
+        response = self.client.get('/api/group_get/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual([course['label'] for course in response.json()['courses']], ['Go', 'Python'])
+        self.assertNotEqual(self.client.get('/api/student/')['ETag'], students_etag)
+
+
+class DatabaseWriteBenchTests(TransactionTestCase):
+    """bench_db_writes: parallel yozuvlar xatosiz o'tadi va o'zidan keyin tozalaydi"""
+
+    def test_sqlite_pragmas(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('faqat SQLite')
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute('PRAGMA temp_store')
+            self.assertEqual(cursor.fetchone()[0], 2)
+
+    def test_concurrent_writes(self):
+        # xotiradagi test bazasi shared-cache: uning jadval lock lari busy_timeout ni kutmaydi
+        threads = 1 if connection.vendor == 'sqlite' and connection.is_in_memory_db() else 2
+        out, err = io.StringIO(), io.StringIO()
+        call_command('bench_db_writes', threads=threads, writes=5, rows=3, stdout=out, stderr=err)
+        self.assertEqual(err.getvalue(), '', out.getvalue())
+        self.assertIn(f'commits: {threads * 5}, errors: 0', out.getvalue())
+        self.assertIn('rows/s', out.getvalue())
+        self.assertEqual(err.getvalue(), '', out.getvalue())
+        self.assertFalse(Rooms.objects.exists())
+
+
+class AttendanceRateTests(TestCase):
+    """Yo'qlama foizlari: xom va summary manbalari bir xil natija beradi, oy bo'laklari eskirmaydi"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.present = AttendanceLevel.objects.create(title='Keldi')
+        cls.absent = AttendanceLevel.objects.create(title='Kelmadi')
+        table = Table.objects.create(
+            start_time=datetime.time(8), end_time=datetime.time(9),
+            room=Rooms.objects.create(title='Xona', capacity=20), type=TableType.objects.create(title='Toq'),
+        )
+        cls.group = Group.objects.create(
+            name='Guruh', title='G-1', course=Course.objects.create(name='python', title='Python'), table=table,
+            start_date=datetime.date(2025, 1, 1), end_date=datetime.date(2025, 12, 31),
+        )
+        cls.students = []
+        for i in range(2):
+            user = User.objects.create(phone=f'+9989000000{i:02d}', full_name=f'Ali {i}', is_student=True)
+            cls.students.append(Student.objects.create(user=user, full_name=f'Ali {i}', email=f's{i}@example.com', age=18))
+        day = datetime.date(2025, 1, 20)
+        for n in range(60):
+            for i, student in enumerate(cls.students):
+                level = cls.absent if (n + i) % 3 == 0 else cls.present
+                Attendance.objects.create(student=student, group=cls.group, level=level, date=day)
+            day += datetime.timedelta(days=1)
+
+    def rates(self, date1, date2, **kwargs):
+        return statistics.attendance_rates(datetime.date(*date1), datetime.date(*date2), **kwargs)
+
+    def test_summary_matches_raw(self):
+        for date1, date2 in [((2025, 1, 25), (2025, 3, 10)), ((2025, 2, 1), (2025, 2, 28)), ((2025, 2, 3), (2025, 2, 9))]:
+            raw = self.rates(date1, date2)
+            self.assertEqual(self.rates(date1, date2, use_summary=True), raw)
+            self.assertEqual(self.rates(date1, date2, use_summary=True, student_id=self.students[0].pk),
+                             [row for row in raw if row['student'] == self.students[0].pk])
+
+    def test_rates(self):
+        data = self.rates((2025, 2, 1), (2025, 2, 28))
+        self.assertEqual([row['student'] for row in data], [student.pk for student in self.students])
+        first = data[0]
+        self.assertEqual(first['total'], 28)
+        absent = Attendance.objects.filter(student=self.students[0], level=self.absent, date__month=2).count()
+        self.assertEqual(first['levels'][1], {
+            'level': self.absent.pk, 'title': 'Kelmadi', 'count': absent, 'rate': round(absent * 100 / 28, 2),
+        })
+        self.assertEqual(sum(level['rate'] for level in first['levels']), 100)
+        self.assertEqual(self.rates((2026, 1, 1), (2026, 2, 1)), [])
+
+    def test_month_slice_drops_stale_rows(self):
+        Attendance.objects.filter(group=self.group, date__month=2, level=self.absent).update(level=self.present)
+        statistics.refresh_attendance_month(self.group.pk, datetime.date(2025, 2, 14))
+        stats = AttendanceMonthlyStat.objects.filter(group=self.group, month=datetime.date(2025, 2, 1))
+        self.assertEqual(set(stats.values_list('level_id', flat=True)), {self.present.pk})
+        self.assertEqual(sorted(stats.values_list('count', flat=True)), [28, 28])
+        self.assertEqual(self.rates((2025, 2, 1), (2025, 2, 28), use_summary=True),
+                         self.rates((2025, 2, 1), (2025, 2, 28)))
+
+        Attendance.objects.filter(group=self.group, date__month=2).delete()
+        self.assertFalse(stats.exists())
+
+
+class ScheduleTests(TestCase):
+    """Interval indeks: kesishish, yonma-yon intervallar, kunlar va yozishdan oldingi qayta tekshiruv"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.monday, cls.tuesday = Day.objects.create(title='Dushanba'), Day.objects.create(title='Seshanba')
+        cls.type = TableType.objects.create(title='Toq')
+        cls.course = Course.objects.create(name='python', title='Python')
+        cls.rooms = [Rooms.objects.create(title=f'A-{i}', capacity=20) for i in range(3)]
+
+    def booking(self, start, end, group=None, room=1, day=None, teachers=()):
+        return schedule.Booking(start, end, group, None, room, frozenset(teachers),
+                                datetime.date(2025, 1, 1), datetime.date(2025, 6, 30), day)
+
+    def table(self, room, day=None, start=8, end=9):
+        return Table.objects.create(start_time=datetime.time(start), end_time=datetime.time(end),
+                                    room=room, type=self.type, day=day)
+
+    def group(self, table, title):
+        return Group.objects.create(name=title, title=title, course=self.course, table=table,
+                                    start_date=datetime.date(2025, 1, 1), end_date=datetime.date(2025, 6, 30))
+
+    def test_interval_overlap_and_adjacency(self):
+        index = schedule.IntervalIndex([
+            self.booking(480, 570, group=1), self.booking(570, 660, group=2), self.booking(0, 1440, group=3),
+        ])
+        self.assertEqual(len(index), 3)
+        groups = lambda start, end: sorted(booking.group for booking in index.overlapping(start, end))
+        self.assertEqual(groups(500, 520), [1, 3])
+        # [480, 570) va [570, 660) yonma-yon: kesishmaydi
+        self.assertEqual(groups(570, 600), [2, 3])
+        self.assertEqual(groups(560, 580), [1, 2, 3])
+        self.assertEqual(groups(1440, 1500), [])
+        self.assertEqual(list(schedule.IntervalIndex().overlapping(0, 1440)), [])
+
+    def test_days(self):
+        monday, tuesday = self.monday.pk, self.tuesday.pk
+        index = schedule.ScheduleIndex([
+            self.booking(480, 570, group=1, day=monday, teachers=[7]),
+            self.booking(600, 690, group=2, day=None),
+        ])
+        conflicts = lambda booking: sorted(item['conflict_with'] for item in index.conflicts(booking))
+        self.assertEqual(conflicts(self.booking(500, 520, day=monday)), [1])
+        self.assertEqual(conflicts(self.booking(500, 520, day=tuesday)), [])
+        self.assertEqual(conflicts(self.booking(500, 620, day=None)), [1, 2])
+        self.assertEqual(conflicts(self.booking(650, 700, day=tuesday)), [2])
+        self.assertEqual(index.conflicts(self.booking(500, 520, room=2, day=monday, teachers=[7])), [
+            {'type': 'teacher', 'resource': 7, 'group': None, 'conflict_with': 1},
+        ])
+
+    def test_save_rechecks_under_lock(self):
+        first = self.group(self.table(self.rooms[0], self.monday), 'G-1')
+        moving = self.table(self.rooms[1], self.monday)
+        self.group(moving, 'G-2')
+
+        serializer = TableSerializer(moving, data={'room': self.rooms[2].pk}, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        # validate bilan save orasida boshqa so'rov shu xonani band qildi
+        Table.objects.filter(pk=first.table_id).update(room=self.rooms[2])
+        with self.assertRaises(ValidationError):
+            serializer.save()
+        self.assertEqual(Table.objects.get(pk=moving.pk).room, self.rooms[1])
+
+        serializer = TableSerializer(moving, data={'day': self.tuesday.pk, 'room': self.rooms[2].pk}, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        serializer.save()
+        self.assertEqual(Table.objects.get(pk=moving.pk).room, self.rooms[2])
+
+        group = self.group(self.table(self.rooms[1], self.monday), 'G-3')
+        target = self.table(self.rooms[1], self.tuesday)
+        serializer = GroupSerializer(group, data={'table': target.pk}, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.group(self.table(self.rooms[1], self.tuesday), 'G-4')
+        with self.assertRaises(ValidationError):
+            serializer.save()
+        self.assertNotEqual(Group.objects.get(pk=group.pk).table_id, target.pk)
+
+
+    def test_locked_index_loads_only_affected_bookings(self):
+        teacher = Worker.objects.create(user=User.objects.create(phone='+998911111111'))
+        same_room = self.group(self.table(self.rooms[0], self.monday), 'G-1')
+        self.group(self.table(self.rooms[0], self.tuesday), 'G-2')
+        every_day = self.group(self.table(self.rooms[0]), 'G-3')
+        self.group(self.table(self.rooms[1], self.monday), 'G-4')
+        taught_tuesday = self.group(self.table(self.rooms[2], self.tuesday), 'G-5')
+        taught_monday = self.group(self.table(self.rooms[2], self.monday, 10, 11), 'G-6')
+        taught_tuesday.teacher.add(teacher)
+        taught_monday.teacher.add(teacher)
+
+        with self.assertNumQueries(4):
+            index = schedule.locked_index({self.rooms[0].pk}, {teacher.pk}, {self.monday.pk})
+        self.assertEqual({booking.group for booking in index.bookings}, {same_room.pk, every_day.pk, taught_monday.pk})
+        self.assertEqual(index.by_table[taught_monday.table_id][0].teachers, {teacher.pk})
+        index = schedule.locked_index({self.rooms[0].pk}, {teacher.pk}, {None}, tables=[taught_tuesday.table_id])
+        self.assertEqual(len(index.bookings), 5)
+
+
+class TimetableTests(TestCase):
+    """Timetable solver: band jadvallar hisobga olinadi, apply Table larni yetim qoldirmaydi, vazifa bazada"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(phone='+998990000000', is_staff=True)
+        cls.monday = Day.objects.create(title='Dushanba')
+        cls.type = TableType.objects.create(title='Toq')
+        cls.course = Course.objects.create(name='python', title='Python')
+        cls.big, cls.small = Rooms.objects.create(title='Katta', capacity=20), Rooms.objects.create(title='Kichik', capacity=5)
+        cls.teachers = [Worker.objects.create(user=User.objects.create(phone=f'+9989100000{i:02d}')) for i in range(2)]
+
+    def group(self, title, teacher, table=None):
+        table = table or Table.objects.create(start_time=datetime.time(14), end_time=datetime.time(15),
+                                              room=self.big, type=self.type)
+        group = Group.objects.create(name=title, title=title, course=self.course, table=table,
+                                     start_date=datetime.date(2025, 1, 1), end_date=datetime.date(2025, 6, 30))
+        group.teacher.add(teacher)
+        return group
+
+    def problem(self, groups):
+        return timetable.load_problem(timetable.DEFAULT_SLOTS[:1], [self.monday.pk], group_ids=[group.pk for group in groups])
+
+    def test_solve(self):
+        slots = [(datetime.time(8), datetime.time(9)), (datetime.time(9), datetime.time(10))]
+        problem = timetable.Problem(
+            [timetable.GroupDemand(i, 10, frozenset({1})) for i in range(3)] + [timetable.GroupDemand(3, 30, frozenset())],
+            [timetable.Room(1, 20), timetable.Room(2, None)], [1], slots,
+            busy=[timetable.Busy(None, datetime.time(8), datetime.time(8, 30), 2, frozenset())],
+        )
+        solution = timetable.solve(problem, time_budget=0.2)
+        # bitta o'qituvchi, ikkita slot: uchinchi guruh joylashmaydi
+        self.assertEqual(len(solution.unassigned), 1)
+        self.assertIn(solution.unassigned[0], (0, 1, 2))
+        # 30 kishilik guruh faqat sig'imsiz xonaga sig'adi, u 08:00 da band
+        self.assertEqual(solution.assignments[3], (1, 1, 2))
+
+    def test_tables_outside_subset_are_busy(self):
+        fixed = Table.objects.create(start_time=datetime.time(8), end_time=datetime.time(9),
+                                     room=self.small, type=self.type, day=self.monday)
+        self.group('G-1', self.teachers[0], fixed)
+        group = self.group('G-2', self.teachers[1])
+        solution = timetable.solve(self.problem([group]), time_budget=0.2)
+        self.assertEqual(solution.assignments, {group.pk: (self.monday.pk, 0, self.big.pk)})
+
+        # o'qituvchi 08:00 da boshqa guruhda band: slot yo'q
+        blocked = self.group('G-3', self.teachers[0])
+        self.assertEqual(timetable.solve(self.problem([blocked]), time_budget=0.2).unassigned, [blocked.pk])
+
+    def test_apply_updates_own_tables(self):
+        own = self.group('G-1', self.teachers[0])
+        shared = Table.objects.create(start_time=datetime.time(14), end_time=datetime.time(15), room=self.big, type=self.type)
+        first, second = self.group('G-2', self.teachers[1], shared), self.group('G-3', self.teachers[1], shared)
+        slots = timetable.DEFAULT_SLOTS[:3]
+        problem = timetable.load_problem(slots, [self.monday.pk], group_ids=[own.pk, first.pk, second.pk])
+        solution = timetable.solve(problem, time_budget=0.2)
+        self.assertFalse(solution.unassigned)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(timetable.apply_solution(problem, solution, self.type.pk), 3)
+        self.assertEqual(Group.objects.get(pk=own.pk).table_id, own.table_id)
+        self.assertEqual(Table.objects.count(), 3)
+        self.assertFalse(Table.objects.filter(pk=shared.pk).exists())
+        for group in Group.objects.select_related('table'):
+            day, slot, room = solution.assignments[group.pk]
+            self.assertEqual((group.table.day_id, group.table.room_id, group.table.start_time.strftime('%H:%M')),
+                             (day, room, slots[slot][0]))
+        self.assertEqual(len({group.table_id for group in Group.objects.all()}), 3)
+
+    def test_apply_rechecks_under_lock(self):
+        group = self.group('G-1', self.teachers[0])
+        problem = self.problem([group])
+        solution = timetable.solve(problem, time_budget=0.2)
+        day, slot, room = solution.assignments[group.pk]
+        # yechim topilgandan keyin shu xona va vaqt band qilindi
+        start, end = problem.slots[slot]
+        taken = Table.objects.create(start_time=start, end_time=end, room_id=room, type=self.type, day_id=day)
+        self.group('G-2', self.teachers[1], taken)
+
+        with self.assertRaises(timetable.StalePlan) as raised:
+            timetable.apply_solution(problem, solution, self.type.pk)
+        self.assertEqual(raised.exception.conflicts[0]['type'], 'room')
+        self.assertEqual(Group.objects.get(pk=group.pk).table.start_time, datetime.time(14))
+
+    def test_solve_is_staff_only_and_one_at_a_time(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create(phone='+998900000001', is_student=True))
+        self.assertEqual(client.post('/api/timetable/solve/', {}, format='json').status_code, 403)
+
+        client.force_authenticate(self.user)
+        TimetableJob.objects.create(id='a' * 32, data={'status': 'running', 'progress': 10})
+        response = client.post('/api/timetable/solve/', {}, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertIn('error', response.json())
+
+        # to'xtab qolgan vazifa yangisini to'smaydi
+        TimetableJob.objects.filter(pk='a' * 32).update(updated=timezone.now() - datetime.timedelta(minutes=10))
+        with mock.patch.object(timetable.threading, 'Thread') as thread:
+            job_id = timetable.start_job()
+        thread.return_value.start.assert_called_once_with()
+        self.assertEqual(TimetableJob.objects.get(pk='a' * 32).data['status'], 'failed')
+        self.assertEqual(TimetableJob.objects.get(pk=job_id).status, 'running')
+
+    def test_job_is_read_from_db(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        TimetableJob.objects.create(id='a' * 32, status='done', data={'status': 'done', 'assigned': 3})
+        self.assertEqual(client.get(f'/api/timetable/solve/{"a" * 32}/').json(), {'status': 'done', 'assigned': 3})
+        self.assertEqual(client.get(f'/api/timetable/solve/{"b" * 32}/').status_code, 404)
+
+        TimetableJob.objects.create(id='c' * 32, data={'status': 'running', 'progress': 40})
+        TimetableJob.objects.filter(pk='c' * 32).update(updated=timezone.now() - datetime.timedelta(hours=1))
+        self.assertEqual(timetable.get_job('c' * 32)['status'], 'failed')
+
+
+class SearchTests(TestCase):
+    """Qidiruv indeksi: trigram/prefiks/fuzzy so'rovlar, trigger sinxronligi, student bir marta chiqadi"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(phone='+998990000000', full_name='Admin', is_staff=True)
+        cls.teacher = User.objects.create(phone='+998901234567', full_name='Alijonov Vali', is_teacher=True)
+        user = User.objects.create(phone='+998911112233', full_name='Karimova Dilnoza', is_student=True)
+        cls.student = Student.objects.create(user=user, full_name='Karimova Dilnoza', email='dilnoza@example.com', age=17)
+        cls.parent = Parents.objects.create(student=cls.student, full_name='Karimov Rustam', phone_number='+998935556677')
+
+    def found(self, query, **kwargs):
+        return [(row['kind'], row['id']) for row in search.search(query, **kwargs)]
+
+    def test_queries(self):
+        self.assertEqual(self.found('lijon'), [('teacher', self.teacher.pk)])
+        self.assertEqual(self.found('+998 90 123'), [('teacher', self.teacher.pk)])
+        self.assertEqual(self.found('dilnoza@example'), [('student', self.student.pk)])
+        self.assertEqual(self.found('ka'), [('parent', self.parent.pk), ('student', self.student.pk)])
+        self.assertEqual(self.found('karimov', kind='parent'), [('parent', self.parent.pk)])
+        # xatoli yozuv faqat fuzzy bilan topiladi
+        self.assertEqual(self.found('alijnov', fuzzy=False), [])
+        self.assertEqual(self.found('alijnov'), [('teacher', self.teacher.pk)])
+        self.assertEqual(self.found('   '), [])
+
+    def test_student_found_once(self):
+        self.assertEqual(self.found('dilnoza'), [('student', self.student.pk)])
+        self.assertFalse(SearchEntry.objects.filter(kind='user', object_id=self.student.user_id).exists())
+        self.assertTrue(SearchEntry.objects.filter(kind='user', object_id=self.admin.pk).exists())
+
+    def test_index_follows_writes(self):
+        self.teacher.full_name = 'Rahimov Vali'
+        self.teacher.is_teacher = False
+        self.teacher.save()
+        self.assertEqual(self.found('alijonov', fuzzy=False), [])
+        self.assertEqual(self.found('rahimov', fuzzy=False), [('user', self.teacher.pk)])
+        self.teacher.delete()
+        self.assertEqual(self.found('rahimov', fuzzy=False), [])
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT count(*) FROM {search.FTS_TABLE}')
+                self.assertEqual(cursor.fetchone()[0], SearchEntry.objects.count())
+
+    def test_student_entry_follows_user_phone(self):
+        user = self.student.user
+        user.phone = '+998977778899'
+        user.save()
+        self.assertEqual(self.found('97 777 88', fuzzy=False), [('student', self.student.pk)])
+        self.assertEqual(self.found('911112233', fuzzy=False), [])
+
+    @unittest.skipUnless(connection.vendor == 'postgresql', 'pg_trgm faqat PostgreSQL da')
+    def test_postgres_trigram_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT indexdef FROM pg_indexes WHERE indexname = 'configapp_searchentry_text_trgm'")
+            self.assertIn('gin_trgm_ops', cursor.fetchone()[0])
+
+    def test_view(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.get('/api/search/', {'q': 'karimov'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(row['kind'] for row in response.json()['results']), ['parent', 'student'])
+        self.assertEqual(client.get('/api/search/', {'q': 'x', 'kind': 'nope'}).status_code, 400)
+
+
+class PhoneTests(TestCase):
+    """Telefonlar E.164 da saqlanadi va istalgan yozuv shakli bilan aniq tenglik orqali topiladi"""
+
+    def test_normalize_phone(self):
+        for raw, expected in [
+            ('+998 (90) 123-45-67', '+998901234567'),
+            ('998901234567', '+998901234567'),
+            ('00998901234567', '+998901234567'),
+            ('90 123 45 67', '+998901234567'),
+            ('+1 202 555 0101', '+12025550101'),
+            ('abc', 'abc'),
+            ('90x1234567', '90x1234567'),
+            ('', ''),
+            (None, None),
+        ]:
+            self.assertEqual(normalize_phone(raw), expected, raw)
+
+    def test_lookup(self):
+        user = User.objects.create_user('90 000 00 01', 'parol')
+        self.assertEqual(user.phone, '+998900000001')
+        self.assertEqual(User.objects.get(phone='(90) 000-00-01'), user)
+        self.assertEqual(User.objects.get_by_natural_key('998900000001'), user)
+        with CaptureQueriesContext(connection) as queries:
+            User.objects.filter(phone='900000001').exists()
+        self.assertIn("'+998900000001'", queries[0]['sql'])
+
+        response = APIClient().post('/api/sentOTP/', {'phone_number': '900000001'}, format='json')
+        self.assertEqual(response.json()['detail'], 'phone number already exist')
+
+    def test_parent_phone(self):
+        user = User.objects.create(phone='+998900000002', is_student=True)
+        student = Student.objects.create(user=user, full_name='Ali', email='ali@example.com', age=15)
+        parent = Parents.objects.create(student=student, full_name='Vali', phone_number='(90) 123-45-67')
+        parent.refresh_from_db()
+        self.assertEqual(parent.phone_number, '+998901234567')
+        self.assertEqual(Parents.objects.get(phone_number='901234567'), parent)
+
+        serializer = ParentsSerializer(parent, data={'phone_number': '00998 93 111 22 33'}, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(serializer.validated_data['phone_number'], '+998931112233')
+        serializer.save()
+
+        level = AttendanceLevel.objects.create(title='Kelmadi')
+        with self.settings(ATTENDANCE_NOTIFY_LEVELS=[level.pk]):
+            self.assertEqual(notifications.notify_absences(datetime.date(2025, 3, 3), [{'student': student.pk, 'level': level.pk}]), 1)
+        self.assertEqual(list(OutboundMessage.objects.values_list('recipient', flat=True)), ['+998931112233'])
+
+
+    def test_user_phone_migration(self):
+        migration = importlib.import_module('configApp.migrations.0010_normalize_user_phone')
+        user = User.objects.create(phone='+998901112233', full_name='Ali', is_student=True)
+        student = Student.objects.create(user=user, full_name='Ali', email='ali@example.com', age=15)
+        raw = lambda pk, phone: User.objects.filter(pk=pk).update(phone=Value(phone))
+        raw(user.pk, '90 111 22 33')
+        SearchEntry.objects.filter(kind='student').update(extra='90 111 22 33', text='ali 901112233')
+
+        migration.normalize_phones(apps, None)
+        self.assertEqual(User.objects.filter(pk=user.pk).values_list('phone', flat=True).get(), '+998901112233')
+        entry = SearchEntry.objects.get(kind='student', object_id=student.pk)
+        self.assertEqual((entry.extra, entry.text), ('+998901112233', 'ali ali@example.com 998901112233'))
+
+        other = User.objects.create(phone='+998902223344')
+        raw(other.pk, '998901112233')
+        with self.assertRaisesMessage(RuntimeError, f'+998901112233: {user.pk}, {other.pk}'):
+            migration.normalize_phones(apps, None)
+        self.assertEqual(User.objects.filter(pk=other.pk).values_list('phone', flat=True).get(), '998901112233')
+
+
+class OTPStoreTests(TestCase):
+    """OTP store: cooldown, noto'g'ri urinishlardan keyin bloklash, kod bir marta ishlaydi"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = f'{directory.name}/otp.sqlite3'
+        self.store = otp.SQLiteOTPStore(self.path, ttl=300, cooldown=60, max_attempts=3)
+
+    def test_cooldown(self):
+        issued = self.store.issue('+998900000001')
+        self.assertEqual(len(issued.code), 4)
+        again = self.store.issue('+998900000001')
+        self.assertIsNone(again.code)
+        self.assertTrue(0 < again.retry_after <= 60)
+        self.assertIsNotNone(self.store.issue('+998900000002').code)
+
+    def test_attempt_lockout(self):
+        self.store.issue('+998900000001', code='1234')
+        self.assertEqual(self.store.verify('+998900000001', '0000'), otp.INVALID)
+        self.assertEqual(self.store.verify('+998900000001', '1111'), otp.INVALID)
+        self.assertEqual(self.store.verify('+998900000001', '2222'), otp.LOCKED)
+        self.assertEqual(self.store.verify('+998900000001', '1234'), otp.LOCKED)
+
+    def test_single_use(self):
+        self.store.issue('+998900000001', code='1234')
+        self.assertEqual(self.store.verify('+998900000001', '1234', consume=False), otp.OK)
+        self.assertEqual(self.store.verify('+998900000001', '1234'), otp.OK)
+        self.assertEqual(self.store.verify('+998900000001', '1234'), otp.EXPIRED)
+        # boshqa raqam uchun issue eskirgan qatorlarni tozalaydi: ishlatilgan kodning cooldown i qolishi kerak
+        self.store.issue('+998900000002')
+        self.assertIsNone(self.store.issue('+998900000001').code)
+
+    def test_cleanup(self):
+        store = otp.SQLiteOTPStore(self.path, ttl=0, cooldown=0)
+        store.issue('+998900000001', code='1234')
+        self.assertEqual(store.verify('+998900000001', '1234'), otp.EXPIRED)
+        store.issue('+998900000002')
+        phones = [row[0] for row in store._connect().execute('SELECT phone FROM otp')]
+        self.assertEqual(phones, ['+998900000002'])
+
+
+class NotificationTests(TestCase):
+    """Xabarlar navbati: claim/lease, retry va backoff, OTP matni saqlanmaydi, yo'qlama xabari takrorlanmaydi"""
+
+    def setUp(self):
+        notifications.LocMemGateway.outbox.clear()
+
+    def queue(self, count, kind='attendance'):
+        notifications.enqueue_many([(f'+99890000{i:04d}', f'xabar {i}') for i in range(count)], kind=kind)
+
+    def test_claim_and_lease(self):
+        self.queue(3)
+        first = notifications.claim(2, lease=60)
+        self.assertEqual([message.attempts for message in first], [1, 1])
+        self.assertEqual(OutboundMessage.objects.filter(status='sending').count(), 2)
+        second = notifications.claim(2, lease=60)
+        self.assertEqual(len(second), 1)
+        self.assertFalse({message.pk for message in first} & {message.pk for message in second})
+        self.assertEqual(notifications.claim(2, lease=60), [])
+
+        # worker o'lib qoldi: lease tugagach xabar qaytadan olinadi
+        OutboundMessage.objects.filter(pk=first[0].pk).update(leased_until=timezone.now() - datetime.timedelta(seconds=1))
+        reclaimed = notifications.claim(2, lease=60)
+        self.assertEqual([(message.pk, message.attempts) for message in reclaimed], [(first[0].pk, 2)])
+
+    def test_retry_and_fail(self):
+        self.queue(2)
+        gateway = notifications.LocMemGateway(failure_rate=1)
+        started = timezone.now()
+        self.assertEqual(notifications.deliver(notifications.claim(10, 60), gateway, max_attempts=2, backoff=10), (0, 2))
+        for message in OutboundMessage.objects.all():
+            self.assertEqual((message.status, message.attempts, message.last_error), ('pending', 1, 'simulated failure'))
+            self.assertIsNone(message.leased_until)
+            # backoff * 2**0 * [0.5, 1.5]
+            self.assertTrue(started + datetime.timedelta(seconds=5) <= message.next_attempt_at
+                            <= timezone.now() + datetime.timedelta(seconds=15))
+        self.assertEqual(notifications.claim(10, 60), [])
+
+        OutboundMessage.objects.update(next_attempt_at=timezone.now())
+        notifications.deliver(notifications.claim(10, 60), gateway, max_attempts=2, backoff=10)
+        self.assertEqual(set(OutboundMessage.objects.values_list('status', 'attempts')), {('failed', 2)})
+
+    def test_gateway_exception(self):
+        class BrokenGateway(notifications.Gateway):
+            def send_batch(self, messages):
+                raise ConnectionError('timeout')
+
+        self.queue(2)
+        with self.assertLogs('configApp.notifications', 'ERROR'):
+            self.assertEqual(notifications.deliver(notifications.claim(10, 60), BrokenGateway(), 5, 1), (0, 2))
+        self.assertEqual(set(OutboundMessage.objects.values_list('status', 'last_error')), {('pending', 'timeout')})
+
+        OutboundMessage.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(notifications.deliver(notifications.claim(10, 60), notifications.LocMemGateway(), 5, 1), (2, 0))
+        self.assertEqual(len(notifications.LocMemGateway.outbox), 2)
+        self.assertEqual(set(OutboundMessage.objects.values_list('status', 'last_error')), {('sent', '')})
+
+    def test_otp_body_is_redacted(self):
+        notifications.enqueue('+998900000001', 'Tasdiqlash kodi: 4321', kind='otp')
+        notifications.enqueue('+998900000002', 'Tasdiqlash kodi: 8765', kind='otp')
+        self.queue(1)
+        with self.assertLogs('configApp.notifications', 'INFO') as logs:
+            notifications.deliver(notifications.claim(10, 60), notifications.ConsoleGateway(), 5, 1)
+        self.assertFalse(any('4321' in line or '8765' in line for line in logs.output))
+        self.assertIn('xabar 0', '\n'.join(logs.output))
+        self.assertEqual(set(OutboundMessage.objects.filter(kind='otp').values_list('body', flat=True)), {'***'})
+        self.assertEqual(OutboundMessage.objects.get(kind='attendance').body, 'xabar 0')
+
+        notifications.enqueue('+998900000003', 'Tasdiqlash kodi: 1111', kind='otp')
+        notifications.deliver(notifications.claim(10, 60), notifications.LocMemGateway(failure_rate=1), 1, 1)
+        self.assertEqual(OutboundMessage.objects.get(recipient='+998900000003').body, '***')
+
+    def test_roll_call_resubmit_notifies_once(self):
+        user = User.objects.create(phone='+998990000000', is_staff=True)
+        present, absent = AttendanceLevel.objects.create(title='Keldi'), AttendanceLevel.objects.create(title='Kelmadi')
+        table = Table.objects.create(start_time=datetime.time(8), end_time=datetime.time(9),
+                                     room=Rooms.objects.create(title='Xona'), type=TableType.objects.create(title='Toq'))
+        group = Group.objects.create(name='Guruh', title='G-1', course=Course.objects.create(name='python', title='Python'),
+                                     table=table, start_date=datetime.date(2025, 1, 1), end_date=datetime.date(2025, 12, 31))
+        student = Student.objects.create(user=User.objects.create(phone='+998900000010', is_student=True),
+                                         full_name='Ali', email='ali@example.com', age=15)
+        group.students.add(student)
+        Parents.objects.create(student=student, full_name='Vali', phone_number='+998901234567')
+        client = APIClient()
+        client.force_authenticate(user)
+
+        def roll_call(level):
+            response = client.post('/api/attendance/roll-call/', {
+                'group': group.pk, 'date': '2025-03-03', 'items': [{'student': student.pk, 'level': level.pk}],
+            }, format='json')
+            self.assertEqual(response.status_code, 200, response.content)
+
+        with self.settings(ATTENDANCE_NOTIFY_LEVELS=[absent.pk]):
+            roll_call(absent)
+            roll_call(absent)
+            self.assertEqual(OutboundMessage.objects.count(), 1)
+            roll_call(present)
+            self.assertEqual(OutboundMessage.objects.count(), 1)
+            roll_call(absent)
+        self.assertEqual(list(OutboundMessage.objects.values_list('body', flat=True)), ['Ali: 03.03.2025 - Kelmadi'] * 2)
+
+
+class AsyncBootstrapTests(TransactionTestCase):
+    """ASGI bootstrap viewlari sync variantlari bilan bir xil body, ETag va 304 beradi"""
+    PATHS = [('/api/group_get/', '/api/async/group_get/'), ('/api/student/', '/api/async/student/')]
+
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create(phone='+998990000000', full_name='Ustoz', is_teacher=True)
+        Worker.objects.create(user=user)
+        course = Course.objects.create(name='python', title='Python')
+        table = Table.objects.create(start_time=datetime.time(8), end_time=datetime.time(9, 30),
+                                     room=Rooms.objects.create(title='A-1'), type=TableType.objects.create(title='Toq'))
+        group = Group.objects.create(name='Guruh', title='G-1', course=course, table=table,
+                                     start_date=datetime.date(2025, 1, 1), end_date=datetime.date(2025, 6, 30))
+        student = Student.objects.create(user=User.objects.create(phone='+998900000001', is_student=True),
+                                         full_name='Ali', email='ali@example.com', age=15)
+        group.students.add(student)
+
+    def assertSame(self, sync_path, async_path, **headers):
+        async_response = self.client.get(async_path, **headers)
+        sync_response = self.client.get(sync_path, **headers)
+        self.assertEqual(async_response.status_code, 200)
+        self.assertEqual(async_response['Content-Type'], sync_response['Content-Type'])
+        self.assertEqual(async_response.content, sync_response.content)
+        self.assertEqual(async_response['ETag'], sync_response['ETag'])
+        self.assertEqual(async_response['Cache-Control'], sync_response['Cache-Control'])
+        return sync_response
+
+    def test_parity(self):
+        for sync_path, async_path in self.PATHS:
+            with self.subTest(async_path):
+                # birinchi so'rov: hamma section keshda yo'q va parallel quriladi
+                response = self.assertSame(sync_path, async_path)
+                not_modified = self.client.get(async_path, HTTP_IF_NONE_MATCH=response['ETag'])
+                self.assertEqual(not_modified.status_code, 304)
+                self.assertFalse(not_modified.content)
+
+                cache.clear()
+                self.client.get(sync_path)
+                self.assertSame(sync_path, async_path)
+
+    def test_negotiation(self):
+        for sync_path, async_path in self.PATHS:
+            with self.subTest(async_path):
+                response = self.assertSame(sync_path, async_path, HTTP_ACCEPT='application/json; indent=2')
+                self.assertIn(b'\n  ', response.content)
+                self.assertSame(sync_path, f'{async_path}?format=json')
+                if importlib.util.find_spec('msgpack'):
+                    self.assertSame(sync_path, async_path, HTTP_ACCEPT='application/msgpack')
+                sync_response = self.client.get(sync_path, HTTP_ACCEPT='application/xml')
+                async_response = self.client.get(async_path, HTTP_ACCEPT='application/xml')
+                self.assertEqual(async_response.status_code, 406)
+                self.assertEqual(async_response.content, sync_response.content)
+
+    def test_executor_threads_clean_up_connections(self):
+        with mock.patch.object(snapshots, 'close_old_connections', wraps=close_old_connections) as cleanup:
+            self.client.get('/api/async/group_get/')
+        # _lookup va uchta section: har biri oldidan va keyin
+        self.assertEqual(cleanup.call_count, 8)
+
+    def test_write_invalidates_both(self):
+        etags = {path: self.client.get(path)['ETag'] for path, _ in self.PATHS}
+        Course.objects.create(name='go', title='Go')
+        for sync_path, async_path in self.PATHS:
+            response = self.assertSame(sync_path, async_path)
+            self.assertNotEqual(response['ETag'], etags[sync_path])
+            self.assertIn('Go', [course['label'] for course in response.json()['courses']])
+
+
+class PasswordHashingTests(TestCase):
+    """Parol bir marta hash qilinadi, eski hash login da yangilanadi, ommaviy ro'yxatdan o'tkazish ishlaydi"""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def users(self, count, start=0):
+        return [
+            {'phone': f'90 000 00 {start + i:02d}', 'password': f'parol-{start + i}', 'full_name': f'Ali {i}'}
+            for i in range(count)
+        ]
+
+    def test_register_hashes_once(self):
+        response = self.client.post('/api/userApi/', self.users(1)[0], format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        user = User.objects.get(phone='+998900000000')
+        self.assertEqual(user.password.split('$')[0], hashers.get_hasher().algorithm)
+        self.assertTrue(hashers.check_password('parol-0', user.password))
+
+    def test_rehash_on_login(self):
+        user = User.objects.create(phone='+998900000001', password=hashers.make_password('eski', hasher='pbkdf2_sha256'))
+        self.assertTrue(user.check_password('eski'))
+        user.refresh_from_db()
+        self.assertEqual(user.password.split('$')[0], hashers.get_hasher().algorithm)
+        self.assertTrue(user.check_password('eski'))
+        self.assertFalse(user.check_password('yangi'))
+
+    def test_bulk_register(self):
+        self.assertEqual(self.client.post('/api/userApi/', self.users(2), format='json').status_code, 403)
+
+        self.client.force_authenticate(User.objects.create(phone='+998990000000', is_staff=True))
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/userApi/', self.users(3), format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        users = User.objects.filter(full_name__startswith='Ali').order_by('phone')
+        self.assertEqual([user.phone for user in users], ['+998900000000', '+998900000001', '+998900000002'])
+        for i, user in enumerate(users):
+            self.assertTrue(hashers.check_password(f'parol-{i}', user.password))
+        self.assertEqual(SearchEntry.objects.filter(kind='user', object_id__in=users.values('pk')).count(), 3)
+
+        response = self.client.post('/api/userApi/', self.users(2, start=5) + self.users(1, start=5), format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('+998900000005', str(response.json()))
+        self.assertEqual(self.client.post('/api/userApi/', self.users(1, start=1), format='json').status_code, 400)
+
+    def test_process_pool(self):
+        with self.settings(PASSWORD_HASH_WORKERS=1):
+            self.addCleanup(self.shutdown_pool)
+            encoded = hashing.hash_passwords(['bir', 'ikki'])
+            self.assertEqual(hashing.verify_password('ikki', encoded[1]), (True, False))
+            self.assertTrue(hashers.check_password('bir', hashing.hash_password('bir')))
+        self.assertIsNotNone(hashing._pool)
+
+    def shutdown_pool(self):
+        hashing._pool.shutdown()
+        hashing._pool = None
+
+
+class MetricsTests(TestCase):
+    """PerformanceMiddleware histogramlari va /metrics ning Prometheus formati"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(phone='+998990000000', is_staff=True)
+        for i in range(3):
+            Course.objects.create(name=f'kurs-{i}', title=f'Kurs {i}')
+
+    def setUp(self):
+        cache.clear()
+        metrics.registry.reset()
+        self.addCleanup(metrics.registry.reset)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def histogram(self, name, view, method='GET'):
+        return metrics.registry.histograms[name, view, method]
+
+    def test_request_histograms(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/course/')
+        self.assertEqual(response.status_code, 200)
+        # keyingi so'rov boshida queries_log tozalanadi
+        query_count = len(queries)
+        self.client.get('/api/course/')
+        self.client.get('/api/group_get/')
+
+        self.assertEqual(metrics.registry.requests[('api/course/', 'GET', 200)], 2)
+        self.assertEqual(metrics.registry.requests[('api/group_get/', 'GET', 200)], 1)
+        self.assertEqual(self.histogram('http_request_duration_seconds', 'api/course/').count, 2)
+        db_queries = self.histogram('http_request_db_queries', 'api/course/')
+        # ikkinchi so'rov keshdan javob beradi
+        self.assertEqual(db_queries.sum, query_count)
+        self.assertEqual(db_queries.counts[0], 1)
+        self.assertGreater(self.histogram('http_request_db_duration_seconds', 'api/course/').sum, 0)
+        self.assertEqual(self.histogram('http_response_size_bytes', 'api/course/').sum, 2 * len(response.content))
+        serializer = self.histogram('http_request_serializer_duration_seconds', 'api/course/')
+        self.assertEqual(serializer.count, 2)
+        self.assertGreater(serializer.sum, 0)
+
+    def test_exposition(self):
+        self.client.get('/api/course/')
+        metrics.registry.observe('a"b\\c', 'GET', 200, {'http_request_duration_seconds': 0.003})
+        self.client.force_login(self.user)
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        text = response.content.decode()
+        self.assertIn('# TYPE http_request_duration_seconds histogram', text)
+        self.assertIn('http_requests_total{view="api/course/",method="GET",status="200"} 1', text)
+        self.assertIn('http_requests_total{view="a\\"b\\\\c",method="GET",status="200"} 1', text)
+
+        buckets = re.findall(r'^http_request_duration_seconds_bucket\{view="a\\"b\\\\c",method="GET",le="([^"]+)"\} (\d+)$', text, re.M)
+        self.assertEqual(len(buckets), len(metrics.TIME_BUCKETS) + 1)
+        self.assertEqual(buckets[-1], ('+Inf', '1'))
+        counts = [int(count) for _, count in buckets]
+        self.assertEqual(counts, sorted(counts))
+        self.assertEqual(dict(buckets)['0.0025'], '0')
+        self.assertEqual(dict(buckets)['0.005'], '1')
+        self.assertIn('http_request_duration_seconds_count{view="a\\"b\\\\c",method="GET"} 1', text)
+
+    def test_token_server_timing_and_slow_log(self):
+        with self.settings(METRICS={**settings.METRICS, 'TOKEN': 'maxfiy', 'SERVER_TIMING': True, 'SLOW_REQUEST_MS': 0}):
+            client = APIClient()
+            client.force_authenticate(self.user)
+            with self.assertLogs('configApp.slow_requests', 'WARNING') as logs:
+                self.assertEqual(client.get('/metrics').status_code, 401)
+                self.assertEqual(client.get('/metrics', HTTP_AUTHORIZATION='Bearer maxfiy').status_code, 200)
+                response = client.get('/api/course/')
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", ser;dur=[\d.]+, render;dur=[\d.]+, total;dur=[\d.]+$')
+        self.assertIn('slow request GET /api/course/ (api/course/)', logs.output[-1])
+        self.assertNotIn('Server-Timing', self.client.get('/api/course/'))
+
+    def test_private_without_token(self):
+        client = APIClient()
+        self.assertEqual(client.get('/metrics').status_code, 403)
+        client.force_login(User.objects.create(phone='+998990000001'))
+        self.assertEqual(client.get('/metrics').status_code, 403)
+        client.force_login(self.user)
+        self.assertEqual(client.get('/metrics').status_code, 200)
+        client.logout()
+        with self.settings(DEBUG=True):
+            self.assertEqual(client.get('/metrics').status_code, 200)
+
+    def test_fingerprint(self):
+        self.assertEqual(
+            metrics.fingerprint("SELECT *  FROM t WHERE id IN (1, 2, 3) AND name = 'a''b' LIMIT 20"),
+            'SELECT * FROM t WHERE id IN (?) AND name = ? LIMIT ?',
+        )
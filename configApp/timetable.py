@@ -0,0 +1,373 @@
+import datetime
+import random
+import threading
+import time
+import uuid
+from collections import namedtuple
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from . import schedule
+from .caching import bump_model_version
+from .models import Day, Group, Rooms, Table, TableType, TimetableJob
+
+DEFAULT_SLOTS = (
+    ('08:00', '09:30'),
+    ('09:45', '11:15'),
+    ('11:30', '13:00'),
+    ('14:00', '15:30'),
+    ('15:45', '17:15'),
+    ('17:30', '19:00'),
+)
+# tugagan vazifalar shuncha saqlanadi; progress yangilanmay qolgan running vazifa JOB_STALE dan keyin failed
+JOB_TIMEOUT = 60 * 60
+JOB_STALE = 5 * 60
+
+GroupDemand = namedtuple('GroupDemand', 'id size teachers')
+Room = namedtuple('Room', 'id capacity')
+Busy = namedtuple('Busy', 'day start end room teachers')
+# hal qilinayotgan to'plamdan tashqaridagi jadval: joyidan siljitilmaydi
+FIXED = GroupDemand(None, 0, frozenset())
+Solution = namedtuple('Solution', 'assignments unassigned iterations elapsed')
+
+
+class JobRunning(Exception):
+    pass
+
+
+class StalePlan(Exception):
+    """Yechim o'qilgan holatdan keyin jadval o'zgargan: reja yozilmaydi"""
+
+    def __init__(self, conflicts):
+        super().__init__(f"jadval yechim topilgandan keyin o'zgargan: {len(conflicts)} ta to'qnashuv")
+        self.conflicts = conflicts
+
+
+class Problem:
+    """
+    groups: GroupDemand ro'yxati, rooms: Room ro'yxati, days: kun id lari,
+    slots: (start, end) juftliklari, availability: {worker_id: {day_id, ...}}
+    (ko'rsatilmagan o'qituvchi har kuni bo'sh hisoblanadi), busy: o'zgarmaydigan
+    Busy jadvallar (kuni None bo'lsa har kuni).
+    """
+
+    def __init__(self, groups, rooms, days, slots, availability=None, busy=()):
+        self.groups = list(groups)
+        self.rooms = sorted(rooms, key=lambda room: (room.capacity is None, room.capacity or 0))
+        self.days = list(days)
+        self.slots = list(slots)
+        self.availability = availability or {}
+        self.busy = list(busy)
+        self.times = [(day, slot) for slot in range(len(self.slots)) for day in self.days]
+
+    def fits(self, group, room):
+        return room.capacity is None or room.capacity >= group.size
+
+    def available(self, group, day):
+        return all(day in self.availability.get(teacher, (day,)) for teacher in group.teachers)
+
+    def domain_size(self, group):
+        rooms = sum(1 for room in self.rooms if self.fits(group, room))
+        days = sum(1 for day in self.days if self.available(group, day))
+        return rooms * days * len(self.slots)
+
+
+class _State:
+    """(kun, slot) bo'yicha xona va o'qituvchi bandligi"""
+
+    def __init__(self, problem):
+        self.problem = problem
+        self.rooms = {time_: {} for time_ in problem.times}
+        self.teachers = {time_: {} for time_ in problem.times}
+        self.assignments = {}
+        for busy in problem.busy:
+            for day, slot in problem.times:
+                start, end = problem.slots[slot]
+                if (busy.day is None or busy.day == day) and busy.start < end and start < busy.end:
+                    self.rooms[day, slot][busy.room] = FIXED
+                    for teacher in busy.teachers:
+                        self.teachers[day, slot][teacher] = FIXED
+
+    def place(self, group, time_, room):
+        self.rooms[time_][room.id] = group
+        for teacher in group.teachers:
+            self.teachers[time_][teacher] = group
+        self.assignments[group.id] = (time_, room)
+
+    def remove(self, group):
+        time_, room = self.assignments.pop(group.id)
+        del self.rooms[time_][room.id]
+        for teacher in group.teachers:
+            del self.teachers[time_][teacher]
+
+    def times_for(self, group, rnd):
+        times = [time_ for time_ in self.problem.times if self.problem.available(group, time_[0])]
+        rnd.shuffle(times)
+        times.sort(key=lambda time_: len(self.rooms[time_]))
+        return times
+
+    def free_room(self, group, time_):
+        busy = self.rooms[time_]
+        return next(
+            (room for room in self.problem.rooms if room.id not in busy and self.problem.fits(group, room)),
+            None,
+        )
+
+    def try_place(self, group, rnd, exclude=None):
+        for time_ in self.times_for(group, rnd):
+            if time_ == exclude or any(teacher in self.teachers[time_] for teacher in group.teachers):
+                continue
+            room = self.free_room(group, time_)
+            if room is not None:
+                self.place(group, time_, room)
+                return True
+        return False
+
+    def try_eject(self, group, rnd):
+        """
+        Bitta to'sib turgan guruhni boshqa joyga ko'chirib, o'rniga shu guruhni qo'yadi.
+        """
+        for time_ in self.times_for(group, rnd):
+            blockers = {self.teachers[time_][teacher] for teacher in group.teachers if teacher in self.teachers[time_]}
+            if len(blockers) > 1:
+                continue
+            rooms = [room for room in self.problem.rooms if self.problem.fits(group, room)]
+            for room in rooms:
+                occupant = self.rooms[time_].get(room.id)
+                victims = blockers | ({occupant} if occupant else set())
+                if len(victims) != 1 or FIXED in victims:
+                    continue
+                victim = victims.pop()
+                undo = self.assignments[victim.id]
+                self.remove(victim)
+                if self.free_room(group, time_) is None or room.id in self.rooms[time_]:
+                    self.place(victim, *undo)
+                    continue
+                self.place(group, time_, room)
+                if self.try_place(victim, rnd, exclude=time_):
+                    return True
+                self.remove(group)
+                self.place(victim, *undo)
+        return False
+
+
+def _greedy(problem, order, rnd):
+    """
+    Guruhlarni berilgan tartibda eng kam band vaqtga, sig'adigan eng kichik
+    bo'sh xonaga joylaydi; joylashmaganlar uchun bitta guruhni siqib chiqarib ko'radi.
+    """
+    state = _State(problem)
+    unassigned = [group for group in order if not state.try_place(group, rnd)]
+    unassigned = [group for group in unassigned if not state.try_eject(group, rnd)]
+    assignments = {
+        group_id: (time_[0], time_[1], room.id) for group_id, (time_, room) in state.assignments.items()
+    }
+    return assignments, unassigned
+
+
+def solve(problem, time_budget=10, seed=0, progress=None):
+    """
+    Squeaky-wheel qidiruv: eng cheklangan guruhlardan boshlab greedy joylash,
+    joylashmagan guruhlar keyingi urinishda navbat boshiga o'tkaziladi.
+    Vaqt tugaguncha yoki hamma guruh joylashguncha davom etadi.
+    """
+    rnd = random.Random(seed)
+    started = time.monotonic()
+    domain = {group.id: problem.domain_size(group) for group in problem.groups}
+    order = sorted(problem.groups, key=lambda group: (domain[group.id], -len(group.teachers), -group.size))
+
+    best, best_unassigned, iterations = {}, list(problem.groups), 0
+    while True:
+        iterations += 1
+        assignments, unassigned = _greedy(problem, order, rnd)
+        if len(unassigned) < len(best_unassigned):
+            best, best_unassigned = assignments, unassigned
+        elapsed = time.monotonic() - started
+        if progress:
+            progress(iterations, len(problem.groups) - len(best_unassigned), len(problem.groups), elapsed)
+        if not best_unassigned or elapsed >= time_budget:
+            break
+        failed = {group.id for group in unassigned}
+        order = unassigned + [group for group in order if group.id not in failed]
+
+    return Solution(best, [group.id for group in best_unassigned], iterations, time.monotonic() - started)
+
+
+def load_problem(slots=DEFAULT_SLOTS, day_ids=None, availability=None, group_ids=None):
+    """
+    Faqat group_ids (bo'lmasa hamma guruh) joylashtiriladi. Boshqa har bir Table
+    (to'plamdan tashqaridagi guruhlarniki yoki hech kimga tegishli emas) xona va
+    o'qituvchilari bilan band hisoblanadi.
+    """
+    groups = Group.objects.annotate(size=Count('students', distinct=True)).order_by('id')
+    if group_ids:
+        groups = groups.filter(id__in=group_ids)
+    groups = list(groups.values_list('id', 'size'))
+    solved = {group_id for group_id, _ in groups}
+    teachers, table_teachers = {}, {}
+    links = Group.teacher.through.objects.values_list('group_id', 'group__table_id', 'worker_id')
+    for group_id, table_id, worker_id in links.iterator():
+        if group_id in solved:
+            teachers.setdefault(group_id, set()).add(worker_id)
+        else:
+            table_teachers.setdefault(table_id, set()).add(worker_id)
+
+    own, shared = set(), set()
+    for group_id, table_id in Group.objects.values_list('id', 'table_id').iterator():
+        (own if group_id in solved else shared).add(table_id)
+    busy = [
+        Busy(day_id, start, end, room_id, frozenset(table_teachers.get(table_id, ())))
+        for table_id, day_id, start, end, room_id
+        in Table.objects.values_list('id', 'day_id', 'start_time', 'end_time', 'room_id').iterator()
+        if table_id not in own or table_id in shared
+    ]
+
+    days = day_ids or list(Day.objects.order_by('id').values_list('id', flat=True))
+    return Problem(
+        [GroupDemand(group_id, size, frozenset(teachers.get(group_id, ()))) for group_id, size in groups],
+        [Room(room_id, capacity) for room_id, capacity in Rooms.objects.values_list('id', 'capacity')],
+        days,
+        [(datetime.time.fromisoformat(start), datetime.time.fromisoformat(end)) for start, end in slots],
+        {int(worker): set(worker_days) for worker, worker_days in (availability or {}).items()},
+        busy,
+    )
+
+
+def check_solution(problem, solution, groups):
+    """Yangi joylar hal qilinmaydigan guruhlar va bir-biri bilan to'qnashmasligi kerak, aks holda StalePlan"""
+    teachers = {}
+    for group_id, worker_id in Group.teacher.through.objects.filter(group_id__in=groups).values_list('group_id', 'worker_id'):
+        teachers.setdefault(group_id, set()).add(worker_id)
+    bookings = []
+    for group_id, (day_id, slot, room_id) in solution.assignments.items():
+        start, end = problem.slots[slot]
+        group = groups[group_id]
+        bookings.append(schedule.Booking(schedule.minutes(start), schedule.minutes(end), group_id, None, room_id,
+                                         frozenset(teachers.get(group_id, ())), group.start_date, group.end_date, day_id))
+    index = schedule.locked_index(
+        {booking.room for booking in bookings}, set().union(*(booking.teachers for booking in bookings)),
+        {booking.day for booking in bookings},
+    )
+    # hal qilinayotgan guruhlarning eski joylari bo'shaydi
+    conflicts = [conflict for booking in bookings for conflict in index.conflicts(booking, ignore_groups=groups)]
+    conflicts += schedule.ScheduleIndex(bookings).report()
+    if conflicts:
+        raise StalePlan(conflicts)
+
+
+def apply_solution(problem, solution, table_type_id):
+    """
+    Bitta tranzaksiyada yozadi. Faqat shu guruhga tegishli Table joyida yangilanadi;
+    boshqa guruh bilan bo'lingan Table o'rniga yangisi yaratiladi, egasiz qolgan eskisi o'chiriladi.
+    Reja tranzaksiyadan tashqaridagi holatdan tuzilgan: yozishdan oldin lock ostida qayta tekshiriladi.
+    """
+    group_ids = list(solution.assignments)
+    with transaction.atomic():
+        groups = Group.objects.select_for_update().in_bulk(group_ids)
+        check_solution(problem, solution, groups)
+        users = {}
+        for group_id, table_id in Group.objects.filter(table_id__in={group.table_id for group in groups.values()}) \
+                .values_list('id', 'table_id'):
+            users.setdefault(table_id, set()).add(group_id)
+        tables = Table.objects.in_bulk(users)
+
+        updated, created, replaced = [], [], set()
+        for group_id in group_ids:
+            group = groups[group_id]
+            day_id, slot, room_id = solution.assignments[group_id]
+            start_time, end_time = problem.slots[slot]
+            if users[group.table_id] == {group_id}:
+                table = tables[group.table_id]
+                table.start_time, table.end_time, table.room_id, table.day_id = start_time, end_time, room_id, day_id
+                updated.append(table)
+            else:
+                replaced.add(group.table_id)
+                created.append((group, Table(start_time=start_time, end_time=end_time, room_id=room_id,
+                                             day_id=day_id, type_id=table_type_id)))
+
+        Table.objects.bulk_update(updated, ['start_time', 'end_time', 'room', 'day'], batch_size=500)
+        Table.objects.bulk_create([table for _, table in created])
+        for group, table in created:
+            group.table_id = table.pk
+        Group.objects.bulk_update([group for group, _ in created], ['table'], batch_size=500)
+        Table.objects.filter(pk__in=replaced, group__isnull=True).delete()
+        bump_model_version(Table)
+        bump_model_version(Group)
+    return len(group_ids)
+
+
+def _set_job(job_id, **data):
+    with transaction.atomic():
+        job = TimetableJob.objects.select_for_update().get(pk=job_id)
+        job.data.update(data)
+        job.status = job.data['status']
+        job.save(update_fields=['data', 'status', 'updated'])
+
+
+def get_job(job_id):
+    job = TimetableJob.objects.filter(pk=job_id).first()
+    if job is None:
+        return None
+    if job.status == 'running' and job.updated < timezone.now() - datetime.timedelta(seconds=JOB_STALE):
+        # vazifani bajarayotgan process to'xtagan (restart, OOM)
+        return {**job.data, 'status': 'failed', 'error': "vazifa to'xtab qoldi"}
+    return job.data
+
+
+def _run_job(job_id, options):
+    try:
+        problem = load_problem(options['slots'], options['days'], options['availability'], options['groups'])
+        last = [0.0]
+
+        def progress(iterations, assigned, total, elapsed):
+            if elapsed - last[0] >= 0.5 or assigned == total:
+                last[0] = elapsed
+                _set_job(job_id, iterations=iterations, assigned=assigned, total=total, elapsed=round(elapsed, 2),
+                         progress=round(min(elapsed / options['time_budget'], 1) * 100, 1))
+
+        solution = solve(problem, options['time_budget'], progress=progress)
+        result = {
+            'status': 'done',
+            'progress': 100,
+            'iterations': solution.iterations,
+            'assigned': len(solution.assignments),
+            'total': len(problem.groups),
+            'unassigned': solution.unassigned,
+            'elapsed': round(solution.elapsed, 2),
+            'applied': 0,
+        }
+        if options['apply'] and not solution.unassigned:
+            result['applied'] = apply_solution(problem, solution, options['table_type'])
+        _set_job(job_id, **result)
+    except StalePlan as e:
+        _set_job(job_id, status='failed', error=str(e), conflicts=e.conflicts)
+    except Exception as e:
+        _set_job(job_id, status='failed', error=str(e))
+    finally:
+        connection.close()
+
+
+def start_job(slots=DEFAULT_SLOTS, days=None, availability=None, groups=None, table_type=None,
+              time_budget=10, apply=False):
+    if apply and table_type is None:
+        table_type = TableType.objects.order_by('id').values_list('id', flat=True).first()
+    job_id = uuid.uuid4().hex
+    now = timezone.now()
+    TimetableJob.objects.filter(updated__lt=now - datetime.timedelta(seconds=JOB_TIMEOUT)).delete()
+    # to'xtab qolgan vazifa yangisini to'sib turmasin
+    stale = TimetableJob.objects.filter(status='running', updated__lt=now - datetime.timedelta(seconds=JOB_STALE))
+    for stale_id in stale.values_list('pk', flat=True):
+        _set_job(stale_id, status='failed', error="vazifa to'xtab qoldi")
+    try:
+        with transaction.atomic():
+            TimetableJob.objects.create(id=job_id, data={'status': 'running', 'progress': 0})
+    except IntegrityError:
+        raise JobRunning('boshqa jadval vazifasi hali ishlayapti')
+    options = {
+        'slots': slots, 'days': days, 'availability': availability, 'groups': groups,
+        'table_type': table_type, 'time_budget': time_budget, 'apply': apply,
+    }
+    threading.Thread(target=_run_job, args=(job_id, options), daemon=True).start()
+    return job_id
@@ -32,8 +32,12 @@ urlpatterns = [
     path('update/user/<int:id>/', UserUpdateView.as_view(), name='user-update'), 
     path('delete/user/<int:id>/', UserDeleteView.as_view(), name='user-delete'),
     path('userApi/', RegisterUserApi.as_view()),
+    path('export/<str:dataset>/', ExportView.as_view(), name='export'),
     path("statistics/", StatisticsView.as_view(), name="api_statistics_list"),
     path("enrollment/<int:pk>/", EnrollmentUpdateDeleteView.as_view(), name="enrollment_update_delete"),
+    path("attendance/roll-call/", AttendanceRollCallView.as_view(), name="attendance_roll_call"),
+    path("attendance/rates/", AttendanceRateView.as_view(), name="attendance_rates"),
+    path("search/", SearchView.as_view(), name="search"),
         
     path('refresh_password/', ChangePasswordView.as_view()),
     path('sentOTP/', PhoneSendOTP.as_view()),
@@ -51,15 +55,21 @@ urlpatterns = [
     path('teacher-groups/<int:teacher_id>/',TeacherGroupsAPIView.as_view(),name="teacher_groups"),
     
     path('create/student/',StudentCreateAPIView.as_view(),name='add_student'),
+    path('import/students/', StudentImportView.as_view(), name='import_students'),
     path('update/student/<int:id>/',StudentUpdateView.as_view(),name="update_student"),
     path('students-groups/', StudentGroupListView.as_view(), name='students-groups'),
     path('student-groups/<int:student_id>/', StudentGroupsAPIView.as_view(), name="student_groups"),
     path('group_get/', GroupApi.as_view()),
+    path('async/group_get/', GroupApiAsync.as_view()),
+    path('conflicts/', ScheduleConflictsView.as_view(), name='schedule_conflicts'),
+    path('timetable/solve/', TimetableSolveView.as_view(), name='timetable_solve'),
+    path('timetable/solve/<str:job_id>/', TimetableSolveView.as_view(), name='timetable_job'),
 
     path('workerAPI/', WorkerApiView.as_view()),
     path('workerId/<int:pk>/', WorkerApiViewId.as_view()),
     
     path('student/', StudentApiView.as_view()),
+    path('async/student/', StudentApiAsync.as_view()),
     path('student/<int:pk>/', StudentApiViewId.as_view()),
     path('students/',StudentListView.as_view(),name="all_students"),
     path('student/<int:id>/',StudentRetrieveAPIView.as_view(),name="student"),
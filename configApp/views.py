@@ -1,39 +1,61 @@
 import random
+from django.conf import settings
 from django.core.cache import cache
 from django.shortcuts import render, get_object_or_404
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import generics, permissions, status
 from rest_framework.generics import ListAPIView, UpdateAPIView, RetrieveAPIView
 from rest_framework.pagination import PageNumberPagination, LimitOffsetPagination
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from .models import *
 from .serializers import *
-from django.contrib.auth.hashers import make_password
 from rest_framework.viewsets import ModelViewSet
 from rest_framework import viewsets
 from django.db.models import Count
 from django.utils.dateparse import parse_date
 from rest_framework.decorators import api_view, action
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.views import View
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 import random
+from . import exporting, metrics, notifications, otp, schedule, search, statistics, timetable
+from .pagination import ViewSetPagination
+from .phones import normalize_phone
+from .caching import CachedResponseMixin
+from .snapshots import abootstrap_response, bootstrap_response
+from .importer import DEFAULT_CHUNK_SIZE, StudentImporter, read_rows
+from rest_framework.parsers import MultiPartParser
 
 class Pagination(LimitOffsetPagination):
     default_limit = 10
     max_limit = 100
+
+class EagerLoadingViewMixin:
+    """
+    Serializer daraxtiga mos select_related/prefetch_related rejasini qo'llaydi.
+    GET dagi ?fields= va ?expand= ham serializerga, ham querysetga o'tadi.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        return self.get_serializer_class().setup_eager_loading(queryset, **sparse_fields(self.request))
+
+    def get_serializer(self, *args, **kwargs):
+        return super().get_serializer(*args, **sparse_fields(self.request), **kwargs)
     
 #User
-class UserListView(generics.ListAPIView):
+class UserListView(EagerLoadingViewMixin, generics.ListAPIView):
+    query_budget = 4
     queryset = User.objects.all()
     serializer_class = UserAllSerializer
     pagination_class = Pagination
     permission_classes = [IsAuthenticated]
 
-class UserDetailView(generics.RetrieveAPIView):
+class UserDetailView(EagerLoadingViewMixin, generics.RetrieveAPIView):
+    query_budget = 3
     queryset = User.objects.all()
     serializer_class = UserAllSerializer
     lookup_field = 'id'
@@ -59,34 +81,45 @@ class PhoneSendOTP(APIView):
     @swagger_auto_schema(request_body=SMSSerializer)
     def post(self, request, *args, **kwargs):
         phone_number = request.data.get('phone_number')
-        print(phone_number)
         if phone_number:
-            phone = str(phone_number)
-            user = User.objects.filter(phone__iexact=phone)
+            phone = normalize_phone(phone_number)
+            # phone__iexact UPPER(...) ga aylanib indeksni chetlab o'tadi; normal ko'rinishda aniq tenglik yetarli
+            user = User.objects.filter(phone=phone)
             if user.exists():
                 return Response({
                     'status': False,
                     'detail': 'phone number already exist'
                 })
             else:
-                key = send_otp(phone)
-
-                if key:
-                    cache.set(phone_number, key, 600)
+                issued = otp.get_store().issue(phone)
+                if issued.code is None:
+                    return otp_cooldown_response(issued)
 
+                if send_otp(phone, issued.code):
                     return Response({"message": "SMS sent successfully"}, status=status.HTTP_200_OK)
 
                 return Response({"message": "Failed to send SMS"}, status=status.HTTP_400_BAD_REQUEST)
 
-def send_otp(phone):
+def send_otp(phone, code):
+    # gateway ga so'rov ichida murojaat qilinmaydi: xabar navbatga yoziladi, worker yuboradi
     if phone:
-        key = 1212
-        print(key)
-        return key
+        notifications.enqueue(phone, f"Tasdiqlash kodi: {code}", kind='otp')
+        return True
     else:
         return False
 
+def otp_cooldown_response(issued):
+    return Response({"error": "OTP yaqinda yuborilgan", "retry_after": issued.retry_after},
+                    status=status.HTTP_429_TOO_MANY_REQUESTS, headers={'Retry-After': str(issued.retry_after)})
+
+OTP_ERRORS = {
+    otp.INVALID: "Noto‘g‘ri OTP",
+    otp.EXPIRED: "OTP eskirgan yoki yuborilmagan",
+    otp.LOCKED: "Urinishlar soni tugadi, yangi OTP so‘rang",
+}
+
 class StatisticsView(APIView):
+    query_budget = 1
     def get(self, request):
         date1 = request.GET.get('date1')
         date2 = request.GET.get('date2')
@@ -100,23 +133,28 @@ class StatisticsView(APIView):
         if not date1 or not date2:
             return Response({"error": "Noto‘g‘ri sana formati"}, status=400)
 
-        data = {
-            "registered": Enrollment.objects.filter(status='registered', date_joined__range=[date1, date2]).count(),
-            "studying": Enrollment.objects.filter(status='studying', date_joined__range=[date1, date2]).count(),
-            "graduated": Enrollment.objects.filter(status='graduated', date_joined__range=[date1, date2]).count(),
-        }
+        bucket = request.GET.get('bucket')
+        if bucket and bucket not in statistics.BUCKETS:
+            return Response({"error": "bucket day, week yoki month bo'lishi kerak"}, status=400)
+        by_course = request.GET.get('by_course') in ('1', 'true')
+
+        data = statistics.enrollment_statistics(date1, date2, bucket=bucket, by_course=by_course)
         return Response(data)
 
-class EnrollmentUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
+class EnrollmentUpdateDeleteView(EagerLoadingViewMixin, generics.RetrieveUpdateDestroyAPIView):
+    query_budget = 1
     queryset = Enrollment.objects.all()
     serializer_class = EnrollmentSerializer
 
-class StudentViewSet(viewsets.ModelViewSet):
-    queryset = Student.objects.all()
+class StudentViewSet(EagerLoadingViewMixin, viewsets.ModelViewSet):
+    query_budget = 4
+    queryset = Student.objects.all().order_by('-id')
     serializer_class = StudentSerializer
+    pagination_class = ViewSetPagination
     permission_classes = [IsAuthenticated]
     
-class StudentListView(ListAPIView):
+class StudentListView(EagerLoadingViewMixin, ListAPIView):
+    query_budget = 4
     queryset = Student.objects.all()
     serializer_class = StudentSerializer
     pagination_class = Pagination
@@ -128,7 +166,8 @@ class StudentUpdateView(UpdateAPIView):
     lookup_field = 'id'
     permission_classes = [IsAuthenticated]
 
-class StudentRetrieveAPIView(RetrieveAPIView):
+class StudentRetrieveAPIView(EagerLoadingViewMixin, RetrieveAPIView):
+    query_budget = 3
     queryset = Student.objects.all()
     serializer_class = StudentSerializer
     lookup_field = 'id'
@@ -157,15 +196,36 @@ class StudentCreateAPIView(APIView):
             user.delete()
             return Response(student_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class StudentImportView(APIView):
+    """CSV/XLSX fayldan studentlarni chunk lab import qilish"""
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response({"error": "file talab qilinadi"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            chunk_size = int(request.data.get('chunk_size') or DEFAULT_CHUNK_SIZE)
+        except ValueError:
+            return Response({"error": "chunk_size son bo'lishi kerak"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            report = StudentImporter(chunk_size=chunk_size).run(read_rows(upload, upload.name))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report, status=status.HTTP_200_OK)
+
 class StudentGroupsAPIView(APIView):
+    query_budget = 6
     def get(self, request, student_id):
         try:
             student = Student.objects.get(id=student_id)
-        except Teacher.DoesNotExist:
+        except Student.DoesNotExist:
             return Response({"error": "Student not found"}, status=404)
 
-        groups = Group.objects.filter(g_student=student)
-        serializer = GroupSerializer(groups, many=True)
+        groups = GroupSerializer.setup_eager_loading(Group.objects.filter(students=student), **sparse_fields(request))
+        serializer = GroupSerializer(groups, many=True, **sparse_fields(request))
 
         return Response(serializer.data, status=200)
     
@@ -174,8 +234,8 @@ class StudentGroupListView(APIView):
         student_ids = request.data.get("student_ids", [])
         group_ids = request.data.get("group_ids", [])
 
-        students = Student.objects.filter(id__in=student_ids)
-        groups = Group.objects.filter(id__in=group_ids)
+        students = StudentSerializer.setup_eager_loading(Student.objects.filter(id__in=student_ids))
+        groups = GroupSerializer.setup_eager_loading(Group.objects.filter(id__in=group_ids))
 
         student_data = StudentSerializer(students, many=True).data
         group_data = GroupSerializer(groups, many=True).data
@@ -185,9 +245,11 @@ class StudentGroupListView(APIView):
             status=status.HTTP_200_OK
         )
 
-class TeacherViewSet(viewsets.ModelViewSet):
-    queryset = Teacher.objects.all()
+class TeacherViewSet(EagerLoadingViewMixin, viewsets.ModelViewSet):
+    query_budget = 3
+    queryset = Teacher.objects.all().order_by('-id')
     serializer_class = TeacherSerializer
+    pagination_class = ViewSetPagination
     permission_classes = [IsAuthenticated]
 
 class VerifySms(APIView):
@@ -199,8 +261,8 @@ class VerifySms(APIView):
         if serializer.is_valid():
             phone_number = serializer.validated_data['phone_number']
             verification_code = serializer.validated_data['verification_code']
-            cached_code = str(cache.get(phone_number))
-            if verification_code == str(cached_code):
+            result = otp.get_store().verify(phone_number, verification_code)
+            if result == otp.OK:
                 return Response({
                     'status': True,
                     'detail': 'OTP matched. please proceed for registration'
@@ -208,21 +270,45 @@ class VerifySms(APIView):
             else:
                 return Response({
                     'status': False,
-                    'detail': 'otp INCOORECT'
+                    'detail': OTP_ERRORS[result]
                 })
         else:
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class ExportView(APIView):
+    """students/groups/enrollments/attendance/users ni CSV yoki JSON lines ko'rinishida oqim bilan beradi"""
+    query_budget = 3
+    # barcha telefon va ismlar bitta faylda: faqat xodimlar uchun
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, dataset):
+        if dataset not in exporting.DATASETS:
+            return Response({"error": f"dataset: {', '.join(exporting.DATASETS)}"}, status=status.HTTP_404_NOT_FOUND)
+        fmt = request.GET.get('as', 'csv')
+        if fmt not in exporting.FORMATS:
+            return Response({"error": "as=csv yoki as=jsonl"}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = StreamingHttpResponse(exporting.stream(dataset, fmt), content_type=exporting.FORMATS[fmt])
+        response['Content-Disposition'] = f'attachment; filename="{dataset}.{fmt}"'
+        return response
+
 class RegisterUserApi(APIView):
+    query_budget = 1
+    bulk_limit = 1000
     pagination_class = PageNumberPagination
 
     @swagger_auto_schema(request_body=UserSerializer)
     def post(self, request):
-        serializer = UserSerializer(data=request.data)
+        if isinstance(request.data, list):
+            # ommaviy ro'yxatdan o'tkazish (UserListSerializer): faqat xodimlar uchun
+            if not request.user.is_staff:
+                return Response({"error": "ommaviy ro'yxatdan o'tkazish faqat xodimlar uchun"}, status=status.HTTP_403_FORBIDDEN)
+            serializer = UserSerializer(data=request.data, many=True, max_length=self.bulk_limit)
+        else:
+            serializer = UserSerializer(data=request.data)
         if serializer.is_valid(raise_exception=True):
-            password = serializer.validated_data.get('password')
-            serializer.validated_data['password'] = make_password(password)
+            # parol UserSerializer.create (ro'yxatda hash_passwords) ichida bir marta hash qilinadi
             serializer.save()
             return Response({
                 'status': True,
@@ -230,8 +316,8 @@ class RegisterUserApi(APIView):
             })
 
     def get(self, request):
-        users = User.objects.all().order_by('-id')
-        serializer = UserSerializer(users, many=True)
+        users = UserSerializer.setup_eager_loading(User.objects.all().order_by('-id'), **sparse_fields(request))
+        serializer = UserSerializer(users, many=True, **sparse_fields(request))
         return Response(data=serializer.data)
 
 class ChangePasswordView(APIView):
@@ -239,30 +325,31 @@ class ChangePasswordView(APIView):
 
     @swagger_auto_schema(request_body=ChangePasswordSerializer)
     def patch(self, request, *args, **kwargs):
-        serializer = ChangePasswordSerializer(instance=self.request.user, data=request.data)
+        user = get_object_or_404(User, pk=request.user.pk)
+        serializer = ChangePasswordSerializer(instance=user, data=request.data)
         if serializer.is_valid(raise_exception=True):
             serializer.save()
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class DepartmentsApiView(ModelViewSet):
+class DepartmentsApiView(EagerLoadingViewMixin, CachedResponseMixin, ModelViewSet):
+    query_budget = 2
     queryset = Departments.objects.all().order_by('-id')
     serializer_class = DepartmentsSerializer
-    pagination_class = PageNumberPagination
+    pagination_class = ViewSetPagination
 
 class DepartmentsViewSet(viewsets.ViewSet):
-    permission_classes = [PageNumberPagination]
 
     def list(self, request):
         departments = Departments.objects.all()
         paginator = Pagination()
         result_page = paginator.paginate_queryset(departments, request)
-        serializer = DepartmentsSerializer(result_page, many=True)
+        serializer = DepartmentsSerializer(result_page, many=True, **sparse_fields(request))
         return Response(serializer.data)
 
     def retrieve(self, request, pk=None):
         department = get_object_or_404(Departments, pk=pk)
-        serializer = DepartmentsSerializer(department)
+        serializer = DepartmentsSerializer(department, **sparse_fields(request))
         return Response(serializer.data)
 
     @action(detail=False, methods=['post'], url_path='create/department')
@@ -305,21 +392,22 @@ class DepartmentsViewSet(viewsets.ViewSet):
                             status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class CourseApiView(ModelViewSet):
+class CourseApiView(EagerLoadingViewMixin, CachedResponseMixin, ModelViewSet):
+    query_budget = 2
     queryset = Course.objects.all().order_by('-id')
     serializer_class = CourseSerializer
-    pagination_class = PageNumberPagination
+    pagination_class = ViewSetPagination
 
 class TeacherApiView(APIView):
+    query_budget = 3
     pagination_class = PageNumberPagination
 
     @swagger_auto_schema(request_body=WorkerSerializer)
     def post(self, request):
         serializer = WorkerSerializer(data=request.data)
         if serializer.is_valid(raise_exception=True):
-            user_id = str(serializer.validated_data.get('user'))
             try:
-                user = User.objects.get(phone=user_id)
+                user = serializer.validated_data['user']
                 user.is_teacher = True
                 user.save()
                 serializer.save()
@@ -331,11 +419,14 @@ class TeacherApiView(APIView):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def get(self, request):
-        teacher = Worker.objects.filter(user__is_teacher=True).order_by('-id')
-        serializer = WorkerSerializer(instance=teacher, many=True)
+        teacher = WorkerSerializer.setup_eager_loading(
+            Worker.objects.filter(user__is_teacher=True).order_by('-id'), **sparse_fields(request)
+        )
+        serializer = WorkerSerializer(instance=teacher, many=True, **sparse_fields(request))
         return Response(data=serializer.data)
 
-class TeacherListView(ListAPIView):
+class TeacherListView(EagerLoadingViewMixin, ListAPIView):
+    query_budget = 3
     queryset = Teacher.objects.all()
     serializer_class = TeacherSerializer
     pagination_class = Pagination
@@ -345,7 +436,8 @@ class TeacherUpdateView(UpdateAPIView):
     serializer_class = TeacherSerializer
     lookup_field = 'id'
 
-class TeacherRetrieveAPIView(RetrieveAPIView):
+class TeacherRetrieveAPIView(EagerLoadingViewMixin, RetrieveAPIView):
+    query_budget = 2
     queryset = Teacher.objects.all()
     serializer_class = TeacherSerializer
     lookup_field = 'id'
@@ -373,14 +465,15 @@ class TeacherCreateAPIView(APIView):
             return Response(teacher_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 class TeacherGroupsAPIView(APIView):
+    query_budget = 6
     def get(self, request, teacher_id):
         try:
             teacher = Teacher.objects.get(id=teacher_id)
         except Teacher.DoesNotExist:
             return Response({"error": "Teacher not found"}, status=404)
 
-        groups = teacher.groups.all()
-        serializer = GroupSerializer(groups, many=True)
+        groups = GroupSerializer.setup_eager_loading(Group.objects.filter(teacher__user_id=teacher.user_id), **sparse_fields(request))
+        serializer = GroupSerializer(groups, many=True, **sparse_fields(request))
 
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -391,9 +484,7 @@ class WorkerApiView(APIView):
     def post(self, request):
         serializer = WorkerSerializer(data=request.data)
         if serializer.is_valid(raise_exception=True):
-            user_id = serializer.validated_data.get('user')
-
-            user = User.objects.get(phone=f"{user_id}")
+            user = serializer.validated_data['user']
             user.is_staff = True
             user.save()
             serializer.save()
@@ -403,18 +494,21 @@ class WorkerApiView(APIView):
 
     def get(self, request):
 
-        worker = Worker.objects.filter(user__is_staff=True).order_by('-id')
-        serializer = WorkerSerializer(worker, many=True)
+        worker = WorkerSerializer.setup_eager_loading(
+            Worker.objects.filter(user__is_staff=True).order_by('-id'), **sparse_fields(request)
+        )
+        serializer = WorkerSerializer(worker, many=True, **sparse_fields(request))
         return Response(data=serializer.data)
 
 class WorkerApiViewId(APIView):
+    query_budget = 3
     def get(self, request, pk):
         try:
             worker = Worker.objects.get(pk=pk)
-            serializer = WorkerSerializer(worker)
-            return Response(data=serializer.data)
-        except Exception as e:
-            return Response(data={'error': e})
+        except Worker.DoesNotExist:
+            return Response({"error": "Worker not found"}, status=404)
+        serializer = WorkerSerializer(worker, **sparse_fields(request))
+        return Response(data=serializer.data)
 
     def put(self, request, pk):
         try:
@@ -443,8 +537,7 @@ class WorkerApiView(APIView):
     def post(self, request):
         serializer = WorkerSerializer(data=request.data)
         if serializer.is_valid(raise_exception=True):
-            user_id = serializer.validated_data.get('user')
-            user = User.objects.get(phone=user_id)
+            user = serializer.validated_data['user']
             user.is_staff = True
             user.save()
             serializer.save()
@@ -453,29 +546,33 @@ class WorkerApiView(APIView):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def get(self, request):
-        worker = Worker.objects.filter(user__is_staff=True).order_by('-id')
-        serializer = WorkerSerializer(worker, many=True)
+        worker = WorkerSerializer.setup_eager_loading(
+            Worker.objects.filter(user__is_staff=True).order_by('-id'), **sparse_fields(request)
+        )
+        serializer = WorkerSerializer(worker, many=True, **sparse_fields(request))
         return Response(data=serializer.data)
 
-class RoomAPIView(ModelViewSet):
+class RoomAPIView(EagerLoadingViewMixin, CachedResponseMixin, ModelViewSet):
+    query_budget = 2
     queryset = Rooms.objects.all().order_by('-id')
     serializer_class = RoomSerializer
-    pagination_class = PageNumberPagination
+    pagination_class = ViewSetPagination
 
-class DayAPIView(ModelViewSet):
+class DayAPIView(EagerLoadingViewMixin, CachedResponseMixin, ModelViewSet):
+    query_budget = 2
     queryset = Day.objects.all().order_by('-id')
     serializer_class = DaySerializer
-    pagination_class = PageNumberPagination
+    pagination_class = ViewSetPagination
 
 class WorkerApiView(APIView):
+    query_budget = 3
     pagination_class = PageNumberPagination
 
     @swagger_auto_schema(request_body=WorkerSerializer)
     def post(self, request):
         serializer = WorkerSerializer(data=request.data)
         if serializer.is_valid(raise_exception=True):
-            user_id = serializer.validated_data.get('user')
-            user = User.objects.get(phone=user_id)
+            user = serializer.validated_data['user']
             user.is_staff = True
             user.save()
             serializer.save()
@@ -484,19 +581,21 @@ class WorkerApiView(APIView):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def get(self, request):
-        worker = Worker.objects.filter(user__is_staff=True).order_by('-id')
-        serializer = WorkerSerializer(worker, many=True)
+        worker = WorkerSerializer.setup_eager_loading(
+            Worker.objects.filter(user__is_staff=True).order_by('-id'), **sparse_fields(request)
+        )
+        serializer = WorkerSerializer(worker, many=True, **sparse_fields(request))
         return Response(data=serializer.data)
 
 
 class StudentApiView(APIView):
+    query_budget = 3
     pagination_class = PageNumberPagination
     @swagger_auto_schema(request_body=StudentSerializer)
     def post(self, request):
         serializer = StudentSerializer(data=request.data)
         if serializer.is_valid(raise_exception=True):
-            user_id = serializer.validated_data.get('user')
-            user = User.objects.get(phone=user_id)
+            user = serializer.validated_data['user']
             user.is_student = True
             user.save()
             serializer.save()
@@ -505,27 +604,24 @@ class StudentApiView(APIView):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def get(self, request):
-        student = Student.objects.filter(user__is_student=True).order_by('-id')
-        group = Group.objects.all().order_by('-id')
-        course = Course.objects.all().order_by('-id')
-        serializer_student = StudentSerializer(student, many=True)
-        serializer_group = GroupSerializer(group, many=True)
-        serializer_course = CourseSerializer(course, many=True)
-        data = {
-            "students": serializer_student.data,
-            "groups": serializer_group.data,
-            "courses": serializer_course.data
-        }
-        return Response(data=data)
+        return bootstrap_response(request, ['students', 'groups', 'courses'])
+
+class StudentApiAsync(View):
+    """StudentApiView.get ning ASGI varianti"""
+    query_budget = 3
+
+    async def get(self, request):
+        return await abootstrap_response(request, ['students', 'groups', 'courses'])
 
 class StudentApiViewId(APIView):
+    query_budget = 3
     def get(self, request, pk):
         try:
             student = Student.objects.get(pk=pk)
-            serializer = StudentSerializer(student)
-            return Response(data=serializer.data)
-        except Exception as e:
-            return Response(data={'error': e})
+        except Student.DoesNotExist:
+            return Response({"error": "Student not found"}, status=404)
+        serializer = StudentSerializer(student, **sparse_fields(request))
+        return Response(data=serializer.data)
 
     def put(self, request, pk):
         try:
@@ -547,72 +643,190 @@ class StudentApiViewId(APIView):
         except Exception as e:
             return Response(data={'error': e})
 
-class GroupApiView(ModelViewSet):
-    pagination_class = PageNumberPagination
+class GroupApiView(EagerLoadingViewMixin, ModelViewSet):
+    query_budget = 6
+    pagination_class = ViewSetPagination
     queryset = Group.objects.all().order_by('-id')
     serializer_class = GroupSerializer
 
 class GroupApi(APIView):
+    query_budget = 3
     pagination_class = PageNumberPagination
     def get(self, request):
-        teachers = Worker.objects.filter(user__is_teacher=True).order_by('-id')
-        courses = Course.objects.all().order_by('-id')
-        tables = Table.objects.all().order_by('-id')
-        serializer_teachers = WorkerSerializer(teachers, many=True)
-        serializer_courses = CourseSerializer(courses, many=True)
-        serializer_table = TableSerializer(tables, many=True)
-
-        datas = {
-            "teachers": serializer_teachers.data,
-            "courses": serializer_courses.data,
-            "tables": serializer_table.data
-        }
-        return Response(data=datas)
-
-class TableTypeApi(ModelViewSet):
-    pagination_class = PageNumberPagination
+        return bootstrap_response(request, ['teachers', 'courses', 'tables'])
+
+class GroupApiAsync(View):
+    """GroupApi.get ning ASGI varianti: keshda yo'q sectionlar parallel quriladi"""
+    query_budget = 3
+
+    async def get(self, request):
+        return await abootstrap_response(request, ['teachers', 'courses', 'tables'])
+
+class MetricsView(View):
+    """Process ichidagi so'rov histogramlari, Prometheus text formatida"""
+    query_budget = 0
+
+    def get(self, request):
+        token = metrics.config()['TOKEN']
+        if token and request.headers.get('Authorization') != f'Bearer {token}':
+            return HttpResponse(status=401)
+        # token berilmagan bo'lsa: faqat DEBUG da yoki staff sessiyasi bilan
+        if not token and not settings.DEBUG and not request.user.is_staff:
+            return HttpResponse(status=403)
+        return HttpResponse(metrics.registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+class ScheduleConflictsView(APIView):
+    """Butun dars jadvali bo'yicha xona va o'qituvchi to'qnashuvlari"""
+    query_budget = 2
+
+    def get(self, request):
+        conflicts = schedule.get_index().report()
+        return Response({'count': len(conflicts), 'conflicts': conflicts})
+
+class TimetableSolveView(APIView):
+    """Dars jadvalini avtomatik tuzish: fon rejimida ishlaydi, progress GET orqali"""
+    query_budget = 1
+    permission_classes = [IsAdminUser]
+
+    @swagger_auto_schema(request_body=TimetableSolveSerializer)
+    def post(self, request):
+        serializer = TimetableSolveSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        options = dict(serializer.validated_data)
+        options.setdefault('slots', timetable.DEFAULT_SLOTS)
+        try:
+            job_id = timetable.start_job(**options)
+        except timetable.JobRunning as e:
+            return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT)
+        return Response({'job': job_id}, status=status.HTTP_202_ACCEPTED)
+
+    def get(self, request, job_id=None):
+        job = timetable.get_job(job_id) if job_id else None
+        if job is None:
+            return Response({"error": "job not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(job)
+
+class TableTypeApi(EagerLoadingViewMixin, CachedResponseMixin, ModelViewSet):
+    query_budget = 2
+    pagination_class = ViewSetPagination
     queryset = TableType.objects.all().order_by('-id')
     serializer_class = TableTypeSerializer
 
-class TableApi(ModelViewSet):
-    pagination_class = PageNumberPagination
+class TableApi(EagerLoadingViewMixin, ModelViewSet):
+    query_budget = 2
+    pagination_class = ViewSetPagination
     queryset = Table.objects.all().order_by('-id')
     serializer_class = TableSerializer
 
-class TopicsApi(ModelViewSet):
+class TopicsApi(EagerLoadingViewMixin, ModelViewSet):
+    query_budget = 2
     queryset = Topics.objects.all().order_by('-id')
     serializer_class = TopicsSerializer
-    pagination_class = PageNumberPagination
+    pagination_class = ViewSetPagination
 
-class AttendanceLevelApi(ModelViewSet):
+class AttendanceLevelApi(EagerLoadingViewMixin, CachedResponseMixin, ModelViewSet):
+    query_budget = 2
     queryset = AttendanceLevel.objects.all().order_by('-id')
     serializer_class = AttendanceLevelSerializer
-    pagination_class = PageNumberPagination
+    pagination_class = ViewSetPagination
     
-class GroupHomeWorkApi(ModelViewSet):
-    pagination_class = PageNumberPagination
+class AttendanceRollCallView(APIView):
+    """Butun guruh uchun yo'qlama: bitta tranzaksiyada bulk upsert"""
+    query_budget = 1
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(request_body=AttendanceRollCallSerializer)
+    def post(self, request):
+        serializer = AttendanceRollCallSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        rows = serializer.save()
+        return Response({
+            'status': True,
+            'group': serializer.validated_data['group'],
+            'date': serializer.validated_data['date'],
+            'count': len(rows),
+        }, status=status.HTTP_200_OK)
+
+    def get(self, request):
+        group_id = request.GET.get('group')
+        date = parse_date(request.GET.get('date') or '')
+        if not group_id or not date:
+            return Response({"error": "group va date parametrlari kerak"}, status=400)
+        if not group_id.isdigit():
+            return Response({"error": "group son bo'lishi kerak"}, status=400)
+        attendance = Attendance.objects.filter(group_id=int(group_id), date=date).order_by('student_id')
+        attendance = AttendanceSerializer.setup_eager_loading(attendance, **sparse_fields(request))
+        return Response(AttendanceSerializer(attendance, many=True, **sparse_fields(request)).data)
+
+class AttendanceRateView(APIView):
+    """Student/guruh bo'yicha yo'qlama foizlari, level kesimida"""
+    query_budget = 3
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        date1 = parse_date(request.GET.get('date1') or '')
+        date2 = parse_date(request.GET.get('date2') or '')
+        if not date1 or not date2:
+            return Response({"error": "date1 va date2 parametrlari kerak"}, status=400)
+
+        filters = {}
+        for name in ('group', 'course', 'student'):
+            value = request.GET.get(name)
+            if value:
+                if not value.isdigit():
+                    return Response({"error": f"{name} son bo'lishi kerak"}, status=400)
+                filters[f'{name}_id'] = int(value)
+
+        data = statistics.attendance_rates(
+            date1, date2, use_summary=request.GET.get('source') == 'summary', **filters,
+        )
+        return Response(data)
+
+class SearchView(APIView):
+    """Ism, telefon yoki email bo'yicha tezkor qidiruv (trigram indeks, xatolarga chidamli)"""
+    # aniq moslik kam bo'lsa fuzzy uchun ikkinchi so'rov
+    query_budget = 2
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        query = request.GET.get('q', '').strip()
+        if not query:
+            return Response({"error": "q parametri kerak"}, status=400)
+        kind = request.GET.get('kind') or None
+        if kind and kind not in dict(SearchEntry.KIND_CHOICES):
+            return Response({"error": f"kind quyidagilardan biri bo'lishi kerak: {', '.join(dict(SearchEntry.KIND_CHOICES))}"}, status=400)
+        limit = request.GET.get('limit', str(search.DEFAULT_LIMIT))
+        if not limit.isdigit():
+            return Response({"error": "limit son bo'lishi kerak"}, status=400)
+        results = search.search(query, kind=kind, limit=int(limit), fuzzy=request.GET.get('fuzzy') != '0')
+        return Response({'count': len(results), 'results': results})
+
+class GroupHomeWorkApi(EagerLoadingViewMixin, ModelViewSet):
+    query_budget = 2
+    pagination_class = ViewSetPagination
     queryset = GroupHomeWork.objects.all().order_by('-id')
     serializer_class = GroupHomeWorkSerializer
 
-class HomeWorkApi(ModelViewSet):
+class HomeWorkApi(EagerLoadingViewMixin, ModelViewSet):
+    query_budget = 2
     queryset = HomeWork.objects.all().order_by('-id')
     serializer_class = HomeWorkSerializer
-    pagination_class = PageNumberPagination
+    pagination_class = ViewSetPagination
 
 
 class ParentsViewSet(viewsets.ViewSet):
-    permission_classes = [PageNumberPagination]
+    query_budget = 2
 
     def list(self, request):
         parents = Parents.objects.all()
         paginator = Pagination()
         result_page = paginator.paginate_queryset(parents, request)
-        serializer = ParentsSerializer(result_page, many=True)
+        serializer = ParentsSerializer(result_page, many=True, **sparse_fields(request))
         return Response(serializer.data)
 
     def retrieve(self, request, pk=None):
         parent = get_object_or_404(Parents, pk=pk)
-        serializer = ParentsSerializer(parent)
+        serializer = ParentsSerializer(parent, **sparse_fields(request))
         return Response(serializer.data)
 
     @action(detail=False, methods=['post'], url_path='create/parent')
@@ -648,17 +862,16 @@ class RegisterView(APIView):
     """
 
     def post(self, request):
-        phone = request.data.get("phone")
+        phone = normalize_phone(request.data.get("phone"))
         if not phone:
             return Response({"error": "Telefon raqami talab qilinadi"}, status=status.HTTP_400_BAD_REQUEST)
         
-        # 4 xonali tasodifiy OTP yaratish
-        otp_code = random.randint(1000, 9999)
-        
-        # OTP ni vaqtinchalik saqlash (30 daqiqa)
-        cache.set(phone, otp_code, timeout=1800)
+        # tasodifiy OTP umumiy store ga yoziladi: istalgan worker process tekshira oladi
+        issued = otp.get_store().issue(phone)
+        if issued.code is None:
+            return otp_cooldown_response(issued)
 
-        return Response({"message": "OTP kod yuborildi", "otp": otp_code}, status=status.HTTP_201_CREATED)
+        return Response({"message": "OTP kod yuborildi", "otp": issued.code}, status=status.HTTP_201_CREATED)
 
 class VerifyOTPView(APIView):
     """
@@ -666,26 +879,20 @@ class VerifyOTPView(APIView):
     """
 
     def post(self, request):
-        phone = request.data.get("phone")
+        phone = normalize_phone(request.data.get("phone"))
         otp_code = request.data.get("otp")
 
         if not phone or not otp_code:
             return Response({"error": "Telefon raqam va OTP kod talab qilinadi"}, status=status.HTTP_400_BAD_REQUEST)
 
-        stored_otp = cache.get(phone)
-
-        if not stored_otp or str(stored_otp) != str(otp_code):
-            return Response({"error": "Noto‘g‘ri yoki eskirgan OTP"}, status=status.HTTP_400_BAD_REQUEST)
+        # tekshirish va o'chirish bitta atomar amal: bir kod ikki marta o'tmaydi
+        result = otp.get_store().verify(phone, otp_code)
+        if result != otp.OK:
+            return Response({"error": OTP_ERRORS[result]}, status=status.HTTP_400_BAD_REQUEST)
 
         # OTP to‘g‘ri bo‘lsa, foydalanuvchini ro‘yxatdan o‘tkazamiz
-        user, created = User.objects.get_or_create(phone=phone)
-        
-        if created:
-            user.set_password(str(otp_code))  # Parol sifatida vaqtinchalik OTP
-            user.save()
-
-        # OTP ni cache dan o‘chirish
-        cache.delete(phone)
+        if not User.objects.filter(phone=phone).exists():
+            User.objects.create_user(phone, str(otp_code))  # Parol sifatida vaqtinchalik OTP
 
         return Response({"message": "Ro'yxatdan o‘tish muvaffaqiyatli yakunlandi"}, status=status.HTTP_200_OK)
 